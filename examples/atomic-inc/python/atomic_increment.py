@@ -1,9 +1,14 @@
 import os
+import sys
+import logging
 import requests
-import json
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
+# Shared helpers live in examples/common/python
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common', 'python'))
+from hpkv_transport import HPKVTransport
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -11,37 +16,61 @@ load_dotenv()
 HPKV_BASE_URL = os.getenv("HPKV_BASE_URL")
 HPKV_API_KEY = os.getenv("HPKV_API_KEY")
 
-def create_key(key: str, initial_value: int = 0) -> bool:
+# Request/response tracing is emitted at DEBUG level; set HPKV_LOG_LEVEL=DEBUG to see it
+logger = logging.getLogger("hpkv.atomic")
+
+# Transport shared by all calls that don't pass their own
+_default_transport: Optional[HPKVTransport] = None
+
+def get_transport() -> HPKVTransport:
+    """
+    Get the module-wide pooled transport, creating it on first use.
+    
+    The transport uses the shared rate limiter (set_rate_limiter() or
+    HPKV_RATE_LIMIT), so throttled increments are paced and resent.
+    
+    Returns:
+        HPKVTransport: Transport configured from HPKV_BASE_URL and HPKV_API_KEY
+    """
+    global _default_transport
+    if _default_transport is None:
+        if not HPKV_BASE_URL or not HPKV_API_KEY:
+            raise ValueError("HPKV_BASE_URL and HPKV_API_KEY must be set in environment variables")
+        _default_transport = HPKVTransport(HPKV_BASE_URL, HPKV_API_KEY)
+    return _default_transport
+
+def close_transport() -> None:
+    """Close the module-wide transport, if it was created."""
+    global _default_transport
+    if _default_transport is not None:
+        _default_transport.close()
+        _default_transport = None
+
+def create_key(key: str, initial_value: int = 0, transport: Optional[HPKVTransport] = None) -> bool:
     """
     Create a new key with an initial value.
     
     Args:
         key (str): The key to create
         initial_value (int): Initial value for the key (defaults to 0)
+        transport (HPKVTransport): Transport to use (defaults to the module-wide one)
     
     Returns:
         bool: True if creation was successful, False otherwise
     """
     try:
+        transport = transport or get_transport()
+        
         # Store the value as a string representation of the number
         payload = {
             "key": key,
             "value": str(initial_value)  # Convert to string to ensure proper number format
         }
-        print(f"Creating key with payload: {json.dumps(payload)}")
+        logger.debug("Creating key with payload: %s", payload)
         
-        response = requests.post(
-            f"{HPKV_BASE_URL}/record",
-            headers={
-                "Content-Type": "application/json",
-                "x-api-key": HPKV_API_KEY
-            },
-            json=payload,
-            timeout=10
-        )
+        response = transport.post("/record", "create", json=payload)
         
-        print(f"Create response status: {response.status_code}")
-        print(f"Create response body: {response.text}")
+        logger.debug("Create response: %s %s", response.status_code, response.text)
         
         if response.status_code not in [200, 201]:
             error_msg = f"Create failed with status {response.status_code}"
@@ -60,7 +89,8 @@ def create_key(key: str, initial_value: int = 0) -> bool:
         print(f"Error creating record: {str(e)}")
         return False
 
-def atomic_increment(key: str, increment: int) -> Dict[str, Any]:
+def atomic_increment(key: str, increment: int, transport: Optional[HPKVTransport] = None,
+                     create_missing: bool = True) -> Dict[str, Any]:
     """
     Perform an atomic increment operation on a key in HPKV.
     If the key doesn't exist, it will be created with an initial value of 0.
@@ -68,15 +98,17 @@ def atomic_increment(key: str, increment: int) -> Dict[str, Any]:
     Args:
         key (str): The key to increment
         increment (int): The value to add (positive) or subtract (negative)
+        transport (HPKVTransport): Transport to use (defaults to the module-wide one)
+        create_missing (bool): Create a missing key and retry; if False, raise KeyError instead
     
     Returns:
         Dict[str, Any]: Response from the HPKV API
     
     Raises:
+        KeyError: If the key doesn't exist and create_missing is False
         ValueError: If the API request fails or returns an error
     """
-    if not HPKV_BASE_URL or not HPKV_API_KEY:
-        raise ValueError("HPKV_BASE_URL and HPKV_API_KEY must be set in environment variables")
+    transport = transport or get_transport()
 
     try:
         # First, try to increment the key
@@ -84,39 +116,25 @@ def atomic_increment(key: str, increment: int) -> Dict[str, Any]:
             "key": key,
             "increment": increment
         }
-        print(f"Attempting atomic increment with payload: {json.dumps(payload)}")
+        logger.debug("Attempting atomic increment with payload: %s", payload)
         
-        response = requests.post(
-            f"{HPKV_BASE_URL}/record/atomic",
-            headers={
-                "Content-Type": "application/json",
-                "x-api-key": HPKV_API_KEY
-            },
-            json=payload,
-        )
+        response = transport.post("/record/atomic", "atomic", json=payload)
         
-        print(f"Atomic increment response status: {response.status_code}")
-        print(f"Atomic increment response body: {response.text}")
+        logger.debug("Atomic increment response: %s %s", response.status_code, response.text)
         
         # If the key doesn't exist (404), create it first and try again
         if response.status_code == 404:
-            print(f"Key '{key}' doesn't exist. Creating it with initial value 0...")
-            if not create_key(key, 0):
+            if not create_missing:
+                raise KeyError(key)
+            logger.debug("Key '%s' doesn't exist. Creating it with initial value 0...", key)
+            if not create_key(key, 0, transport):
                 raise ValueError("Failed to create key with initial value")
             
             # Retry the increment operation
-            print("Retrying atomic increment after key creation...")
-            response = requests.post(
-                f"{HPKV_BASE_URL}/record/atomic",
-                headers={
-                    "Content-Type": "application/json",
-                    "x-api-key": HPKV_API_KEY
-                },
-                json=payload,
-            )
+            logger.debug("Retrying atomic increment after key creation...")
+            response = transport.post("/record/atomic", "atomic", json=payload)
             
-            print(f"Retry response status: {response.status_code}")
-            print(f"Retry response body: {response.text}")
+            logger.debug("Retry response: %s %s", response.status_code, response.text)
         
         # Raise an exception for bad status codes
         response.raise_for_status()
@@ -136,24 +154,19 @@ def atomic_increment(key: str, increment: int) -> Dict[str, Any]:
         raise ValueError(f"Invalid response from HPKV API: {str(e)}")
 
 def main():
+    logging.basicConfig(level=os.getenv("HPKV_LOG_LEVEL", "WARNING").upper(),
+                        format="%(levelname)s %(name)s: %(message)s")
+    
     # Example usage
     key = "counter:example"
     
     try:
         # First, let's delete the key if it exists to start fresh
         print("Cleaning up any existing key...")
-        response = requests.delete(
-            f"{HPKV_BASE_URL}/record/{key}",
-            headers={
-                "Content-Type": "application/json",
-                "x-api-key": HPKV_API_KEY
-            }
-        )
+        transport = get_transport()
+        response = transport.delete(f"/record/{key}", "delete")
         create_key(key, 0)
-        r1 = requests.get(f"{HPKV_BASE_URL}/record/{key}", headers={
-            "Content-Type": "application/json",
-            "x-api-key": HPKV_API_KEY
-        })
+        r1 = transport.get(f"/record/{key}", "read")
         print(f"Get response status: {r1.status_code}")
         print(f"Delete response status: {response.status_code}")
         print(f"Delete response body: {response.text}")
@@ -181,6 +194,8 @@ def main():
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
         exit(1)
+    finally:
+        close_transport()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
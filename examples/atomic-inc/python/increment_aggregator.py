@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import time
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+# Shared helpers live in examples/common/python
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common', 'python'))
+from hpkv_transport import HPKVTransport
+from hpkv_batch import DEFAULT_MAX_WORKERS, run_batch
+
+from atomic_increment import atomic_increment, close_transport, get_transport
+
+logger = logging.getLogger("hpkv.atomic")
+
+class _PendingKey:
+    """Deltas buffered for one key since the last flush."""
+
+    __slots__ = ('delta', 'count', 'future')
+
+    def __init__(self):
+        self.delta = 0
+        self.count = 0
+        self.future: Future = Future()
+
+class IncrementAggregator:
+    """
+    Coalesce increments to the same keys into one atomic request per key.
+
+    `add` only sums the delta into an in-memory table. A background thread
+    flushes the table every `flush_interval` seconds, or as soon as
+    `flush_threshold` increments are buffered, sending one `/record/atomic`
+    request per key with the summed delta. Atomicity is still provided by
+    the server; only the number of requests changes.
+
+    Every `add` returns a Future that resolves to the key's value after the
+    flush that carried the delta. Callers that added to the same key in the
+    same window share that value, so it reflects the whole batch rather than
+    each individual increment.
+
+    Example:
+        with IncrementAggregator(flush_interval=0.1) as aggregator:
+            for _ in range(1000):
+                aggregator.add("page-views:home", 1)
+            print(aggregator.add("page-views:home", 1).result())
+    """
+
+    def __init__(self, flush_interval: float = 0.1, flush_threshold: int = 10000,
+                 transport: Optional[HPKVTransport] = None, max_workers: int = DEFAULT_MAX_WORKERS,
+                 increment: Callable[..., Dict] = atomic_increment):
+        """
+        Initialize the aggregator and start its flusher thread.
+
+        Args:
+            flush_interval (float): Seconds between periodic flushes
+            flush_threshold (int): Buffered increments (across all keys) that trigger an early flush
+            transport (HPKVTransport): Transport to use (defaults to the module-wide one)
+            max_workers (int): Keys flushed in parallel
+            increment (Callable): Function sending one increment, called as increment(key, delta, transport)
+        """
+        if flush_interval <= 0:
+            raise ValueError("flush_interval must be positive")
+        if flush_threshold < 1:
+            raise ValueError("flush_threshold must be at least 1")
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.transport = transport
+        self.max_workers = max_workers
+        self._increment = increment
+
+        self._lock = threading.Lock()
+        # Serializes flushes so per-key requests are never reordered
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[str, _PendingKey] = {}
+        self._buffered = 0
+        self._wakeup = threading.Event()
+        self._closed = False
+
+        self.increments = 0
+        self.requests = 0
+
+        self._thread = threading.Thread(target=self._run, name="hpkv-increment-flusher", daemon=True)
+        self._thread.start()
+
+    def add(self, key: str, delta: int = 1) -> Future:
+        """
+        Buffer an increment for a key.
+
+        Args:
+            key (str): The key to increment
+            delta (int): The value to add (positive) or subtract (negative)
+
+        Returns:
+            Future: Resolves to the key's value after the flush carrying this delta,
+                or raises the flush's ValueError if that request failed
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("IncrementAggregator is closed")
+            pending = self._pending.get(key)
+            if pending is None:
+                pending = self._pending[key] = _PendingKey()
+            pending.delta += delta
+            pending.count += 1
+            self._buffered += 1
+            self.increments += 1
+            if self._buffered >= self.flush_threshold:
+                self._wakeup.set()
+            return pending.future
+
+    def flush(self) -> Dict[str, int]:
+        """
+        Send everything buffered so far, one atomic request per key.
+
+        Returns:
+            Dict[str, int]: New value of each key that was flushed successfully
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._buffered = 0
+            if not batch:
+                return {}
+
+            transport = self.transport or get_transport()
+            values: Dict[str, int] = {}
+            items = list(batch.items())
+            results = run_batch(lambda item: self._increment(item[0], item[1].delta, transport), items,
+                                key_of=lambda item: item[0], max_workers=min(self.max_workers, len(items)))
+            for result in results:
+                pending = batch[result.key]
+                if result.ok:
+                    values[result.key] = result.value.get("newValue")
+                    pending.future.set_result(values[result.key])
+                else:
+                    print(f"Error flushing {pending.count} increment(s) for '{result.key}': {result.error}", file=sys.stderr)
+                    pending.future.set_exception(result.error)
+            self.requests += len(items)
+            logger.debug("Flushed %d key(s) in one request each", len(items))
+            return values
+
+    def _run(self) -> None:
+        """Flusher thread: flush on every interval or when the threshold is reached."""
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing increments: {str(e)}", file=sys.stderr)
+            if self._closed:
+                return
+
+    def close(self) -> None:
+        """Stop accepting increments, flush what is buffered and stop the flusher thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        # Anything added between the thread's last flush and close
+        self.flush()
+
+    def __enter__(self) -> 'IncrementAggregator':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+def main():
+    logging.basicConfig(level=os.getenv("HPKV_LOG_LEVEL", "WARNING").upper(),
+                        format="%(levelname)s %(name)s: %(message)s")
+
+    key = "counter:aggregated"
+    count = 10000
+
+    try:
+        transport = get_transport()
+        transport.delete(f"/record/{key}", "delete")
+
+        print(f"Adding {count} increments of 1 to '{key}' from 4 threads...")
+        start = time.perf_counter()
+        futures: List[Future] = []
+        with IncrementAggregator(flush_interval=0.05) as aggregator:
+            def worker() -> None:
+                for _ in range(count // 4):
+                    futures.append(aggregator.add(key, 1))
+            threads = [threading.Thread(target=worker) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - start
+
+        print(f"Final value: {futures[-1].result()}")
+        print(f"Sent {aggregator.requests} atomic requests for {aggregator.increments} increments in {elapsed:.2f}s")
+
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        exit(1)
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        exit(1)
+    finally:
+        close_transport()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import random
+import logging
+import threading
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+# Shared helpers live in examples/common/python
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common', 'python'))
+# Range queries come from the range-queries example
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'range-queries', 'python'))
+from hpkv_transport import HPKVTransport
+from hpkv_range_queries_example import HPKVRangeQueriesExample
+
+from atomic_increment import atomic_increment, close_transport, get_transport
+
+logger = logging.getLogger("hpkv.atomic")
+
+# Shard indexes are decimal digits, so every shard key sorts below prefix + '~'
+_SHARD_RANGE_END = '~'
+
+class ShardedCounter:
+    """
+    A counter spread over N shard keys to avoid contention on one hot key.
+
+    Increments go to a random shard, `counter:<name>:#<i>` for i in 0..N-1,
+    so concurrent writers hit different keys. The total is read by summing
+    every shard with a single range query over the `counter:<name>:#` prefix.
+
+    Shards this instance has seen (written or returned by a read) are
+    remembered, so their increments go straight to `/record/atomic`; only a
+    shard's first increment pays for the create-and-retry on a missing key.
+
+    Example:
+        counter = ShardedCounter("page-views", shards=16)
+        counter.increment()
+        print(counter.value())
+    """
+
+    def __init__(self, name: str, shards: int = 16, transport: Optional[HPKVTransport] = None):
+        """
+        Initialize the counter.
+
+        Args:
+            name (str): Counter name; shard keys are counter:<name>:#<i>
+            shards (int): Number of shards increments are spread over
+            transport (HPKVTransport): Transport to use (defaults to the module-wide one)
+        """
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        self.name = name
+        self.prefix = f"counter:{name}:#"
+        self.shards = shards
+        self.transport = transport or get_transport()
+        self._ranges = HPKVRangeQueriesExample(transport=self.transport)
+        self._known: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def shard_key(self, index: int) -> str:
+        """Key of one shard."""
+        return f"{self.prefix}{index}"
+
+    def _shard_index(self, key: str) -> Optional[int]:
+        """Shard index of a key under this counter's prefix, or None if it isn't a shard key."""
+        suffix = key[len(self.prefix):]
+        return int(suffix) if key.startswith(self.prefix) and suffix.isdigit() else None
+
+    def increment(self, delta: int = 1, shard: Optional[int] = None) -> int:
+        """
+        Add a delta to one shard.
+
+        Args:
+            delta (int): The value to add (positive) or subtract (negative)
+            shard (int): Shard to write (defaults to a random one)
+
+        Returns:
+            int: New value of the shard that was written (read value() for the total)
+
+        Raises:
+            ValueError: If the API request fails or returns an error
+        """
+        index = random.randrange(self.shards) if shard is None else shard
+        key = self.shard_key(index)
+        if index in self._known:
+            try:
+                return atomic_increment(key, delta, self.transport, create_missing=False)["newValue"]
+            except KeyError:
+                # Deleted behind our back: forget it and take the creating path below
+                logger.debug("Shard '%s' disappeared, recreating it", key)
+                with self._lock:
+                    self._known.discard(index)
+        result = atomic_increment(key, delta, self.transport)
+        with self._lock:
+            self._known.add(index)
+        return result["newValue"]
+
+    def _scan(self) -> Iterator[Tuple[int, int]]:
+        """Yield (shard index, value) for every shard stored, following truncated pages."""
+        start_key = self.prefix
+        end_key = self.prefix + _SHARD_RANGE_END
+        limit = max(self.shards, len(self._known), 1)
+        while True:
+            result = self._ranges.perform_range_query(start_key, end_key, limit=limit + 1)
+            records = result.get("records", [])
+            for record in records:
+                # The next page starts at the last key of this one
+                if record["key"] == start_key and start_key != self.prefix:
+                    continue
+                index = self._shard_index(record["key"])
+                if index is not None:
+                    yield index, int(record["value"])
+            if not result.get("truncated") or not records:
+                return
+            start_key = records[-1]["key"]
+
+    def shard_values(self) -> Dict[int, int]:
+        """
+        Read every shard with one range query (more only if the server truncates the result).
+
+        Returns:
+            Dict[int, int]: Value of each stored shard, by shard index
+        """
+        values = dict(self._scan())
+        with self._lock:
+            self._known.update(values)
+        return values
+
+    def value(self) -> int:
+        """
+        Read the counter's total.
+
+        Shards beyond the current shard count (left over from a larger
+        count) are included, so the total is right across resizes.
+
+        Returns:
+            int: Sum of all shards
+        """
+        return sum(self.shard_values().values())
+
+    def resize(self, shards: int) -> None:
+        """
+        Change the number of shards increments are spread over.
+
+        Growing takes effect immediately. Shrinking moves each retired
+        shard's count into a remaining shard with two atomic increments
+        (add to the target, then subtract from the retired shard), so the
+        total is never under-reported; increments other writers still send
+        to a retired shard are counted by value() all the same.
+
+        Args:
+            shards (int): New number of shards
+        """
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        retired = {index: value for index, value in self.shard_values().items() if index >= shards}
+        self.shards = shards
+        for index, value in sorted(retired.items()):
+            if value:
+                self.increment(value, shard=index % shards)
+                self.increment(-value, shard=index)
+        logger.debug("Counter '%s' resized to %d shards, folded %d shard(s)", self.name, shards, len(retired))
+
+    def reset(self) -> None:
+        """Delete every shard of the counter."""
+        for index in self.shard_values():
+            self.transport.delete(f"/record/{self.shard_key(index)}", "delete")
+        with self._lock:
+            self._known.clear()
+
+def main():
+    logging.basicConfig(level=os.getenv("HPKV_LOG_LEVEL", "WARNING").upper(),
+                        format="%(levelname)s %(name)s: %(message)s")
+
+    try:
+        counter = ShardedCounter("sharded-example", shards=8)
+        counter.reset()
+
+        print("Incrementing the counter 100 times across 8 shards...")
+        for _ in range(100):
+            counter.increment()
+        print(f"Shards: {dict(sorted(counter.shard_values().items()))}")
+        print(f"Total: {counter.value()}")
+
+        print("\nShrinking to 2 shards...")
+        counter.resize(2)
+        print(f"Shards: {dict(sorted(counter.shard_values().items()))}")
+        print(f"Total: {counter.value()}")
+
+        counter.reset()
+
+    except ValueError as e:
+        print(f"Error: {str(e)}")
+        exit(1)
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        exit(1)
+    finally:
+        close_transport()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import json
+import time
+import asyncio
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+# Shared helpers live in examples/common/python
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common', 'python'))
+from hpkv_transport import AsyncHPKVTransport, HPKVResponse
+from hpkv_codecs import HPKVValueCodec
+
+class AsyncHPKVClient:
+    def __init__(self, base_url: str = None, api_key: str = None,
+                 transport: Optional[AsyncHPKVTransport] = None,
+                 value_codec: Optional[HPKVValueCodec] = None, **transport_options: Any):
+        """Initialize asyncio HPKV client with API key.
+
+        Args:
+            base_url: HPKV server URL (optional, defaults to HPKV_BASE_URL env var)
+            api_key: HPKV API key (optional, defaults to HPKV_API_KEY env var)
+            transport: Shared transport to use (optional, the client creates and owns one otherwise)
+            value_codec: How values are encoded and decoded (optional, defaults to untagged JSON)
+            **transport_options: Pool size, max_in_flight and timeout options for the owned
+                transport (see AsyncHPKVTransport)
+        """
+        # Load environment variables if not already loaded
+        if not os.getenv('HPKV_BASE_URL') and not os.getenv('HPKV_API_KEY'):
+            load_dotenv()
+
+        self.base_url = (base_url or os.getenv('HPKV_BASE_URL')).rstrip('/') if (base_url or os.getenv('HPKV_BASE_URL')) else None
+        self.api_key = api_key or os.getenv('HPKV_API_KEY')
+
+        if not self.base_url:
+            raise ValueError("HPKV base URL not provided. Set HPKV_BASE_URL environment variable or pass base_url parameter.")
+        if not self.api_key:
+            raise ValueError("HPKV API key not provided. Set HPKV_API_KEY environment variable or pass api_key parameter.")
+
+        self._owns_transport = transport is None
+        self.transport = transport or AsyncHPKVTransport(self.base_url, self.api_key, **transport_options)
+        self.value_codec = value_codec or HPKVValueCodec()
+
+    async def close(self) -> None:
+        """Release pooled connections if the transport is owned by this client."""
+        if self._owns_transport:
+            await self.transport.close()
+
+    async def __aenter__(self) -> 'AsyncHPKVClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    def _serialize_value(self, value: Any) -> str:
+        """Serialize value to string format."""
+        return self.value_codec.encode(value)
+
+    def _handle_response(self, response: HPKVResponse, operation: str) -> Optional[Dict]:
+        """Handle API response and extract data.
+
+        Args:
+            response: Response from API
+            operation: Operation name for error messages
+
+        Returns:
+            Response data if successful, None otherwise
+        """
+        try:
+            if response.status_code in [200, 201]:
+                return self.value_codec.loads(response.text) if response.text else None
+            error_msg = f"Error in {operation}: Status {response.status_code}"
+            if response.text:
+                try:
+                    error_data = response.json()
+                    error_msg += f" - {error_data.get('message', response.text)}"
+                except (ValueError, AttributeError):
+                    error_msg += f" - {response.text}"
+            print(error_msg, file=sys.stderr)
+            return None
+        except Exception as e:
+            print(f"Error parsing response in {operation}: {str(e)}", file=sys.stderr)
+            return None
+
+    async def create(self, key: str, value: Any) -> bool:
+        """Create a new key-value pair."""
+        try:
+            payload = {
+                "key": key,
+                "value": self._serialize_value(value)
+            }
+
+            response = await self.transport.post("/record", "create", data=self.value_codec.dumps(payload))
+            if response.status_code not in [200, 201]:
+                self._handle_response(response, "create")
+                return False
+            return True
+
+        except Exception as e:
+            print(f"Error creating record: {str(e)}", file=sys.stderr)
+            return False
+
+    async def read(self, key: str) -> Optional[Any]:
+        """Read a value by key."""
+        try:
+            response = await self.transport.get(f"/record/{key}", "read")
+
+            data = self._handle_response(response, "read")
+            if data and 'value' in data:
+                return self.value_codec.decode(data['value'])
+            return None
+
+        except Exception as e:
+            print(f"Error reading record: {str(e)}", file=sys.stderr)
+            return None
+
+    async def update(self, key: str, value: Any, partial_update: bool = False) -> bool:
+        """Update an existing key-value pair.
+
+        Partial updates are merged server-side as JSON, so they need the
+        default untagged JSON value codec.
+        """
+        try:
+            if partial_update and self.value_codec.tagged:
+                raise ValueError("Partial updates require an untagged JSON value codec")
+            payload = {
+                "key": key,
+                "value": self._serialize_value(value),
+                "partialUpdate": partial_update
+            }
+
+            response = await self.transport.post("/record", "update", data=self.value_codec.dumps(payload),
+                                                 idempotent=not partial_update)
+            return response.status_code == 200
+
+        except Exception as e:
+            print(f"Error updating record: {str(e)}", file=sys.stderr)
+            return False
+
+    async def delete(self, key: str) -> bool:
+        """Delete a key-value pair."""
+        try:
+            response = await self.transport.delete(f"/record/{key}", "delete")
+            return response.status_code == 200
+
+        except Exception as e:
+            print(f"Error deleting record: {str(e)}", file=sys.stderr)
+            return False
+
+    async def atomic_increment(self, key: str, increment: int) -> Optional[Dict[str, Any]]:
+        """Atomically add `increment` to a numeric value.
+
+        If the key doesn't exist, it is created with an initial value of 0 and
+        the increment is retried once.
+
+        Returns:
+            Response data (including ``newValue``) if successful, None otherwise
+        """
+        try:
+            payload = {
+                "key": key,
+                "increment": increment
+            }
+
+            response = await self.transport.post("/record/atomic", "atomic", json=payload)
+            if response.status_code == 404:
+                if not await self.create(key, "0"):
+                    return None
+                response = await self.transport.post("/record/atomic", "atomic", json=payload)
+
+            return self._handle_response(response, "atomic increment")
+
+        except Exception as e:
+            print(f"Error incrementing record: {str(e)}", file=sys.stderr)
+            return None
+
+    async def range_query(self, start_key: str, end_key: str, limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Retrieve records within a key range (both ends inclusive).
+
+        Returns:
+            Response data with a ``records`` list if successful, None otherwise
+        """
+        try:
+            params = {
+                "startKey": start_key,
+                "endKey": end_key
+            }
+            if limit is not None:
+                params["limit"] = limit
+
+            response = await self.transport.get("/records", "range", params=params)
+            return self._handle_response(response, "range query")
+
+        except Exception as e:
+            print(f"Error querying range: {str(e)}", file=sys.stderr)
+            return None
+
+async def main():
+    try:
+        # Load environment variables from .env file
+        load_dotenv()
+
+        print("HPKV Async CRUD Operations Example")
+        print("==================================")
+
+        # Allow up to 50 requests in flight at once over pooled connections
+        async with AsyncHPKVClient(max_in_flight=50) as client:
+            print(f"\nUsing HPKV server: {client.base_url}")
+            count = 200
+
+            print(f"\n1. Creating {count} records concurrently...")
+            start = time.perf_counter()
+            results = await asyncio.gather(*(
+                client.create(f"async-user:{i:04d}", {"id": i, "name": f"User {i}"})
+                for i in range(count)
+            ))
+            print(f"Created {sum(results)}/{count} records in {time.perf_counter() - start:.2f}s")
+
+            print("\n2. Reading them back concurrently...")
+            start = time.perf_counter()
+            values = await asyncio.gather(*(client.read(f"async-user:{i:04d}") for i in range(count)))
+            print(f"Read {sum(v is not None for v in values)}/{count} records in {time.perf_counter() - start:.2f}s")
+
+            print("\n3. Range query over the first 5 records...")
+            result = await client.range_query("async-user:0000", "async-user:0004")
+            print(json.dumps(result, indent=2))
+
+            print("\n4. Incrementing a counter 10 times concurrently...")
+            await client.create("async-counter", "0")
+            await asyncio.gather(*(client.atomic_increment("async-counter", 1) for _ in range(10)))
+            print(f"Counter value: {await client.read('async-counter')}")
+
+            print("\n5. Deleting the records concurrently...")
+            results = await asyncio.gather(*(client.delete(f"async-user:{i:04d}") for i in range(count)))
+            await client.delete("async-counter")
+            print(f"Deleted {sum(results)}/{count} records")
+
+    except Exception as e:
+        print(f"Error running example: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,19 +2,81 @@
 
 import os
 import sys
-import requests
+import logging
 import json
 import time
-from typing import Any, Dict, Optional, Union
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
 from dotenv import load_dotenv
 
+# Shared helpers live in examples/common/python
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common', 'python'))
+from hpkv_transport import HPKVTransport
+from hpkv_batch import BatchResult, DEFAULT_MAX_WORKERS, run_batch
+from hpkv_cache import HPKVCache, MISSING, serialized_size
+from hpkv_range_cache import HPKVRangeCache
+from hpkv_codecs import HPKVValueCodec
+from hpkv_write_log import HPKVWriteLog
+
+if TYPE_CHECKING:
+    import requests
+
+# Request tracing is emitted at DEBUG level; set HPKV_LOG_LEVEL=DEBUG to see it
+logger = logging.getLogger("hpkv.client")
+
+class HPKVError(Exception):
+    """A request HPKV answered with an error status."""
+    
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+def _same_json(a: Any, b: Any) -> bool:
+    """Whether two decoded JSON values are identical (unlike ==, 1 and True or 1.0 differ)."""
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_same_json(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_same_json(x, y) for x, y in zip(a, b))
+    return a == b
+
+def json_merge_diff(old: Dict[str, Any], new: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The fields a partial update must send to turn JSON object `old` into `new`.
+    
+    Partial updates merge top-level fields, so a changed field is sent with
+    its whole new value.
+    
+    Returns:
+        Dict of new and changed fields (empty if nothing changed), or None if
+        a field was removed, which a partial update can't express
+    """
+    if any(field not in new for field in old):
+        return None
+    return {field: value for field, value in new.items()
+            if field not in old or not _same_json(old[field], value)}
+
 class HPKVClient:
-    def __init__(self, base_url: str = None, api_key: str = None):
+    def __init__(self, base_url: str = None, api_key: str = None,
+                 transport: Optional[HPKVTransport] = None, cache: Optional[HPKVCache] = None,
+                 value_codec: Optional[HPKVValueCodec] = None, write_log: Optional[HPKVWriteLog] = None,
+                 known_documents: Optional[HPKVCache] = None, range_cache: Optional[HPKVRangeCache] = None,
+                 **transport_options: Any):
         """Initialize HPKV client with API key.
         
         Args:
             base_url: HPKV server URL (optional, defaults to HPKV_BASE_URL env var)
             api_key: HPKV API key (optional, defaults to HPKV_API_KEY env var)
+            transport: Shared transport to use (optional, the client creates and owns one otherwise)
+                Attach an HPKVMetrics to it (or pass ``metrics=``) to collect per-operation metrics
+            cache: Read-through cache for decoded values (optional, reads always hit the server otherwise)
+            value_codec: How values are encoded and decoded (optional, defaults to untagged JSON)
+            write_log: Local write-ahead log; writes are logged, acknowledged at once and replayed
+                to HPKV in the background (optional, writes go straight to the server otherwise)
+            known_documents: Last known stored version of each document, kept as serialized JSON; lets
+                `update(..., diff=True)` send only the changed fields of a known JSON object (optional)
+            range_cache: Range query cache to invalidate on every write made through this client (optional)
+            **transport_options: Pool size and timeout options for the owned transport
+                (see HPKVTransport)
         """
         # Load environment variables if not already loaded
         if not os.getenv('HPKV_BASE_URL') and not os.getenv('HPKV_API_KEY'):
@@ -28,10 +90,28 @@ class HPKVClient:
         if not self.api_key:
             raise ValueError("HPKV API key not provided. Set HPKV_API_KEY environment variable or pass api_key parameter.")
         
-        self.headers = {
-            'Content-Type': 'application/json',
-            'x-api-key': self.api_key
-        }
+        self._owns_transport = transport is None
+        self.transport = transport or HPKVTransport(self.base_url, self.api_key, **transport_options)
+        self.cache = cache
+        self.value_codec = value_codec or HPKVValueCodec()
+        self.known_documents = known_documents
+        self.range_cache = range_cache
+        self.write_log = write_log
+        if write_log is not None:
+            write_log.start(self._replay_write)
+    
+    def close(self) -> None:
+        """Stop the write log, if any, and release pooled connections if the transport is owned by this client."""
+        if self.write_log is not None:
+            self.write_log.close()
+        if self._owns_transport:
+            self.transport.close()
+    
+    def __enter__(self) -> 'HPKVClient':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
     
     def _serialize_value(self, value: Any) -> str:
         """Serialize value to string format.
@@ -42,11 +122,54 @@ class HPKVClient:
         Returns:
             str: Serialized value
         """
-        if isinstance(value, str):
-            return value
-        return json.dumps(value)
+        return self.value_codec.encode(value)
     
-    def _handle_response(self, response: requests.Response, operation: str) -> Union[Dict, str, None]:
+    def _deserialize_value(self, value: str) -> Any:
+        """Deserialize a stored value in a single pass.
+        
+        Args:
+            value: Value as stored in HPKV
+            
+        Returns:
+            Decoded value, or the string itself if it is an untagged non-JSON string
+        """
+        return self.value_codec.decode(value)
+    
+    def _refresh_cache(self, key: str, serialized: Optional[str], known: Optional[str] = None) -> None:
+        """Replace the cached entry and known document for a key after a write, or drop them.
+        
+        Args:
+            key: Key that was written
+            serialized: New stored value, or None if it is unknown (failed or partial write, delete)
+            known: Locally merged version to remember in `known_documents` when the
+                stored value is unknown (partial or diffed write); never cached for reads
+        """
+        if self.range_cache is not None:
+            self.range_cache.invalidate(key)
+        if self.known_documents is not None:
+            document = serialized if serialized is not None else known
+            if document is None:
+                self.known_documents.invalidate(key)
+            else:
+                self.known_documents.put(key, document, serialized_size(document))
+        if self.cache is None:
+            return
+        if serialized is None:
+            self.cache.invalidate(key)
+        else:
+            self.cache.put(key, self._deserialize_value(serialized), serialized_size(serialized))
+    
+    def _known_document(self, key: str) -> Optional[Dict[str, Any]]:
+        """The last known stored version of a key if it is a JSON object, else None."""
+        if self.known_documents is None or self.value_codec.tagged:
+            return None
+        serialized = self.known_documents.get(key)
+        if serialized is MISSING:
+            return None
+        document = self._deserialize_value(serialized)
+        return document if isinstance(document, dict) else None
+    
+    def _handle_response(self, response: 'requests.Response', operation: str) -> Union[Dict, str, None]:
         """Handle API response and extract data.
         
         Args:
@@ -54,24 +177,21 @@ class HPKVClient:
             operation: Operation name for error messages
             
         Returns:
-            Response data if successful, None otherwise
+            Response data if successful
+            
+        Raises:
+            HPKVError: If HPKV answered with an error status
         """
-        try:
-            if response.status_code in [200, 201]:
-                return response.json() if response.text else None
-            else:
-                error_msg = f"Error in {operation}: Status {response.status_code}"
-                if response.text:
-                    try:
-                        error_data = response.json()
-                        error_msg += f" - {error_data.get('message', response.text)}"
-                    except:
-                        error_msg += f" - {response.text}"
-                print(error_msg, file=sys.stderr)
-                return None
-        except Exception as e:
-            print(f"Error parsing response in {operation}: {str(e)}", file=sys.stderr)
-            return None
+        if response.status_code in [200, 201]:
+            return self.value_codec.loads(response.content) if response.content else None
+        error_msg = f"Error in {operation}: Status {response.status_code}"
+        if response.text:
+            try:
+                error_data = response.json()
+                error_msg += f" - {error_data.get('message', response.text)}"
+            except:
+                error_msg += f" - {response.text}"
+        raise HPKVError(error_msg, response.status_code)
         
     def create(self, key: str, value: Any) -> bool:
         """Create a new key-value pair.
@@ -84,72 +204,190 @@ class HPKVClient:
             bool: True if creation was successful, False otherwise
         """
         try:
-            payload = {
-                "key": key,
-                "value": self._serialize_value(value)
-            }
-            
-            print(f"Sending request to {self.base_url}/record")
-            print(f"Payload: {json.dumps(payload, indent=2)}")
-            
-            response = requests.post(
-                f"{self.base_url}/record",
-                headers=self.headers,
-                json=payload
-            )
-            
-            if response.status_code not in [200, 201]:
-                error_msg = f"Create failed with status {response.status_code}"
-                if response.text:
-                    try:
-                        error_data = response.json()
-                        error_msg += f" - {error_data.get('message', response.text)}"
-                    except:
-                        error_msg += f" - {response.text}"
-                print(error_msg, file=sys.stderr)
-                return False
-                
-            print(f"Create succeeded with status {response.status_code}")
+            self._create(key, value)
+            return True
+        except Exception as e:
+            print(f"Error creating record: {str(e)}", file=sys.stderr)
+            return False
+
+    def _create(self, key: str, value: Any) -> None:
+        """Create a key-value pair, raising on any failure (HPKVError for an error status)."""
+        try:
+            serialized = self._serialize_value(value)
+            if self.write_log is not None:
+                self.write_log.append("create", key, serialized)
+            else:
+                self._post_create(key, serialized)
+        except Exception:
+            self._refresh_cache(key, None)
+            raise
+        self._refresh_cache(key, serialized)
+
+    def _post_create(self, key: str, serialized: str) -> None:
+        """Send a create to HPKV, raising if it fails; the caller refreshes the cache."""
+        payload = {
+            "key": key,
+            "value": serialized
+        }
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending request to %s/record", self.base_url)
+            logger.debug("Payload: %s", json.dumps(payload, indent=2))
+        
+        response = self.transport.post("/record", "create", data=self.value_codec.dumps(payload))
+        self._handle_response(response, "create")
+        logger.debug("Create succeeded with status %s", response.status_code)
+
+    def _send_create(self, key: str, serialized: str) -> bool:
+        """Send a create to HPKV; the caller refreshes the cache."""
+        try:
+            self._post_create(key, serialized)
             return True
-                
         except Exception as e:
             print(f"Error creating record: {str(e)}", file=sys.stderr)
             return False
 
     def read(self, key: str) -> Optional[Any]:
-        """Read a value by key."""
+        """Read a value by key, from the cache when one is configured.
+        
+        With a write log, writes not yet replayed to HPKV are applied on top
+        of the stored value, so callers read their own writes.
+        
+        Returns:
+            The value, or None if the key doesn't exist or the read failed
+        """
         try:
-            response = requests.get(
-                f"{self.base_url}/record/{key}",
-                headers=self.headers
-            )
-            
-            data = self._handle_response(response, "read")
-            if data and 'value' in data:
-                try:
-                    return json.loads(data['value'])
-                except (json.JSONDecodeError, TypeError):
-                    return data['value']
-            return None
-            
+            return self._read(key)
         except Exception as e:
             print(f"Error reading record: {str(e)}", file=sys.stderr)
             return None
 
-    def update(self, key: str, value: Any, partial_update: bool = False) -> bool:
-        """Update an existing key-value pair."""
+    def _read(self, key: str) -> Optional[Any]:
+        """Read a value by key; None only if the key doesn't exist, any failure raises."""
+        if self.write_log is not None:
+            writes = self.write_log.pending_writes(key)
+            if writes:
+                return self._read_pending(key, writes)
+        return self._read_stored(key)
+
+    def _read_pending(self, key: str, writes: List[Tuple[str, Optional[str], bool]]) -> Optional[Any]:
+        """Read a key with logged writes pending, newest write first."""
+        updates = []
+        for op, serialized, partial in reversed(writes):
+            if op == "delete":
+                value = None
+                break
+            updates.append(self._deserialize_value(serialized))
+            if not partial:
+                value = updates.pop()
+                break
+        else:
+            # Not cached: the pending writes would leave the cached value stale once replayed
+            value = self._read_stored(key, remember=False)
+        for fields in reversed(updates):
+            # Only JSON objects are merged here; other partial updates show once the server has them
+            if isinstance(value, dict) and isinstance(fields, dict):
+                value = {**value, **fields}
+        return value
+
+    def _read_stored(self, key: str, remember: bool = True) -> Optional[Any]:
+        """Read a value from the cache or the server, remembering what the server returns if `remember`.
+        
+        Returns None for a key that doesn't exist (404); other failures raise.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not MISSING:
+                return cached
+        
+        # Taken before the request, so a write that lands meanwhile keeps its value cached
+        cache_generation = self.cache.generation(key) if self.cache is not None else None
+        known_generation = self.known_documents.generation(key) if self.known_documents is not None else None
+        response = self.transport.get(f"/record/{key}", "read")
+        if response.status_code == 404:
+            return None
+        
+        data = self._handle_response(response, "read")
+        if data and 'value' in data:
+            value = self._deserialize_value(data['value'])
+            if remember and isinstance(data['value'], str):
+                size = serialized_size(data['value'])
+                if self.cache is not None:
+                    self.cache.put(key, value, size, cache_generation)
+                if self.known_documents is not None:
+                    self.known_documents.put(key, data['value'], size, known_generation)
+            return value
+        return None
+
+    def update(self, key: str, value: Any, partial_update: bool = False, diff: bool = False) -> bool:
+        """Update an existing key-value pair.
+        
+        Partial updates are merged server-side as JSON, so they need the
+        default untagged JSON value codec.
+        
+        With `diff=True` and `known_documents`, a full update of a JSON object
+        whose stored version is known is sent as a partial update of just the
+        fields that changed, if that is smaller than the whole object. The
+        diff is merged into whatever is stored, so a field another writer
+        added since the known version is not removed; pass `diff=True` only
+        where this client is the document's sole writer. Removing a field
+        needs a full write, and so does an update that changes nothing.
+        
+        Args:
+            key: Key to update
+            value: New value, or the fields to merge for a partial update
+            partial_update: Merge `value` into the stored JSON object instead of replacing it
+            diff: Send only the fields that changed since the known stored version (optional)
+        """
+        try:
+            if partial_update and self.value_codec.tagged:
+                raise ValueError("Partial updates require an untagged JSON value codec")
+            serialized = self._serialize_value(value)
+            sent, sent_partial = serialized, partial_update
+            # What this client expects is stored after a partial or diffed write, for later diffs
+            known_value = None
+            
+            known = self._known_document(key) if isinstance(value, dict) else None
+            if known is not None and partial_update:
+                known_value = self._serialize_value({**known, **value})
+            elif known is not None and diff:
+                changed = json_merge_diff(known, value)
+                # Nothing changed: still send the whole value, as the known version may be stale
+                if changed:
+                    serialized_diff = self._serialize_value(changed)
+                    if len(serialized_diff) < len(serialized):
+                        logger.debug("Sending %d changed field(s) of %s instead of the whole value", len(changed), key)
+                        sent, sent_partial, known_value = serialized_diff, True, serialized
+            # The stored value is only known without reading it back after a full write
+            stored = None if sent_partial else serialized
+            
+            if self.write_log is not None:
+                self.write_log.append("update", key, sent, sent_partial)
+                self._refresh_cache(key, stored, known_value)
+                return True
+            success = self._send_update(key, sent, sent_partial)
+            if success:
+                self._refresh_cache(key, stored, known_value)
+            else:
+                self._refresh_cache(key, None)
+            return success
+            
+        except Exception as e:
+            print(f"Error updating record: {str(e)}", file=sys.stderr)
+            self._refresh_cache(key, None)
+            return False
+
+    def _send_update(self, key: str, serialized: str, partial_update: bool) -> bool:
+        """Send an update to HPKV; the caller refreshes the cache."""
         try:
             payload = {
                 "key": key,
-                "value": self._serialize_value(value),
+                "value": serialized,
                 "partialUpdate": partial_update
             }
             
-            response = requests.post(
-                f"{self.base_url}/record",
-                headers=self.headers,
-                json=payload
-            )
+            response = self.transport.post("/record", "update", data=self.value_codec.dumps(payload),
+                                           idempotent=not partial_update)
             
             return response.status_code == 200
             
@@ -160,24 +398,101 @@ class HPKVClient:
     def delete(self, key: str) -> bool:
         """Delete a key-value pair."""
         try:
-            response = requests.delete(
-                f"{self.base_url}/record/{key}",
-                headers=self.headers
-            )
-            
-            return response.status_code == 200
-            
+            self._delete(key)
+            return True
         except Exception as e:
             print(f"Error deleting record: {str(e)}", file=sys.stderr)
             return False
 
+    def _delete(self, key: str) -> None:
+        """Delete a key-value pair, raising on any failure (HPKVError for an error status)."""
+        try:
+            if self.write_log is not None:
+                self.write_log.append("delete", key)
+                return
+            response = self.transport.delete(f"/record/{key}", "delete")
+            if response.status_code != 200:
+                self._handle_response(response, "delete")
+                raise HPKVError(f"Error in delete: Status {response.status_code}", response.status_code)
+        finally:
+            self._refresh_cache(key, None)
+
+    def _replay_write(self, op: str, key: str, serialized: Optional[str], partial_update: bool) -> bool:
+        """Send a logged write to HPKV (the write log's sender).
+        
+        Returns:
+            bool: True once HPKV has applied the write; a delete of a key that
+                is already gone counts as applied
+        """
+        if op == "delete":
+            response = self.transport.delete(f"/record/{key}", "delete")
+            applied = response.status_code in (200, 404)
+        elif op == "create":
+            applied = self._send_create(key, serialized)
+        else:
+            applied = self._send_update(key, serialized, partial_update)
+        if applied and self.range_cache is not None:
+            # Ranges fetched between logging the write and now hold the old value
+            self.range_cache.invalidate(key)
+        return applied
+
+    def create_many(self, items: Union[Mapping[str, Any], Iterable[Tuple[str, Any]]],
+                    max_workers: int = DEFAULT_MAX_WORKERS) -> Iterator[BatchResult]:
+        """Create many key-value pairs in parallel.
+        
+        Requests fan out over a bounded thread pool; keep `max_workers` at or
+        below the transport's `pool_maxsize` so every worker gets a pooled
+        connection.
+        
+        Args:
+            items: Mapping or iterable of (key, value) pairs
+            max_workers: Maximum number of requests in flight
+            
+        Yields:
+            BatchResult: One per key, in completion order; a failed key has `ok`
+                False and the exception (HPKVError for an error status) in `error`
+        """
+        pairs = items.items() if isinstance(items, Mapping) else items
+        return run_batch(lambda pair: self._create(pair[0], pair[1]), pairs,
+                         key_of=lambda pair: pair[0], max_workers=max_workers)
+
+    def read_many(self, keys: Iterable[str], max_workers: int = DEFAULT_MAX_WORKERS) -> Iterator[BatchResult]:
+        """Read many keys in parallel.
+        
+        Args:
+            keys: Keys to read
+            max_workers: Maximum number of requests in flight
+            
+        Yields:
+            BatchResult: One per key, in completion order; a missing key is `ok`
+                with `value` None, and a failed read has `ok` False and the
+                exception (HPKVError for an error status) in `error`
+        """
+        return run_batch(self._read, keys, max_workers=max_workers)
+
+    def delete_many(self, keys: Iterable[str], max_workers: int = DEFAULT_MAX_WORKERS) -> Iterator[BatchResult]:
+        """Delete many keys in parallel.
+        
+        Args:
+            keys: Keys to delete
+            max_workers: Maximum number of requests in flight
+            
+        Yields:
+            BatchResult: One per key, in completion order; a failed key has `ok`
+                False and the exception (HPKVError for an error status) in `error`
+        """
+        return run_batch(self._delete, keys, max_workers=max_workers)
+
 def main():
     try:
         # Load environment variables from .env file
         load_dotenv()
+        logging.basicConfig(level=os.getenv("HPKV_LOG_LEVEL", "WARNING").upper(),
+                            format="%(levelname)s %(name)s: %(message)s")
         
-        # Initialize HPKV client using environment variables
-        client = HPKVClient()
+        # Initialize HPKV client using environment variables; remembering stored
+        # documents lets the diffed update below send only the changed field
+        client = HPKVClient(known_documents=HPKVCache())
         
         print("HPKV CRUD Operations Example")
         print("===========================")
@@ -210,7 +525,7 @@ def main():
         # Update operation
         print("\n3. Updating the user's age...")
         user_data["age"] = 31
-        success = client.update("user:1", user_data)
+        success = client.update("user:1", user_data, diff=True)
         print(f"Update operation {'succeeded' if success else 'failed'}")
 
         # Read after update
@@ -234,6 +549,9 @@ def main():
         else:
             print("Record still exists")
             
+        # Clean up
+        client.close()
+            
     except Exception as e:
         print(f"Error running example: {str(e)}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import bisect
+import contextlib
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+# The benchmark drives the clients from the other Python examples
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+for example in ('common', 'basic-crud', 'atomic-inc', 'range-queries', 'web-sockets'):
+    sys.path.insert(0, os.path.join(EXAMPLES_DIR, example, 'python'))
+
+from hpkv_metrics import HPKVMetrics
+from hpkv_standin_server import StandInServer
+from hpkv_transport import HPKVTransport
+
+TARGETS = ('rest', 'ws', 'atomic', 'range')
+KEY_PREFIX = 'bench:'
+COUNTER_PREFIX = 'bench-counter:'
+
+
+class Workload:
+    """Parameters shared by every benchmark target."""
+
+    def __init__(self, ops: int = 5000, duration: Optional[float] = None, concurrency: int = 16,
+                 keys: int = 10000, distribution: str = 'uniform', zipf_s: float = 1.1,
+                 value_size: int = 256, read_ratio: float = 0.8, range_limit: int = 100,
+                 seed: int = 42):
+        """Initialize the workload.
+
+        Args:
+            ops: Number of operations to run per target (ignored when `duration` is set)
+            duration: Run each target for this many seconds instead of a fixed op count
+            concurrency: Worker threads (REST targets) or tasks (WebSocket target)
+            keys: Size of the key space
+            distribution: Key popularity, 'uniform' or 'zipfian'
+            zipf_s: Skew of the zipfian distribution (higher is more skewed)
+            value_size: Approximate size in bytes of each serialized value
+            read_ratio: Fraction of reads in the read/write mix of the rest and ws targets
+            range_limit: Records requested per range query
+            seed: Random seed, so runs are reproducible
+        """
+        if distribution not in ('uniform', 'zipfian'):
+            raise ValueError("distribution must be 'uniform' or 'zipfian'")
+        if not 0.0 <= read_ratio <= 1.0:
+            raise ValueError("read_ratio must be between 0 and 1")
+        self.ops = ops
+        self.duration = duration
+        self.concurrency = concurrency
+        self.keys = keys
+        self.distribution = distribution
+        self.zipf_s = zipf_s
+        self.value_size = value_size
+        self.read_ratio = read_ratio
+        self.range_limit = range_limit
+        self.seed = seed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+class KeyChooser:
+    """Picks key indexes following the workload's distribution."""
+
+    def __init__(self, workload: Workload):
+        self.keys = workload.keys
+        self.cumulative: Optional[List[float]] = None
+        if workload.distribution == 'zipfian':
+            total = 0.0
+            self.cumulative = []
+            for rank in range(1, workload.keys + 1):
+                total += 1.0 / (rank ** workload.zipf_s)
+                self.cumulative.append(total)
+
+    def next_index(self, rng: random.Random) -> int:
+        if self.cumulative is None:
+            return rng.randrange(self.keys)
+        point = rng.random() * self.cumulative[-1]
+        return min(bisect.bisect_left(self.cumulative, point), self.keys - 1)
+
+
+def make_key(index: int) -> str:
+    return f"{KEY_PREFIX}{index:08d}"
+
+
+_WORDS = ('alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel', 'india', 'juliet',
+          'kilo', 'lima', 'mike', 'november', 'oscar', 'papa', 'quebec', 'romeo', 'sierra', 'tango')
+
+
+@functools.lru_cache(maxsize=16384)
+def make_value(index: int, size: int) -> Dict[str, Any]:
+    """Build a JSON document whose serialized form is roughly `size` bytes.
+
+    The document is a list of small records with words and numbers drawn
+    from a generator seeded with the index, so each value has its own
+    content. Compression therefore sees data like a real workload's
+    instead of a run of one character or records repeated across values.
+    Values are cached per index (and must not be mutated), so building
+    them doesn't count towards the CPU time of the operations measured.
+    """
+    rng = random.Random(index)
+    items: List[Dict[str, Any]] = []
+    length = len(json.dumps({"id": index, "items": []}))
+    while length < size:
+        name = f"{rng.choice(_WORDS)} {rng.choice(_WORDS)} {rng.getrandbits(16):04x}"
+        score = rng.getrandbits(30)
+        tags = [rng.choice(_WORDS), f"{rng.choice(_WORDS)}-{rng.getrandbits(8)}"]
+        items.append({"name": name, "score": score, "tags": tags})
+        # Length of json.dumps(item) plus its ", " separator, without serializing it
+        length += len(name) + len(str(score)) + len(tags[0]) + len(tags[1]) + 43
+    return {"id": index, "items": items}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class BenchmarkResult:
+    """Throughput and latency distribution of one benchmark target."""
+
+    def __init__(self, target: str, latencies: List[float], errors: int, elapsed: float, cpu: float = 0.0,
+                 wire: Optional[Dict[str, Any]] = None):
+        self.target = target
+        self.latencies = sorted(latencies)
+        self.errors = errors
+        self.elapsed = elapsed
+        self.cpu = cpu  # Process CPU seconds, including an in-process stand-in
+        self.wire = wire  # WebSocket wire format and byte counts, for the ws target
+
+    @property
+    def ops(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def throughput(self) -> float:
+        return self.ops / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "target": self.target,
+            "ops": self.ops,
+            "errors": self.errors,
+            "elapsed_s": round(self.elapsed, 3),
+            "ops_per_s": round(self.throughput, 1),
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(self.latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 3),
+            "cpu_us_per_op": round(self.cpu / self.ops * 1e6, 1) if self.ops else 0.0,
+            **({"wire": self.wire} if self.wire is not None else {})
+        }
+
+
+class OpBudget:
+    """Hands out operations until the op count or the deadline is reached."""
+
+    def __init__(self, workload: Workload):
+        self.remaining = workload.ops
+        self.deadline = time.perf_counter() + workload.duration if workload.duration else None
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        if self.deadline is not None:
+            return time.perf_counter() < self.deadline
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+def run_threaded(target: str, workload: Workload,
+                 make_operation: Callable[[random.Random], Callable[[], bool]]) -> BenchmarkResult:
+    """Run a blocking operation from `workload.concurrency` threads.
+
+    Args:
+        target: Name reported in the result
+        workload: Workload parameters
+        make_operation: Builds one operation per worker from that worker's RNG;
+            the operation returns True on success
+
+    Returns:
+        BenchmarkResult: Combined result of all workers
+    """
+    budget = OpBudget(workload)
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(worker_id: int) -> None:
+        operation = make_operation(random.Random(workload.seed + worker_id))
+        local_latencies = []
+        local_errors = 0
+        while budget.take():
+            start = time.perf_counter()
+            try:
+                ok = operation()
+            except Exception:
+                ok = False
+            local_latencies.append(time.perf_counter() - start)
+            if not ok:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    with ThreadPoolExecutor(max_workers=workload.concurrency) as executor:
+        list(executor.map(worker, range(workload.concurrency)))
+    return BenchmarkResult(target, latencies, errors[0], time.perf_counter() - start,
+                           time.process_time() - cpu_start)
+
+
+async def run_async(target: str, workload: Workload,
+                    make_operation: Callable[[random.Random], Callable[[], Any]]) -> BenchmarkResult:
+    """Run a coroutine operation from `workload.concurrency` tasks on one event loop."""
+    budget = OpBudget(workload)
+    latencies: List[float] = []
+    errors = [0]
+
+    async def worker(worker_id: int) -> None:
+        operation = make_operation(random.Random(workload.seed + worker_id))
+        while budget.take():
+            start = time.perf_counter()
+            try:
+                ok = await operation()
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors[0] += 1
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    await asyncio.gather(*(worker(i) for i in range(workload.concurrency)))
+    return BenchmarkResult(target, latencies, errors[0], time.perf_counter() - start,
+                           time.process_time() - cpu_start)
+
+
+def preload(transport: HPKVTransport, workload: Workload) -> None:
+    """Create every benchmark key and counter so reads and increments always hit."""
+    from hpkv_crud_example import HPKVClient
+
+    client = HPKVClient(transport.base_url, transport.api_key, transport=transport)
+    values = ((make_key(i), make_value(i, workload.value_size)) for i in range(workload.keys))
+    counters = ((f"{COUNTER_PREFIX}{i:08d}", "0") for i in range(workload.keys))
+    for items in (values, counters):
+        failed = sum(1 for result in client.create_many(items, max_workers=workload.concurrency) if not result.ok)
+        if failed:
+            raise RuntimeError(f"Preloading failed for {failed} key(s)")
+
+
+def bench_rest(transport: HPKVTransport, workload: Workload) -> BenchmarkResult:
+    """Mixed reads and full updates through HPKVClient."""
+    from hpkv_crud_example import HPKVClient
+
+    client = HPKVClient(transport.base_url, transport.api_key, transport=transport)
+    chooser = KeyChooser(workload)
+
+    def make_operation(rng: random.Random) -> Callable[[], bool]:
+        def operation() -> bool:
+            index = chooser.next_index(rng)
+            if rng.random() < workload.read_ratio:
+                return client.read(make_key(index)) is not None
+            return client.update(make_key(index), make_value(index, workload.value_size))
+        return operation
+
+    return run_threaded('rest', workload, make_operation)
+
+
+def bench_atomic(transport: HPKVTransport, workload: Workload) -> BenchmarkResult:
+    """+1 increments through atomic_increment."""
+    from atomic_increment import atomic_increment
+
+    chooser = KeyChooser(workload)
+
+    def make_operation(rng: random.Random) -> Callable[[], bool]:
+        def operation() -> bool:
+            key = f"{COUNTER_PREFIX}{chooser.next_index(rng):08d}"
+            return bool(atomic_increment(key, 1, transport=transport).get("success"))
+        return operation
+
+    return run_threaded('atomic', workload, make_operation)
+
+
+def bench_range(transport: HPKVTransport, workload: Workload) -> BenchmarkResult:
+    """Range queries of `range_limit` records through perform_range_query."""
+    from hpkv_range_queries_example import HPKVRangeQueriesExample
+
+    example = HPKVRangeQueriesExample(transport=transport)
+    chooser = KeyChooser(workload)
+
+    def make_operation(rng: random.Random) -> Callable[[], bool]:
+        def operation() -> bool:
+            start = chooser.next_index(rng)
+            end = min(start + workload.range_limit - 1, workload.keys - 1)
+            result = example.perform_range_query(make_key(start), make_key(end), workload.range_limit)
+            return "records" in result
+        return operation
+
+    return run_threaded('range', workload, make_operation)
+
+
+async def bench_ws(base_url: str, api_key: str, workload: Workload, ws_options: Optional[Dict[str, Any]] = None) -> BenchmarkResult:
+    """Mixed reads and full updates over one HPKVWebSocketClient connection.
+
+    `ws_options` (e.g. wire_format, compression_threshold) are passed to the
+    client; the result records the negotiated format and the bytes sent and
+    received before and after compression.
+    """
+    from hpkv_websocket_example import HPKVWebSocketClient
+
+    client = HPKVWebSocketClient(base_url, api_key, **(ws_options or {}))
+    await client.connect()
+    chooser = KeyChooser(workload)
+
+    def make_operation(rng: random.Random) -> Callable[[], Any]:
+        async def operation() -> bool:
+            index = chooser.next_index(rng)
+            if rng.random() < workload.read_ratio:
+                return await client.read(make_key(index)) is not None
+            return await client.update(make_key(index), make_value(index, workload.value_size))
+        return operation
+
+    try:
+        result = await run_async('ws', workload, make_operation)
+    finally:
+        await client.disconnect()
+    result.wire = {"format": client.negotiated_format, "compression_threshold": client.compression_threshold,
+                   **client.wire_stats.to_dict()}
+    return result
+
+
+def run_benchmarks(base_url: str, api_key: str, targets: List[str], workload: Workload,
+                   skip_preload: bool = False, metrics: Optional[HPKVMetrics] = None,
+                   ws_options: Optional[Dict[str, Any]] = None) -> List[BenchmarkResult]:
+    """Run the selected targets one after another against `base_url`.
+
+    Args:
+        base_url: HPKV (or stand-in) server URL
+        api_key: HPKV API key
+        targets: Targets to run, from TARGETS
+        workload: Workload parameters
+        skip_preload: Assume the benchmark keys already exist
+        metrics: Collects transport metrics of the REST targets (optional)
+        ws_options: HPKVWebSocketClient options for the ws target (optional)
+
+    Returns:
+        List[BenchmarkResult]: One result per target, in order
+    """
+    results = []
+    with HPKVTransport(base_url, api_key, pool_maxsize=max(workload.concurrency, 10)) as transport:
+        # The example clients print progress on every call; keep that out of the report
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            if not skip_preload:
+                preload(transport, workload)
+            transport.metrics = metrics
+            for target in targets:
+                if target == 'rest':
+                    results.append(bench_rest(transport, workload))
+                elif target == 'atomic':
+                    results.append(bench_atomic(transport, workload))
+                elif target == 'range':
+                    results.append(bench_range(transport, workload))
+                elif target == 'ws':
+                    results.append(asyncio.run(bench_ws(base_url, api_key, workload, ws_options)))
+                else:
+                    raise ValueError(f"Unknown target: {target}")
+    return results
+
+
+def format_report(results: List[BenchmarkResult]) -> str:
+    """Render results as a fixed-width table."""
+    columns = ("target", "ops", "errors", "elapsed_s", "ops_per_s", "p50_ms", "p95_ms", "p99_ms", "cpu_us_per_op")
+    rows = [[str(result.to_dict()[column]) for column in columns] for result in results]
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+    lines = ["  ".join(column.rjust(width) for column, width in zip(columns, widths))]
+    lines += ["  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows]
+    for result in results:
+        if result.wire is not None and result.ops:
+            wire = result.wire
+            lines.append(
+                f"{result.target} wire ({wire['format']}, compression threshold {wire['compression_threshold']}): "
+                f"sent {wire['payload_bytes_sent'] / result.ops:.0f} B/op payload, "
+                f"{wire['wire_bytes_sent'] / result.ops:.0f} B/op on the wire; "
+                f"received {wire['payload_bytes_received'] / result.ops:.0f} B/op payload, "
+                f"{wire['wire_bytes_received'] / result.ops:.0f} B/op on the wire"
+            )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HPKV Python client load benchmark")
+    parser.add_argument('--targets', default=','.join(TARGETS),
+                        help=f"Comma-separated targets to run ({', '.join(TARGETS)})")
+    parser.add_argument('--ops', type=int, default=5000, help="Operations per target")
+    parser.add_argument('--duration', type=float, help="Seconds per target (overrides --ops)")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--keys', type=int, default=10000, help="Size of the key space")
+    parser.add_argument('--distribution', choices=('uniform', 'zipfian'), default='uniform')
+    parser.add_argument('--zipf-s', type=float, default=1.1)
+    parser.add_argument('--value-size', type=int, default=256)
+    parser.add_argument('--read-ratio', type=float, default=0.8)
+    parser.add_argument('--range-limit', type=int, default=100)
+    parser.add_argument('--ws-format', choices=('json', 'msgpack'), default='json',
+                        help="WebSocket wire format to offer for the ws target")
+    parser.add_argument('--ws-compression-threshold',
+                        help="Compress WebSocket messages of at least this many bytes ('off' disables compression; "
+                             "defaults to the client's 512)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help="Artificial per-request delay of the stand-in server")
+    parser.add_argument('--base-url', help="Benchmark this server instead of the in-process stand-in")
+    parser.add_argument('--api-key', default=os.getenv('HPKV_API_KEY'))
+    parser.add_argument('--skip-preload', action='store_true', help="Assume benchmark keys already exist")
+    parser.add_argument('--json', dest='json_path', help="Also write results to this JSON file")
+    parser.add_argument('--metrics', action='store_true',
+                        help="Print transport metrics of the REST targets in Prometheus format")
+    args = parser.parse_args()
+
+    ws_options: Dict[str, Any] = {"wire_format": args.ws_format}
+    if args.ws_compression_threshold == 'off':
+        ws_options["compression_threshold"] = None
+    elif args.ws_compression_threshold is not None:
+        if not args.ws_compression_threshold.isdigit():
+            parser.error("--ws-compression-threshold must be a byte count or 'off'")
+        ws_options["compression_threshold"] = int(args.ws_compression_threshold)
+
+    targets = [target.strip() for target in args.targets.split(',') if target.strip()]
+    for target in targets:
+        if target not in TARGETS:
+            parser.error(f"unknown target '{target}'")
+
+    workload = Workload(
+        ops=args.ops, duration=args.duration, concurrency=args.concurrency, keys=args.keys,
+        distribution=args.distribution, zipf_s=args.zipf_s, value_size=args.value_size,
+        read_ratio=args.read_ratio, range_limit=args.range_limit, seed=args.seed
+    )
+
+    server = None
+    base_url, api_key = args.base_url, args.api_key
+    if base_url is None:
+        server = StandInServer(latency=args.latency_ms / 1000.0).start()
+        base_url, api_key = server.base_url, server.api_key
+    elif not api_key:
+        parser.error("--api-key (or HPKV_API_KEY) is required with --base-url")
+
+    try:
+        print(f"Benchmarking {base_url} with {json.dumps(workload.to_dict())}")
+        metrics = HPKVMetrics() if args.metrics else None
+        results = run_benchmarks(base_url, api_key, targets, workload, args.skip_preload, metrics, ws_options)
+    finally:
+        if server is not None:
+            server.stop()
+
+    print(format_report(results))
+    if metrics is not None:
+        print()
+        print(metrics.to_prometheus(), end='')
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({
+                "base_url": base_url,
+                "workload": workload.to_dict(),
+                "results": [result.to_dict() for result in results]
+            }, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import bisect
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from aiohttp import WSMsgType, web
+
+# WebSocket operation codes, matching OperationCode in the WebSocket example
+OP_GET = 1
+OP_INSERT = 2
+OP_UPDATE = 3
+OP_DELETE = 4
+
+# Subprotocol for msgpack envelopes in binary frames, matching the WebSocket example
+MSGPACK_SUBPROTOCOL = 'hpkv.msgpack'
+
+DEFAULT_RANGE_LIMIT = 100
+MAX_RANGE_LIMIT = 1000
+
+
+class RecordStore:
+    """Sorted in-memory key-value store backing the stand-in server."""
+
+    def __init__(self):
+        self._values: Dict[str, str] = {}
+        self._keys: List[str] = []
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._values.get(key)
+
+    def put(self, key: str, value: str, partial_update: bool = False) -> None:
+        with self._lock:
+            if key not in self._values:
+                bisect.insort(self._keys, key)
+            elif partial_update:
+                value = self._merge(self._values[key], value)
+            self._values[key] = value
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._values:
+                return False
+            del self._values[key]
+            del self._keys[bisect.bisect_left(self._keys, key)]
+            return True
+
+    def increment(self, key: str, increment: int) -> Optional[int]:
+        with self._lock:
+            if key not in self._values:
+                return None
+            new_value = int(self._values[key]) + increment
+            self._values[key] = str(new_value)
+            return new_value
+
+    def range(self, start_key: str, end_key: str, limit: int) -> Tuple[List[Tuple[str, str]], bool]:
+        """Return up to `limit` records with start_key <= key <= end_key, and whether more remain."""
+        with self._lock:
+            start = bisect.bisect_left(self._keys, start_key)
+            end = bisect.bisect_right(self._keys, end_key)
+            keys = self._keys[start:min(end, start + limit)]
+            return [(key, self._values[key]) for key in keys], end - start > limit
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._keys.clear()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @staticmethod
+    def _merge(current: str, update: str) -> str:
+        """Merge JSON objects field by field; append anything else."""
+        try:
+            current_doc = json.loads(current)
+            update_doc = json.loads(update)
+        except (json.JSONDecodeError, TypeError):
+            return current + update
+        if isinstance(current_doc, dict) and isinstance(update_doc, dict):
+            current_doc.update(update_doc)
+            return json.dumps(current_doc)
+        return current + update
+
+
+class StandInServer:
+    """In-process stand-in for the HPKV REST and WebSocket APIs.
+
+    Serves ``/record``, ``/record/{key}``, ``/record/atomic``, ``/records`` and
+    the ``/ws`` op-code protocol from an in-memory store, on an event loop
+    running in a background thread. Intended for local benchmarks and CI; it
+    is not a faithful reimplementation of HPKV.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, api_key: str = 'standin-api-key',
+                 latency: float = 0.0, rate_limit: Optional[float] = None):
+        """Initialize the server.
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free port)
+            api_key: API key clients must send (None disables the check)
+            latency: Artificial delay in seconds added to every request, to mimic network RTT
+            rate_limit: Requests per second accepted before answering 429 with Retry-After (None for no limit)
+        """
+        self.host = host
+        self.port = port
+        self.api_key = api_key
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.store = RecordStore()
+        self.throttled = 0
+
+        # Token bucket for rate_limit, holding up to one second of requests
+        self._tokens = rate_limit or 0.0
+        self._tokens_updated = time.monotonic()
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/record', self._handle_put)
+        app.router.add_post('/record/atomic', self._handle_atomic)
+        app.router.add_get('/record/{key:.+}', self._handle_get)
+        app.router.add_delete('/record/{key:.+}', self._handle_delete)
+        app.router.add_get('/records', self._handle_range)
+        app.router.add_get('/ws', self._handle_ws)
+        return app
+
+    # Lifecycle
+
+    def start(self) -> 'StandInServer':
+        """Start serving in a background thread and wait until the port is bound."""
+        ready = threading.Event()
+        errors: List[BaseException] = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self._start_site())
+            except BaseException as e:
+                errors.append(e)
+                ready.set()
+                return
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._runner.cleanup())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name='hpkv-standin', daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    async def _start_site(self) -> None:
+        self._runner = web.AppRunner(self._build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    def stop(self) -> None:
+        """Stop the server and wait for its thread to exit."""
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+        self._loop = None
+        self._thread = None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the server stops, or until `timeout` seconds have passed.
+
+        Returns:
+            bool: True if the server is no longer running
+        """
+        thread = self._thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+
+    # REST handlers
+
+    def _authorized(self, api_key: Optional[str]) -> bool:
+        return self.api_key is None or api_key == self.api_key
+
+    async def _delay(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _admit(self) -> bool:
+        """Take a token from the rate limit bucket; False if the request should be throttled."""
+        if self.rate_limit is None:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._tokens_updated) * self.rate_limit)
+        self._tokens_updated = now
+        if self._tokens < 1:
+            self.throttled += 1
+            return False
+        self._tokens -= 1
+        return True
+
+    async def _prepare(self, request: web.Request) -> Optional[web.Response]:
+        """Apply latency, authentication and the rate limit; return an error response if rejected."""
+        await self._delay()
+        if not self._authorized(request.headers.get('x-api-key')):
+            return web.json_response({"error": "Unauthorized"}, status=401)
+        if not self._admit():
+            return web.json_response({"error": "Too many requests"}, status=429, headers={'Retry-After': '1'})
+        return None
+
+    async def _handle_put(self, request: web.Request) -> web.Response:
+        rejected = await self._prepare(request)
+        if rejected:
+            return rejected
+        try:
+            body = await request.json()
+            key, value = body['key'], body['value']
+        except (ValueError, KeyError, TypeError):
+            return web.json_response({"error": "Invalid request body"}, status=400)
+        if not isinstance(value, str):
+            return web.json_response({"error": "Value must be a string"}, status=400)
+        self.store.put(key, value, bool(body.get('partialUpdate')))
+        return web.json_response({"success": True, "message": "Record inserted/updated successfully"})
+
+    async def _handle_get(self, request: web.Request) -> web.Response:
+        rejected = await self._prepare(request)
+        if rejected:
+            return rejected
+        key = request.match_info['key']
+        value = self.store.get(key)
+        if value is None:
+            return web.json_response({"error": "Record not found"}, status=404)
+        return web.json_response({"key": key, "value": value})
+
+    async def _handle_delete(self, request: web.Request) -> web.Response:
+        rejected = await self._prepare(request)
+        if rejected:
+            return rejected
+        if not self.store.delete(request.match_info['key']):
+            return web.json_response({"error": "Record not found"}, status=404)
+        return web.json_response({"success": True, "message": "Record deleted successfully"})
+
+    async def _handle_atomic(self, request: web.Request) -> web.Response:
+        rejected = await self._prepare(request)
+        if rejected:
+            return rejected
+        try:
+            body = await request.json()
+            key, increment = body['key'], int(body['increment'])
+        except (ValueError, KeyError, TypeError):
+            return web.json_response({"error": "Invalid request body"}, status=400)
+        try:
+            new_value = self.store.increment(key, increment)
+        except ValueError:
+            return web.json_response({"error": "Value is not a number"}, status=400)
+        if new_value is None:
+            return web.json_response({"error": "Record not found"}, status=404)
+        return web.json_response({"success": True, "newValue": new_value})
+
+    async def _handle_range(self, request: web.Request) -> web.Response:
+        rejected = await self._prepare(request)
+        if rejected:
+            return rejected
+        start_key = request.query.get('startKey')
+        end_key = request.query.get('endKey')
+        if start_key is None or end_key is None:
+            return web.json_response({"error": "startKey and endKey are required"}, status=400)
+        try:
+            limit = min(int(request.query.get('limit', DEFAULT_RANGE_LIMIT)), MAX_RANGE_LIMIT)
+        except ValueError:
+            return web.json_response({"error": "limit must be an integer"}, status=400)
+        records, truncated = self.store.range(start_key, end_key, limit)
+        return web.json_response({
+            "records": [{"key": key, "value": value} for key, value in records],
+            "count": len(records),
+            "truncated": truncated
+        })
+
+    # WebSocket handler
+
+    async def _handle_ws(self, request: web.Request) -> web.StreamResponse:
+        if not self._authorized(request.query.get('apiKey')):
+            return web.json_response({"error": "Unauthorized"}, status=401)
+
+        # Clients that offer the msgpack subprotocol get binary frames; everyone else JSON text
+        ws = web.WebSocketResponse(protocols=(MSGPACK_SUBPROTOCOL,))
+        await ws.prepare(request)
+        packer = None
+        if ws.ws_protocol == MSGPACK_SUBPROTOCOL:
+            import msgpack
+            packer = msgpack
+        replies = set()
+        async for msg in ws:
+            if msg.type == WSMsgType.TEXT:
+                response = json.dumps(self._handle_ws_message(msg.data))
+            elif msg.type == WSMsgType.BINARY and packer is not None:
+                try:
+                    message = packer.unpackb(msg.data, raw=False)
+                except Exception:
+                    message = None
+                response = packer.packb(self._handle_ws_message(message), use_bin_type=True)
+            else:
+                continue
+            # Apply the operation in arrival order, but delay only the reply so
+            # that pipelined requests on one socket overlap like they would on a real network
+            if self.latency:
+                task = asyncio.ensure_future(self._reply_later(ws, response))
+                replies.add(task)
+                task.add_done_callback(replies.discard)
+            else:
+                await self._send_reply(ws, response)
+        for task in list(replies):
+            task.cancel()
+        return ws
+
+    async def _reply_later(self, ws: web.WebSocketResponse, response: Union[str, bytes]) -> None:
+        await self._delay()
+        if not ws.closed:
+            await self._send_reply(ws, response)
+
+    @staticmethod
+    async def _send_reply(ws: web.WebSocketResponse, response: Union[str, bytes]) -> None:
+        if isinstance(response, bytes):
+            await ws.send_bytes(response)
+        else:
+            await ws.send_str(response)
+
+    def _handle_ws_message(self, message: Union[str, Dict[str, Any], None]) -> Dict[str, Any]:
+        """Apply one request, given as JSON text or an already decoded msgpack envelope."""
+        if isinstance(message, str):
+            try:
+                message = json.loads(message)
+            except json.JSONDecodeError:
+                return {"error": "Invalid JSON", "code": 400}
+        if not isinstance(message, dict):
+            return {"error": "Invalid message", "code": 400}
+
+        message_id = message.get('messageId')
+        if not self._admit():
+            return {"error": "Too many requests", "code": 429, "retryAfter": 1, "messageId": message_id}
+        op = message.get('op')
+        key = message.get('key')
+        if key is None:
+            return {"error": "Key is required", "code": 400, "messageId": message_id}
+
+        if op == OP_GET:
+            value = self.store.get(key)
+            if value is None:
+                return {"error": "Record not found", "code": 404, "messageId": message_id}
+            return {"key": key, "value": value, "code": 200, "messageId": message_id}
+        if op in (OP_INSERT, OP_UPDATE):
+            value = message.get('value')
+            if not isinstance(value, str):
+                return {"error": "Value must be a string", "code": 400, "messageId": message_id}
+            self.store.put(key, value, op == OP_UPDATE)
+            return {"success": True, "message": "Record inserted/updated successfully",
+                    "code": 200, "messageId": message_id}
+        if op == OP_DELETE:
+            if not self.store.delete(key):
+                return {"error": "Record not found", "code": 404, "messageId": message_id}
+            return {"success": True, "message": "Record deleted successfully",
+                    "code": 200, "messageId": message_id}
+        return {"error": f"Unknown operation: {op}", "code": 400, "messageId": message_id}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the HPKV stand-in server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--api-key', default='standin-api-key')
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help="Artificial delay added to every request")
+    parser.add_argument('--rate-limit', type=float, default=None,
+                        help="Requests per second accepted before answering 429")
+    args = parser.parse_args()
+
+    server = StandInServer(args.host, args.port, args.api_key, args.latency_ms / 1000.0, args.rate_limit)
+    server.start()
+    print(f"HPKV stand-in server listening on {server.base_url} (API key: {args.api_key})")
+    try:
+        server.wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Shared helpers live in examples/common/python
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common', 'python'))
+from hpkv_transport import HPKVTransport
+from hpkv_batch import BatchResult, run_batch
+from hpkv_codecs import HPKVValueCodec
+
+FORMATS = ('jsonl', 'csv')
+# A .json file may hold one top-level array rather than a row per line, so it needs an explicit format
+_EXTENSIONS = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.csv': 'csv'}
+# Failures kept in memory (and in the checkpoint) for reporting; the rest only go to the failures file
+_FAILED_SAMPLE = 10
+
+
+class LoadStats:
+    """Progress of a load, as saved in its checkpoint."""
+
+    def __init__(self, source: str, offset: int = 0, rows: int = 0, loaded: int = 0,
+                 failed: Optional[List[Dict[str, Any]]] = None, elapsed: float = 0.0,
+                 failures: Optional[int] = None, failures_bytes: int = 0):
+        self.source = source
+        self.offset = offset  # Every row before this byte offset has been written or recorded as failed
+        self.rows = rows
+        self.loaded = loaded
+        self.failed = failed or []  # The first few failures, for reporting
+        self.failures = len(self.failed) if failures is None else failures
+        self.failures_bytes = failures_bytes  # Length of the failures file that matches this checkpoint
+        self.elapsed = elapsed
+
+    def add_failure(self, failure: Dict[str, Any]) -> None:
+        self.failures += 1
+        if len(self.failed) < _FAILED_SAMPLE:
+            self.failed.append(failure)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "offset": self.offset,
+            "rows": self.rows,
+            "loaded": self.loaded,
+            "failed": self.failed,
+            "failures": self.failures,
+            "failures_bytes": self.failures_bytes,
+            "elapsed": round(self.elapsed, 3)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LoadStats':
+        return cls(data["source"], data["offset"], data["rows"], data["loaded"], data["failed"], data["elapsed"],
+                   data.get("failures"), data.get("failures_bytes", 0))
+
+
+class _Row:
+    """One input row on its way to HPKV."""
+
+    __slots__ = ('index', 'start', 'end', 'key', 'body', 'error')
+
+    def __init__(self, index: int, start: int, end: int, key: Optional[str] = None,
+                 body: Optional[str] = None, error: Optional[str] = None):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.key = key
+        self.body = body
+        self.error = error
+
+
+class _RowFailed(Exception):
+    """A row that could not be written, carrying the row it came from."""
+
+    def __init__(self, row: _Row, error: Exception):
+        super().__init__(str(error))
+        self.row = row
+
+
+def _row_key(row: _Row) -> str:
+    # Rows that failed to parse have no key yet
+    return row.key if row.key is not None else ''
+
+
+class HPKVBulkLoader:
+    """Streams JSONL or CSV rows from disk into HPKV.
+
+    Rows are read lazily and written with bounded concurrency, so memory
+    stays flat however large the file is. Each row becomes one record whose
+    key comes from `key_template` (str.format fields taken from the row) or
+    `key_field`, and whose value is the row as JSON (or one field of it).
+
+    Progress is checkpointed to a JSON file: the byte offset before which
+    every row is done, and the failure counts. Failed rows are appended to
+    a failures file next to it (`checkpoint_path + '.failed.jsonl'`), so
+    the checkpoint stays small however many rows fail. Loading again with
+    `resume=True` first retries the recorded failures, then seeks to the
+    offset instead of starting over.
+    """
+
+    def __init__(self, transport: HPKVTransport, key_template: Optional[str] = None,
+                 key_field: Optional[str] = None, value_field: Optional[str] = None,
+                 max_workers: int = 16, checkpoint_path: Optional[str] = None,
+                 checkpoint_interval: float = 5.0, progress_interval: float = 5.0,
+                 value_codec: Optional[HPKVValueCodec] = None):
+        """Initialize the loader.
+
+        Args:
+            transport: Transport to write through; size its pool to at least max_workers
+            key_template: Key pattern such as "user:{id}", filled from the row's fields
+            key_field: Row field holding the key (used if key_template is not given)
+            value_field: Store only this field of the row (defaults to the whole row)
+            max_workers: Writes in flight at once
+            checkpoint_path: Where to save progress (optional, no checkpoints otherwise); failed
+                rows go to `checkpoint_path + '.failed.jsonl'`
+            checkpoint_interval: Seconds between checkpoint saves
+            progress_interval: Seconds between progress lines on stderr (0 disables them)
+            value_codec: How values are encoded (optional, defaults to untagged JSON)
+        """
+        if not key_template and not key_field:
+            raise ValueError("Either key_template or key_field is required")
+        self.transport = transport
+        self.key_template = key_template
+        self.key_field = key_field
+        self.value_field = value_field
+        self.max_workers = max_workers
+        self.checkpoint_path = checkpoint_path
+        self.failures_path = checkpoint_path + '.failed.jsonl' if checkpoint_path else None
+        self.checkpoint_interval = checkpoint_interval
+        self.progress_interval = progress_interval
+        self.value_codec = value_codec or HPKVValueCodec()
+
+    def _make_key(self, row: Dict[str, Any]) -> str:
+        if self.key_template:
+            return self.key_template.format_map(row)
+        return str(row[self.key_field])
+
+    def _prepare(self, index: int, start: int, end: int, row: Any) -> _Row:
+        """Turn a parsed row into its key and request body, or an error."""
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("row is not an object")
+            key = self._make_key(row)
+            value = row[self.value_field] if self.value_field else row
+            body = self.value_codec.dumps({"key": key, "value": self.value_codec.encode(value)})
+            return _Row(index, start, end, key, body)
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            return _Row(index, start, end, error=f"{type(e).__name__}: {e}")
+
+    @staticmethod
+    def _lines(f, offset: int) -> Iterator[Tuple[int, int, bytes]]:
+        """Yield (start offset, end offset, line) from a binary file, starting at `offset`."""
+        f.seek(offset)
+        position = offset
+        for line in f:
+            start, position = position, position + len(line)
+            yield start, position, line
+
+    def _read_jsonl(self, f, offset: int) -> Iterator[Tuple[int, int, Any]]:
+        for start, end, line in self._lines(f, offset):
+            if not line.strip():
+                continue
+            try:
+                yield start, end, self.value_codec.loads(line)
+            except ValueError as e:
+                yield start, end, e
+
+    def _read_csv(self, f, offset: int) -> Iterator[Tuple[int, int, Any]]:
+        f.seek(0)
+        header_line = f.readline()
+        fields = next(csv.reader([header_line.decode('utf-8-sig')]))
+        lines = self._lines(f, max(offset, len(header_line)))
+        bounds = {}
+
+        def text_lines() -> Iterator[str]:
+            # csv pulls as many lines as a row needs (quoted fields may span lines)
+            for start, end, line in lines:
+                bounds.setdefault('start', start)
+                bounds['end'] = end
+                yield line.decode('utf-8')
+
+        for values in csv.reader(text_lines()):
+            start, end = bounds.pop('start'), bounds['end']
+            if values:
+                yield start, end, dict(zip(fields, values))
+
+    def _rows(self, path: str, format: str, offset: int, first_index: int) -> Iterator[_Row]:
+        read = self._read_jsonl if format == 'jsonl' else self._read_csv
+        with open(path, 'rb') as f:
+            for index, (start, end, row) in enumerate(read(f, offset), first_index):
+                if isinstance(row, Exception):
+                    yield _Row(index, start, end, error=f"Invalid row: {row}")
+                else:
+                    yield self._prepare(index, start, end, row)
+
+    def _write(self, row: _Row) -> bool:
+        if row.error is not None:
+            raise ValueError(row.error)
+        response = self.transport.post("/record", "create", data=row.body)
+        if response.status_code not in (200, 201):
+            raise ValueError(f"Status {response.status_code} - {response.text}")
+        return True
+
+    def _write_row(self, row: _Row) -> _Row:
+        """Write one row, returning it, or raise _RowFailed carrying it."""
+        try:
+            self._write(row)
+        except Exception as e:
+            raise _RowFailed(row, e) from e
+        return row
+
+    @staticmethod
+    def _finished(result: BatchResult) -> Tuple[_Row, Optional[Dict[str, Any]]]:
+        """The row a write result belongs to, and its failure record if it failed."""
+        if result.ok:
+            return result.value, None
+        row = result.error.row
+        return row, {"key": row.key, "offset": row.start, "error": str(result.error)}
+
+    def _save_checkpoint(self, stats: LoadStats, failures_file=None) -> None:
+        if not self.checkpoint_path:
+            return
+        if failures_file is not None:
+            # The failures written so far must be on disk before a checkpoint counts them
+            failures_file.flush()
+            stats.failures_bytes = failures_file.tell()
+        # Write then rename, so a crash mid-write never leaves a torn checkpoint
+        temporary = self.checkpoint_path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(stats.to_dict(), f)
+        os.replace(temporary, self.checkpoint_path)
+
+    def _load_checkpoint(self, path: str) -> Optional[LoadStats]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path) as f:
+            stats = LoadStats.from_dict(json.load(f))
+        if stats.source != os.path.abspath(path):
+            raise ValueError(f"Checkpoint {self.checkpoint_path} belongs to {stats.source}, not {path}")
+        return stats
+
+    def _open_failures(self, stats: LoadStats):
+        """Open the failures file for appending, cut back to what the checkpoint counts."""
+        if not self.failures_path:
+            return None
+        f = open(self.failures_path, 'ab')
+        # Failures recorded after the last checkpoint belong to rows that will be processed again
+        f.truncate(stats.failures_bytes)
+        f.seek(stats.failures_bytes)
+        return f
+
+    def _retry_failures(self, path: str, format: str, stats: LoadStats) -> None:
+        """Write the rows recorded as failed again; the ones that still fail are kept."""
+        if not self.failures_path or not stats.failures_bytes or not os.path.exists(self.failures_path):
+            return
+        retry_path = self.failures_path + '.tmp'
+
+        def failed_rows() -> Iterator[_Row]:
+            read = self._read_jsonl if format == 'jsonl' else self._read_csv
+            with open(self.failures_path, 'rb') as failures, open(path, 'rb') as f:
+                # Only the failures the checkpoint counts; later ones belong to rows not yet done
+                position = 0
+                for index, line in enumerate(failures):
+                    position += len(line)
+                    if position > stats.failures_bytes:
+                        break
+                    offset = self.value_codec.loads(line)["offset"]
+                    start, end, row = next(read(f, offset))
+                    if isinstance(row, Exception):
+                        yield _Row(index, start, end, error=f"Invalid row: {row}")
+                    else:
+                        yield self._prepare(index, start, end, row)
+
+        retried = recovered = 0
+        stats.failed, stats.failures = [], 0
+        with open(retry_path, 'wb') as still_failing:
+            for result in run_batch(self._write_row, failed_rows(), key_of=_row_key, max_workers=self.max_workers):
+                retried += 1
+                _, failure = self._finished(result)
+                if failure is None:
+                    recovered += 1
+                    stats.loaded += 1
+                    continue
+                still_failing.write(self.value_codec.dumps(failure).encode('utf-8') + b'\n')
+                stats.add_failure(failure)
+            still_failing.flush()
+            os.fsync(still_failing.fileno())
+        stats.failures_bytes = os.path.getsize(retry_path)
+        os.replace(retry_path, self.failures_path)
+        self._save_checkpoint(stats)
+        print(f"Retried {retried} failed row(s): {recovered} loaded, {retried - recovered} still failing",
+              file=sys.stderr)
+
+    def load(self, path: str, format: Optional[str] = None, resume: bool = False) -> LoadStats:
+        """Load a file, optionally resuming from the checkpoint.
+
+        Args:
+            path: JSONL or CSV file (CSV needs a header row)
+            format: 'jsonl' or 'csv' (defaults to the file extension)
+            resume: Continue from the checkpoint if there is one, retrying the rows it recorded as failed
+
+        Returns:
+            LoadStats: Rows processed, loaded and failed, and the time taken
+        """
+        format = format or _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if format not in FORMATS:
+            raise ValueError(f"Unknown input format for {path}; pass format='jsonl' or 'csv'")
+
+        stats = (self._load_checkpoint(path) if resume else None) or LoadStats(os.path.abspath(path))
+        if resume:
+            self._retry_failures(path, format, stats)
+        failures_file = self._open_failures(stats)
+        started = time.monotonic() - stats.elapsed
+        last_checkpoint = last_progress = time.monotonic()
+        rows_at_last_progress = stats.rows
+
+        # Rows finish out of order; the checkpoint (offset and counts) only advances past a
+        # contiguous run of finished rows, so a resume never skips or double-counts a row
+        next_index = stats.rows
+        finished: Dict[int, Tuple[int, Optional[Dict[str, Any]]]] = {}
+
+        rows = self._rows(path, format, stats.offset, stats.rows)
+        results = run_batch(self._write_row, rows, key_of=_row_key, max_workers=self.max_workers)
+        try:
+            for result in results:
+                row, failure = self._finished(result)
+                finished[row.index] = (row.end, failure)
+                while next_index in finished:
+                    stats.offset, failure = finished.pop(next_index)
+                    next_index += 1
+                    stats.rows += 1
+                    if failure is None:
+                        stats.loaded += 1
+                    else:
+                        stats.add_failure(failure)
+                        if failures_file is not None:
+                            failures_file.write(self.value_codec.dumps(failure).encode('utf-8') + b'\n')
+
+                now = time.monotonic()
+                stats.elapsed = now - started
+                if now - last_checkpoint >= self.checkpoint_interval:
+                    self._save_checkpoint(stats, failures_file)
+                    last_checkpoint = now
+                if self.progress_interval and now - last_progress >= self.progress_interval:
+                    rate = (stats.rows - rows_at_last_progress) / (now - last_progress)
+                    print(f"{stats.rows} rows ({stats.loaded} loaded, {stats.failures} failed), "
+                          f"{rate:.0f} rows/s now, {stats.rows_per_second:.0f} rows/s overall", file=sys.stderr)
+                    last_progress, rows_at_last_progress = now, stats.rows
+        finally:
+            results.close()
+            stats.elapsed = time.monotonic() - started
+            self._save_checkpoint(stats, failures_file)
+            if failures_file is not None:
+                failures_file.close()
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load JSONL or CSV rows into HPKV")
+    parser.add_argument('path', help="JSONL or CSV file (CSV needs a header row)")
+    parser.add_argument('--format', choices=FORMATS, help="Input format (defaults to the file extension)")
+    keys = parser.add_mutually_exclusive_group(required=True)
+    keys.add_argument('--key-template', help="Key pattern filled from row fields, e.g. 'user:{id}'")
+    keys.add_argument('--key-field', help="Row field holding the key")
+    parser.add_argument('--value-field', help="Store only this field (defaults to the whole row)")
+    parser.add_argument('--concurrency', type=int, default=16, help="Writes in flight at once")
+    parser.add_argument('--checkpoint', help="Checkpoint file (defaults to <path>.checkpoint.json)")
+    parser.add_argument('--resume', action='store_true', help="Continue from the checkpoint")
+    parser.add_argument('--progress-interval', type=float, default=5.0, help="Seconds between progress lines")
+    parser.add_argument('--base-url', help="HPKV server URL (defaults to HPKV_BASE_URL)")
+    parser.add_argument('--api-key', help="HPKV API key (defaults to HPKV_API_KEY)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    base_url = args.base_url or os.getenv('HPKV_BASE_URL')
+    api_key = args.api_key or os.getenv('HPKV_API_KEY')
+    if not base_url or not api_key:
+        parser.error("Set HPKV_BASE_URL and HPKV_API_KEY (or pass --base-url and --api-key)")
+
+    transport = HPKVTransport(base_url, api_key, pool_maxsize=args.concurrency)
+    loader = HPKVBulkLoader(
+        transport, key_template=args.key_template, key_field=args.key_field, value_field=args.value_field,
+        max_workers=args.concurrency, checkpoint_path=args.checkpoint or args.path + '.checkpoint.json',
+        progress_interval=args.progress_interval
+    )
+    try:
+        stats = loader.load(args.path, args.format, resume=args.resume)
+    except KeyboardInterrupt:
+        print("\nInterrupted; progress is saved, rerun with --resume to continue", file=sys.stderr)
+        sys.exit(130)
+    except Exception as e:
+        print(f"Error loading {args.path}: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        transport.close()
+
+    print(f"Processed {stats.rows} rows in {stats.elapsed:.1f}s ({stats.rows_per_second:.0f} rows/s): "
+          f"{stats.loaded} loaded, {stats.failures} failed")
+    for failure in stats.failed:
+        print(f"  {failure['key'] or '(no key)'} at offset {failure['offset']}: {failure['error']}")
+    if stats.failures:
+        print(f"All failed rows are listed in {loader.failures_path}; rerun with --resume to retry them",
+              file=sys.stderr)
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main()
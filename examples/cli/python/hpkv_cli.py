@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+from typing import Any, List, Optional
+
+# The clients come from the other examples. Their modules, and requests and
+# dotenv with them, are imported by the commands that need them rather than
+# here, so `--help` and usage errors return immediately.
+_EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+for _example in ('common', 'basic-crud', 'atomic-inc', 'range-queries'):
+    sys.path.insert(0, os.path.join(_EXAMPLES_DIR, _example, 'python'))
+
+
+class CommandError(Exception):
+    """A command failed; the message (if any) is printed and the exit status is 1."""
+
+
+class _LineParser(argparse.ArgumentParser):
+    """Parser for batch lines: reports errors instead of exiting."""
+
+    def error(self, message: str) -> None:
+        raise CommandError(message)
+
+
+class HPKVSession:
+    """The clients used by one CLI run, sharing one pooled transport.
+
+    Each client is created on first use, so a command only imports what it
+    needs, and every command of a batch reuses the same keep-alive
+    connection.
+    """
+
+    def __init__(self, base_url: str, api_key: str, rate_limit: Optional[float] = None):
+        """Initialize the session.
+
+        Args:
+            base_url: HPKV server URL
+            api_key: HPKV API key
+            rate_limit: Starting requests per second for an adaptive rate limiter (optional)
+        """
+        self.base_url = base_url
+        self.api_key = api_key
+        self.rate_limit = rate_limit
+        self._transport = None
+        self._client = None
+        self._ranges = None
+
+    @property
+    def transport(self):
+        if self._transport is None:
+            from hpkv_transport import HPKVTransport
+
+            limiter = None
+            if self.rate_limit:
+                from hpkv_ratelimit import HPKVRateLimiter
+                limiter = HPKVRateLimiter(rate=self.rate_limit)
+            self._transport = HPKVTransport(self.base_url, self.api_key, pool_maxsize=1, rate_limiter=limiter)
+        return self._transport
+
+    @property
+    def client(self):
+        """HPKVClient for get, put and del."""
+        if self._client is None:
+            from hpkv_crud_example import HPKVClient
+            self._client = HPKVClient(self.base_url, self.api_key, transport=self.transport)
+        return self._client
+
+    @property
+    def ranges(self):
+        """HPKVRangeQueriesExample for scan."""
+        if self._ranges is None:
+            from hpkv_range_queries_example import HPKVRangeQueriesExample
+            self._ranges = HPKVRangeQueriesExample(transport=self.transport)
+        return self._ranges
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+
+def _print_value(value: Any) -> None:
+    if isinstance(value, str):
+        print(value)
+    else:
+        import json
+        print(json.dumps(value, ensure_ascii=False))
+
+
+def cmd_get(session: HPKVSession, args: argparse.Namespace) -> None:
+    value = session.client.read(args.key)
+    if value is None:
+        # The client has already reported why
+        raise CommandError()
+    _print_value(value)
+
+
+def cmd_put(session: HPKVSession, args: argparse.Namespace) -> None:
+    if args.partial:
+        ok = session.client.update(args.key, args.value, partial_update=True)
+    else:
+        ok = session.client.create(args.key, args.value)
+    if not ok:
+        raise CommandError()
+
+
+def cmd_del(session: HPKVSession, args: argparse.Namespace) -> None:
+    if not session.client.delete(args.key):
+        raise CommandError(f"Failed to delete {args.key}")
+
+
+def cmd_incr(session: HPKVSession, args: argparse.Namespace) -> None:
+    from atomic_increment import atomic_increment
+
+    try:
+        result = atomic_increment(args.key, args.delta, transport=session.transport)
+    except ValueError as e:
+        raise CommandError(str(e))
+    print(result.get("newValue"))
+
+
+def cmd_scan(session: HPKVSession, args: argparse.Namespace) -> None:
+    page_size = min(args.page_size, args.limit) if args.limit else args.page_size
+    count = 0
+    try:
+        for record in session.ranges.scan(args.start, args.end, page_size=page_size):
+            print(record["key"] if args.keys_only else f"{record['key']}\t{record['value']}")
+            count += 1
+            if args.limit and count >= args.limit:
+                break
+    except Exception as e:
+        raise CommandError(f"Scan failed: {str(e)}")
+
+
+def _add_commands(subparsers) -> None:
+    """Add the data commands, which are the same on the command line and in batch input."""
+    get = subparsers.add_parser('get', help="Print the value of a key")
+    get.add_argument('key')
+    get.set_defaults(handler=cmd_get)
+
+    put = subparsers.add_parser('put', help="Store a value (JSON text is stored as-is)")
+    put.add_argument('key')
+    put.add_argument('value')
+    put.add_argument('--partial', action='store_true', help="Merge a JSON object into the stored one")
+    put.set_defaults(handler=cmd_put)
+
+    delete = subparsers.add_parser('del', help="Delete a key")
+    delete.add_argument('key')
+    delete.set_defaults(handler=cmd_del)
+
+    incr = subparsers.add_parser('incr', help="Atomically add to a counter and print the new value")
+    incr.add_argument('key')
+    incr.add_argument('delta', type=int, nargs='?', default=1)
+    incr.set_defaults(handler=cmd_incr)
+
+    scan = subparsers.add_parser('scan', help="Print key<TAB>value for every key in [start, end]")
+    scan.add_argument('start')
+    scan.add_argument('end')
+    scan.add_argument('--limit', type=int, help="Stop after this many records")
+    scan.add_argument('--page-size', type=int, default=100, help="Records per range query")
+    scan.add_argument('--keys-only', action='store_true', help="Print only the keys")
+    scan.set_defaults(handler=cmd_scan)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='hpkv', description="HPKV command-line client")
+    parser.add_argument('--base-url', help="HPKV server URL (defaults to HPKV_BASE_URL)")
+    parser.add_argument('--api-key', help="HPKV API key (defaults to HPKV_API_KEY)")
+    parser.add_argument('--rate-limit', type=float, help="Pace requests, starting at this many per second")
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+    _add_commands(subparsers)
+
+    batch = subparsers.add_parser('batch', help="Run commands read from stdin, one per line, over one connection")
+    batch.add_argument('--stop-on-error', action='store_true', help="Stop at the first failing command")
+    return parser
+
+
+def _run(session: HPKVSession, args: argparse.Namespace) -> bool:
+    """Run one command, reporting a failure on stderr; True if it succeeded."""
+    try:
+        args.handler(session, args)
+        return True
+    except CommandError as e:
+        if str(e):
+            print(f"Error: {str(e)}", file=sys.stderr)
+        return False
+
+
+def run_batch(session: HPKVSession, lines, stop_on_error: bool = False) -> int:
+    """Run one command per line, as written on the command line (blank lines and # comments are skipped).
+
+    Args:
+        session: Session whose connection every command shares
+        lines: Command lines, e.g. sys.stdin
+        stop_on_error: Stop at the first failing command instead of carrying on
+
+    Returns:
+        int: Number of commands that failed
+    """
+    import shlex
+
+    parser = _LineParser(prog='hpkv', add_help=False)
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    subparsers.required = True
+    _add_commands(subparsers)
+
+    failures = 0
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            ok = _run(session, parser.parse_args(shlex.split(line)))
+        except (CommandError, ValueError) as e:
+            print(f"Error: line {number}: {str(e)}", file=sys.stderr)
+            ok = False
+        except SystemExit:
+            # -h on a batch line prints its help; carry on with the next line
+            ok = True
+        if not ok:
+            failures += 1
+            if stop_on_error:
+                break
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if not os.getenv('HPKV_BASE_URL') or not os.getenv('HPKV_API_KEY'):
+        from dotenv import load_dotenv
+        load_dotenv()
+    base_url = args.base_url or os.getenv('HPKV_BASE_URL') or os.getenv('HPKV_API_BASE_URL')
+    api_key = args.api_key or os.getenv('HPKV_API_KEY')
+    if not base_url or not api_key:
+        parser.error("Set HPKV_BASE_URL and HPKV_API_KEY (or pass --base-url and --api-key)")
+
+    session = HPKVSession(base_url, api_key, args.rate_limit)
+    try:
+        if args.command == 'batch':
+            return 1 if run_batch(session, sys.stdin, args.stop_on_error) else 0
+        return 0 if _run(session, args) else 1
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        session.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+
+DEFAULT_MAX_WORKERS = 10
+
+
+class BatchResult:
+    """Outcome of a single item in a batch operation."""
+
+    __slots__ = ('key', 'ok', 'value', 'error')
+
+    def __init__(self, key: str, ok: bool, value: Any = None, error: Optional[BaseException] = None):
+        self.key = key
+        self.ok = ok
+        self.value = value
+        self.error = error
+
+    def __repr__(self) -> str:
+        if self.error is not None:
+            return f"BatchResult(key={self.key!r}, ok={self.ok}, error={self.error!r})"
+        return f"BatchResult(key={self.key!r}, ok={self.ok}, value={self.value!r})"
+
+
+def run_batch(operation: Callable[[T], Any], items: Iterable[T],
+              key_of: Callable[[T], str] = lambda item: item,
+              is_ok: Callable[[Any], bool] = lambda value: True,
+              max_workers: int = DEFAULT_MAX_WORKERS,
+              max_pending: Optional[int] = None) -> Iterator[BatchResult]:
+    """Fan `operation` out over a bounded thread pool and stream results.
+
+    Items are pulled from `items` lazily, so at most `max_pending` operations
+    are queued or running at any time no matter how large the input is.
+    Results are yielded in completion order. A failing item (exception or
+    `is_ok` returning False) is reported in its BatchResult and does not stop
+    the rest of the batch.
+
+    Args:
+        operation: Function applied to each item
+        items: Items to process (keys, key/value pairs, ...)
+        key_of: Extracts the key reported in each BatchResult
+        is_ok: Decides whether a returned value counts as success
+        max_workers: Number of worker threads
+        max_pending: Maximum submitted-but-unfinished items (defaults to 2 * max_workers)
+
+    Yields:
+        BatchResult: One per item, as each one completes
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+    max_pending = max_pending or 2 * max_workers
+
+    iterator = iter(items)
+    pending: Dict[Future, str] = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[executor.submit(operation, item)] = key_of(item)
+
+            if not pending:
+                return
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = pending.pop(future)
+                error = future.exception()
+                if error is not None:
+                    yield BatchResult(key, False, error=error)
+                else:
+                    value = future.result()
+                    yield BatchResult(key, is_ok(value), value)
+    finally:
+        # Abandoned iteration (break/close) drops anything not yet started
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Returned by HPKVCache.get when a key is not cached (None is a valid cached value)
+MISSING = object()
+
+
+def serialized_size(serialized: str) -> int:
+    """Size in bytes of a serialized value as sent over the wire (UTF-8)."""
+    # isascii() is a flag check, so ASCII values skip the encode
+    return len(serialized) if serialized.isascii() else len(serialized.encode('utf-8'))
+
+
+class HPKVCache:
+    """In-process LRU cache of decoded HPKV values with a per-entry TTL.
+
+    The cache is bounded both by entry count and by the approximate size of
+    the serialized values it holds. It is thread-safe, so it can sit behind
+    the batch operations that read from a thread pool.
+
+    Cached values are returned as-is rather than copied; callers that mutate
+    a value returned by ``read`` should copy it first.
+
+    A read that raced a write must not put the value it read back after the
+    write: take ``generation(key)`` before reading and pass it to ``put``,
+    which drops the fill if the key was written or invalidated in between.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024,
+                 ttl: Optional[float] = 30.0):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached keys
+            max_bytes: Maximum total size of cached values, in bytes of their serialized form
+            ttl: Seconds an entry stays fresh (None for no expiry)
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        # key -> (value, size, expires_at)
+        self._entries: 'OrderedDict[str, Tuple[Any, int, Optional[float]]]' = OrderedDict()
+        self._bytes = 0
+        # key -> times it was written or invalidated; bounded by resetting it
+        # and bumping the epoch, which makes every outstanding fill stale
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Any:
+        """Return the cached value for `key`, or MISSING."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def generation(self, key: str) -> Tuple[int, int]:
+        """Token to pass to `put` when filling `key` with a value read from the server."""
+        with self._lock:
+            return self._epoch, self._generations.get(key, 0)
+
+    def put(self, key: str, value: Any, size: int, generation: Optional[Tuple[int, int]] = None) -> None:
+        """Cache a decoded value.
+
+        Args:
+            key: Key of the record
+            value: Decoded value
+            size: Size of the serialized value in bytes (see `serialized_size`), used for the byte budget
+            generation: `generation(key)` taken before the read that produced the value; the
+                value is dropped if the key changed since. Without it the put is a write,
+                and fills still in flight for the key are dropped
+        """
+        with self._lock:
+            if generation is None:
+                self._bump(key)
+            elif generation != (self._epoch, self._generations.get(key, 0)):
+                return
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        """Drop `key` from the cache if present."""
+        with self._lock:
+            self._bump(key)
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generations.clear()
+            self._epoch += 1
+
+    def _bump(self, key: str) -> None:
+        """Record a write to `key`; the lock must be held."""
+        self._generations[key] = self._generations.get(key, 0) + 1
+        if len(self._generations) > self.max_entries:
+            self._generations.clear()
+            self._epoch += 1
+
+    def _remove(self, key: str) -> None:
+        """Remove an entry; the lock must be held."""
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters and current usage, for sizing the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+import abc
+import base64
+import json
+import re
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Tagged values start with this marker followed by a one-character codec tag
+TAG_MARKER = '\x1e'
+
+# First characters an untagged value can start with if it is JSON (other than true/false/null)
+_JSON_START = frozenset('{["-0123456789')
+_JSON_LITERALS = frozenset(('true', 'false', 'null'))
+_JSON_WHITESPACE = ' \t\n\r'
+# A whole value that is one JSON number
+_JSON_NUMBER = re.compile(r'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?')
+
+
+class Codec(abc.ABC):
+    """Encodes values to, and decodes them from, the string stored in HPKV."""
+
+    name = 'codec'
+    tag = ''
+
+    @abc.abstractmethod
+    def encode(self, value: Any) -> str:
+        """Encode a value to the string stored in HPKV."""
+
+    @abc.abstractmethod
+    def decode(self, payload: str) -> Any:
+        """Decode a string produced by `encode`."""
+
+
+class JsonCodec(Codec):
+    """JSON, using orjson when it is installed and the stdlib otherwise."""
+
+    name = 'json'
+    tag = 'j'
+
+    def __init__(self, backend: str = 'auto'):
+        """Initialize the codec.
+
+        Args:
+            backend: 'auto' (orjson if installed), 'orjson' or 'stdlib'
+        """
+        if backend not in ('auto', 'orjson', 'stdlib'):
+            raise ValueError("backend must be 'auto', 'orjson' or 'stdlib'")
+        if backend == 'orjson' and orjson is None:
+            raise ImportError("The orjson backend requires the orjson package (pip install orjson)")
+        self.fast = orjson is not None and backend != 'stdlib'
+
+    @property
+    def backend(self) -> str:
+        return 'orjson' if self.fast else 'stdlib'
+
+    def dumps(self, value: Any) -> str:
+        if self.fast:
+            try:
+                return orjson.dumps(value).decode('utf-8')
+            except TypeError:
+                # orjson rejects a few things the stdlib accepts (e.g. integers over 64 bits)
+                pass
+        return json.dumps(value)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        if self.fast:
+            return orjson.loads(data)
+        return json.loads(data)
+
+    encode = dumps
+    decode = loads
+
+
+class StringCodec(Codec):
+    """Plain strings, stored as-is."""
+
+    name = 'str'
+    tag = 's'
+
+    def encode(self, value: Any) -> str:
+        if not isinstance(value, str):
+            raise TypeError(f"StringCodec can only encode str, not {type(value).__name__}")
+        return value
+
+    def decode(self, payload: str) -> Any:
+        return payload
+
+
+class BytesCodec(Codec):
+    """Raw bytes, stored base64-encoded."""
+
+    name = 'bytes'
+    tag = 'b'
+
+    def encode(self, value: Any) -> str:
+        if not isinstance(value, (bytes, bytearray, memoryview)):
+            raise TypeError(f"BytesCodec can only encode bytes, not {type(value).__name__}")
+        return base64.b64encode(value).decode('ascii')
+
+    def decode(self, payload: str) -> Any:
+        return base64.b64decode(payload)
+
+
+class MsgpackCodec(Codec):
+    """MessagePack, stored base64-encoded. Requires the msgpack package."""
+
+    name = 'msgpack'
+    tag = 'm'
+
+    def __init__(self):
+        try:
+            import msgpack
+        except ImportError:
+            raise ImportError("MsgpackCodec requires the msgpack package (pip install msgpack)")
+        self._msgpack = msgpack
+
+    def encode(self, value: Any) -> str:
+        return base64.b64encode(self._msgpack.packb(value, use_bin_type=True)).decode('ascii')
+
+    def decode(self, payload: str) -> Any:
+        return self._msgpack.unpackb(base64.b64decode(payload), raw=False)
+
+
+class HPKVValueCodec:
+    """Turns client values into HPKV value strings and back.
+
+    With the default untagged JSON codec, values are stored exactly as before:
+    strings as-is and everything else as JSON, so other clients and
+    server-side partial updates keep working. Tagged mode prefixes every
+    value with TAG_MARKER and a codec tag, which makes decoding a single,
+    deterministic call. Non-JSON codecs (msgpack, bytes) are always tagged.
+
+    Untagged values are only handed to the JSON parser when they look like
+    JSON, so plain strings are returned without raising and catching a
+    decode error.
+    """
+
+    def __init__(self, codec: Optional[Codec] = None, tagged: bool = False, json_backend: str = 'auto'):
+        """Initialize the value codec.
+
+        Args:
+            codec: Codec for non-string values (defaults to JsonCodec)
+            tagged: Prefix values with a type tag (forced on for non-JSON codecs)
+            json_backend: JSON backend for JSON values and message envelopes ('auto', 'orjson', 'stdlib')
+        """
+        self.json = JsonCodec(json_backend)
+        self.codec = codec or self.json
+        self.tagged = tagged or not isinstance(self.codec, JsonCodec)
+
+        self._string = StringCodec()
+        self._bytes = BytesCodec()
+        self._decoders: Dict[str, Codec] = {
+            codec.tag: codec for codec in (self.json, self._string, self._bytes)
+        }
+        self._decoders[self.codec.tag] = self.codec
+
+    def encode(self, value: Any) -> str:
+        """Encode a value as the string to store."""
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            codec = self._bytes
+        elif isinstance(value, str):
+            if not self.tagged:
+                return value
+            codec = self._string
+        else:
+            codec = self.codec
+        if not self.tagged and codec is self.codec:
+            return codec.encode(value)
+        return f"{TAG_MARKER}{codec.tag}{codec.encode(value)}"
+
+    def decode(self, data: Any) -> Any:
+        """Decode a stored string into a value."""
+        if not isinstance(data, str) or not data:
+            return data
+        if data[0] == TAG_MARKER and len(data) > 1:
+            codec = self._decoders.get(data[1])
+            if codec is None and data[1] == MsgpackCodec.tag:
+                codec = self._decoders[data[1]] = MsgpackCodec()
+            if codec is not None:
+                return codec.decode(data[2:])
+        return self._decode_untagged(data)
+
+    def _decode_untagged(self, data: str) -> Any:
+        """Decode a value written without a tag: JSON if it looks like JSON, the string otherwise."""
+        text = data
+        if data[0] in _JSON_WHITESPACE or data[-1] in _JSON_WHITESPACE:
+            # JSON allows surrounding whitespace; only values that have it pay for the copy
+            text = data.strip(_JSON_WHITESPACE)
+            if not text:
+                return data
+        head = text[0]
+        # Strings such as dates or IDs that merely start like a number skip the failing parse
+        if head in '{["' or text in _JSON_LITERALS or (head in _JSON_START and _JSON_NUMBER.fullmatch(text)):
+            try:
+                return self.json.loads(text)
+            except ValueError:
+                pass
+        return data
+
+    def dumps(self, message: Any) -> str:
+        """Serialize a message envelope (request body, WebSocket frame)."""
+        return self.json.dumps(message)
+
+    def loads(self, message: Union[str, bytes]) -> Any:
+        """Parse a message envelope (response body, WebSocket frame)."""
+        return self.json.loads(message)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+import bisect
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Latency histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _OperationStats:
+    """Counters for a single operation name."""
+
+    __slots__ = ('bucket_counts', 'count', 'latency_sum', 'bytes_out', 'bytes_in', 'status_codes', 'errors')
+
+    def __init__(self, bucket_count: int):
+        # One slot per bucket plus the +Inf bucket; counts are per-bucket, not cumulative
+        self.bucket_counts = [0] * (bucket_count + 1)
+        self.count = 0
+        self.latency_sum = 0.0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.status_codes: Dict[int, int] = {}
+        self.errors: Dict[str, int] = {}
+
+
+class HPKVMetrics:
+    """In-process metrics collected by the HPKV transports.
+
+    Records, per logical operation, a latency histogram, bytes sent and
+    received, HTTP status code counts and transport error counts. Values can
+    be read in-process with ``snapshot()`` or exported in the Prometheus text
+    format with ``to_prometheus()``.
+
+    Transports only call ``observe`` when a metrics object is attached, so
+    leaving it unset costs nothing on the request path.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, namespace: str = 'hpkv_client'):
+        """Initialize the metrics.
+
+        Args:
+            buckets: Increasing latency bucket upper bounds, in seconds
+            namespace: Prefix of the exported Prometheus metric names
+        """
+        if list(buckets) != sorted(buckets):
+            raise ValueError("buckets must be in increasing order")
+        self.buckets: Tuple[float, ...] = tuple(buckets)
+        self.namespace = namespace
+        self._operations: Dict[str, _OperationStats] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, operation: str, latency: float, status: Optional[int] = None,
+                bytes_out: int = 0, bytes_in: int = 0, error: Optional[BaseException] = None) -> None:
+        """Record one request.
+
+        Args:
+            operation: Logical operation name (``create``, ``read``, ``atomic``, ...)
+            latency: Request duration in seconds
+            status: HTTP status code, or None if no response was received
+            bytes_out: Size of the request body
+            bytes_in: Size of the response body
+            error: Exception raised by the transport, if any
+        """
+        index = bisect.bisect_left(self.buckets, latency)
+        with self._lock:
+            stats = self._operations.get(operation)
+            if stats is None:
+                stats = self._operations[operation] = _OperationStats(len(self.buckets))
+            stats.bucket_counts[index] += 1
+            stats.count += 1
+            stats.latency_sum += latency
+            stats.bytes_out += bytes_out
+            stats.bytes_in += bytes_in
+            if status is not None:
+                stats.status_codes[status] = stats.status_codes.get(status, 0) + 1
+            if error is not None:
+                error_type = type(error).__name__
+                stats.errors[error_type] = stats.errors.get(error_type, 0) + 1
+
+    def reset(self) -> None:
+        """Drop everything recorded so far."""
+        with self._lock:
+            self._operations.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Return a copy of the current values, keyed by operation.
+
+        Each operation maps to ``count``, ``latency_sum``, ``bytes_out``,
+        ``bytes_in``, ``status_codes``, ``errors`` and ``buckets`` (cumulative
+        counts keyed by upper bound, Prometheus style).
+        """
+        with self._lock:
+            result = {}
+            for operation, stats in self._operations.items():
+                result[operation] = {
+                    "count": stats.count,
+                    "latency_sum": stats.latency_sum,
+                    "bytes_out": stats.bytes_out,
+                    "bytes_in": stats.bytes_in,
+                    "status_codes": dict(stats.status_codes),
+                    "errors": dict(stats.errors),
+                    "buckets": self._cumulative(stats)
+                }
+            return result
+
+    def _cumulative(self, stats: _OperationStats) -> Dict[str, int]:
+        """Cumulative bucket counts keyed by formatted upper bound; the lock must be held."""
+        buckets = {}
+        total = 0
+        for bound, count in zip(list(self.buckets) + [float('inf')], stats.bucket_counts):
+            total += count
+            buckets['+Inf' if bound == float('inf') else repr(bound)] = total
+        return buckets
+
+    def to_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        ns = self.namespace
+        lines: List[str] = [
+            f"# HELP {ns}_request_duration_seconds HPKV request latency.",
+            f"# TYPE {ns}_request_duration_seconds histogram"
+        ]
+        with self._lock:
+            operations = sorted(self._operations.items())
+            for operation, stats in operations:
+                for bound, count in self._cumulative(stats).items():
+                    lines.append(f'{ns}_request_duration_seconds_bucket{{operation="{operation}",le="{bound}"}} {count}')
+                lines.append(f'{ns}_request_duration_seconds_sum{{operation="{operation}"}} {stats.latency_sum}')
+                lines.append(f'{ns}_request_duration_seconds_count{{operation="{operation}"}} {stats.count}')
+
+            lines += [f"# HELP {ns}_bytes_sent_total Request body bytes sent.",
+                      f"# TYPE {ns}_bytes_sent_total counter"]
+            lines += [f'{ns}_bytes_sent_total{{operation="{operation}"}} {stats.bytes_out}'
+                      for operation, stats in operations]
+
+            lines += [f"# HELP {ns}_bytes_received_total Response body bytes received.",
+                      f"# TYPE {ns}_bytes_received_total counter"]
+            lines += [f'{ns}_bytes_received_total{{operation="{operation}"}} {stats.bytes_in}'
+                      for operation, stats in operations]
+
+            lines += [f"# HELP {ns}_responses_total Responses by HTTP status code.",
+                      f"# TYPE {ns}_responses_total counter"]
+            for operation, stats in operations:
+                for status, count in sorted(stats.status_codes.items()):
+                    lines.append(f'{ns}_responses_total{{operation="{operation}",code="{status}"}} {count}')
+
+            lines += [f"# HELP {ns}_errors_total Requests that failed without a response.",
+                      f"# TYPE {ns}_errors_total counter"]
+            for operation, stats in operations:
+                for error_type, count in sorted(stats.errors.items()):
+                    lines.append(f'{ns}_errors_total{{operation="{operation}",error="{error_type}"}} {count}')
+        return "\n".join(lines) + "\n"
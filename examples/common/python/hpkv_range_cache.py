@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+
+import bisect
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from hpkv_cache import serialized_size
+
+# fetch(start_key, end_key, limit) -> (records, truncated), records being {"key", "value"} dicts in key order
+RangeFetch = Callable[[str, str, Optional[int]], Tuple[List[Dict[str, Any]], bool]]
+
+
+def _value_size(value: Any) -> int:
+    """Size in bytes of a cached value as it is sent over the wire; decoded values count as their JSON."""
+    if not isinstance(value, str):
+        value = json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
+    return serialized_size(value)
+
+
+class _Interval:
+    """A key range [start, end] and every record stored in it when it was fetched."""
+
+    __slots__ = ('start', 'end', 'keys', 'values', 'size', 'expires_at', 'last_used')
+
+    def __init__(self, start: str, end: str, keys: List[str], values: List[Any],
+                 expires_at: Optional[float]):
+        self.start = start
+        self.end = end
+        self.keys = keys
+        self.values = values
+        self.size = sum(serialized_size(key) + _value_size(value) for key, value in zip(keys, values))
+        self.expires_at = expires_at
+        self.last_used = 0
+
+    def slice(self, low: str, low_inclusive: bool, high: str) -> Tuple[List[str], List[Any]]:
+        """Keys and values with low (<= or <) key <= high."""
+        first = (bisect.bisect_left if low_inclusive else bisect.bisect_right)(self.keys, low)
+        last = bisect.bisect_right(self.keys, high)
+        return self.keys[first:last], self.values[first:last]
+
+
+class HPKVRangeCache:
+    """Cache of range query results, indexed by the key intervals they cover.
+
+    Every cached interval holds all records that existed in its key range
+    when it was fetched, so any query inside it can be answered by slicing.
+    A query that is only partly covered fetches just the gaps between cached
+    intervals, and the fetched gaps are merged with their neighbours into
+    larger intervals.
+
+    Writes must be reported with ``invalidate(key)``: the interval containing
+    the key is dropped, since the write may have added, changed or removed a
+    record in it; ``HPKVClient(range_cache=...)`` reports its own writes. A
+    TTL bounds staleness against writers that don't report, and a byte
+    budget (keys plus raw values) bounds memory, evicting the least recently
+    used intervals first. The cache is thread-safe.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, ttl: Optional[float] = 30.0, page_size: int = 100):
+        """Initialize the cache.
+
+        Args:
+            max_bytes: Maximum total size in UTF-8 bytes of cached keys and values
+            ttl: Seconds an interval stays fresh (None for no expiry)
+            page_size: Records requested per range query when filling a gap
+        """
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        if page_size < 2:
+            raise ValueError("page_size must be at least 2")
+
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.page_size = page_size
+
+        # Non-overlapping intervals sorted by start, with their starts for bisecting
+        self._intervals: List[_Interval] = []
+        self._starts: List[str] = []
+        self._bytes = 0
+        self._clock = 0
+        # Bumped by every invalidation, so fetches that raced a write aren't stored
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.fetches = 0
+
+    def query(self, start_key: str, end_key: str, limit: Optional[int], fetch: RangeFetch) -> Dict[str, Any]:
+        """Answer a range query from cached intervals, fetching only what is missing.
+
+        Args:
+            start_key: Starting key for the range (inclusive)
+            end_key: Ending key for the range (inclusive)
+            limit: Maximum number of records to return (optional)
+            fetch: Performs an uncached range query for a gap
+
+        Returns:
+            Dict in the shape of a range query response: records, count, truncated
+        """
+        if start_key > end_key:
+            return {"records": [], "count": 0, "truncated": False}
+        keys: List[str] = []
+        values: List[Any] = []
+        cursor, inclusive = start_key, True
+        fetched = served = False
+        truncated = False
+
+        while True:
+            remaining = None if limit is None else limit - len(keys)
+            with self._lock:
+                interval, next_start = self._lookup(cursor, inclusive)
+                if interval is not None:
+                    interval.last_used = self._tick()
+                    served = True
+                    slice_keys, slice_values = interval.slice(cursor, inclusive, end_key)
+                    covered = interval.end
+            if interval is None:
+                # Fill the gap up to the next cached interval (or the end of the query)
+                fetched = True
+                gap_end = end_key if next_start is None or next_start > end_key else next_start
+                slice_keys, slice_values, covered = self._fill(cursor, gap_end, remaining, fetch)
+                if not inclusive:
+                    while slice_keys and slice_keys[0] <= cursor:
+                        slice_keys, slice_values = slice_keys[1:], slice_values[1:]
+
+            if remaining is not None and len(slice_keys) >= remaining:
+                keys.extend(slice_keys[:remaining])
+                values.extend(slice_values[:remaining])
+                if len(slice_keys) > remaining:
+                    truncated = True
+                    break
+                # Exactly `limit` records so far: truncated only if another one follows, so keep looking
+            else:
+                keys.extend(slice_keys)
+                values.extend(slice_values)
+            if covered >= end_key:
+                break
+            cursor, inclusive = covered, False
+
+        with self._lock:
+            if not fetched:
+                self.hits += 1
+            elif served:
+                self.partial_hits += 1
+            else:
+                self.misses += 1
+        records = [{"key": key, "value": value} for key, value in zip(keys, values)]
+        return {"records": records, "count": len(records), "truncated": truncated}
+
+    def _fill(self, start_key: str, end_key: str, remaining: Optional[int],
+              fetch: RangeFetch) -> Tuple[List[str], List[Any], str]:
+        """Fetch a gap page by page, cache what was fetched and return it with the last key covered."""
+        with self._lock:
+            generation = self._generation
+        keys: List[str] = []
+        values: List[Any] = []
+        low = start_key
+        while True:
+            # One extra record, since each page after the first repeats the previous last key
+            page_limit = self.page_size if remaining is None else min(self.page_size, max(remaining - len(keys) + 1, 2))
+            records, truncated = fetch(low, end_key, page_limit)
+            with self._lock:
+                self.fetches += 1
+            for record in records:
+                if not keys or record["key"] > keys[-1]:
+                    keys.append(record["key"])
+                    values.append(record["value"])
+            if not truncated or not records:
+                covered = end_key
+                break
+            covered = low = records[-1]["key"]
+            if remaining is not None and len(keys) > remaining:
+                break
+        self._store(start_key, covered, keys, values, generation)
+        return keys, values, covered
+
+    def _store(self, start_key: str, end_key: str, keys: List[str], values: List[Any], generation: int) -> None:
+        """Cache a fetched interval, merging it with the intervals it overlaps or touches."""
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        interval = _Interval(start_key, end_key, keys, values, expires_at)
+        with self._lock:
+            if generation != self._generation or interval.size > self.max_bytes:
+                return
+            first = bisect.bisect_left(self._starts, start_key)
+            if first > 0 and self._intervals[first - 1].end >= start_key:
+                first -= 1
+            last = bisect.bisect_right(self._starts, end_key)
+            if first < last:
+                # Merge: records just fetched replace the old ones inside [start_key, end_key]
+                head, tail = self._intervals[first], self._intervals[last - 1]
+                before = bisect.bisect_left(head.keys, start_key)
+                after = bisect.bisect_right(tail.keys, end_key)
+                expiries = [old.expires_at for old in self._intervals[first:last] if old.expires_at is not None]
+                if expires_at is not None:
+                    expiries.append(expires_at)
+                interval = _Interval(min(start_key, head.start), max(end_key, tail.end),
+                                     head.keys[:before] + keys + tail.keys[after:],
+                                     head.values[:before] + values + tail.values[after:],
+                                     min(expiries) if expiries else None)
+                for index in range(last - 1, first - 1, -1):
+                    self._remove(index)
+            interval.last_used = self._tick()
+            self._intervals.insert(first, interval)
+            self._starts.insert(first, interval.start)
+            self._bytes += interval.size
+            while self._bytes > self.max_bytes and len(self._intervals) > 1:
+                oldest = min(range(len(self._intervals)), key=lambda i: self._intervals[i].last_used)
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _lookup(self, key: str, inclusive: bool) -> Tuple[Optional[_Interval], Optional[str]]:
+        """The fresh interval covering key (past it, if not inclusive) and the start of the next one; lock held."""
+        index = bisect.bisect_right(self._starts, key) - 1
+        if index >= 0:
+            interval = self._intervals[index]
+            if interval.expires_at is not None and interval.expires_at <= time.monotonic():
+                self._remove(index)
+                self.expirations += 1
+            elif interval.end > key or (inclusive and interval.end == key):
+                return interval, None
+        index = bisect.bisect_right(self._starts, key)
+        return None, self._starts[index] if index < len(self._starts) else None
+
+    def _remove(self, index: int) -> None:
+        """Remove an interval; the lock must be held."""
+        self._bytes -= self._intervals[index].size
+        del self._intervals[index]
+        del self._starts[index]
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def invalidate(self, key: str) -> None:
+        """Drop the interval containing `key`, after a write to it."""
+        with self._lock:
+            self._generation += 1
+            index = bisect.bisect_right(self._starts, key) - 1
+            if index >= 0 and self._intervals[index].end >= key:
+                self._remove(index)
+
+    def clear(self) -> None:
+        """Drop every interval, keeping the counters."""
+        with self._lock:
+            self._generation += 1
+            self._intervals.clear()
+            self._starts.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters and current usage, for sizing the cache."""
+        with self._lock:
+            return {
+                "intervals": len(self._intervals),
+                "records": sum(len(interval.keys) for interval in self._intervals),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "partial_hits": self.partial_hits,
+                "misses": self.misses,
+                "fetches": self.fetches,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
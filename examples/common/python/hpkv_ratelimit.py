@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+
+import asyncio
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+# Status codes that mean "slow down": the server is throttling or temporarily overloaded
+THROTTLE_STATUSES = frozenset((429, 503))
+
+# A burst of throttled responses from requests already in flight is treated as one signal
+_DECREASE_INTERVAL = 1.0
+
+# Starting requests per second of the shared default limiter; unset, empty or 0 leaves it off
+RATE_LIMIT_ENV = 'HPKV_RATE_LIMIT'
+
+
+class ThrottledError(Exception):
+    """A request was rejected with 429 or 503."""
+
+    def __init__(self, message: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Any) -> Optional[float]:
+    """Seconds to wait from a Retry-After value (delay in seconds or an HTTP date), or None."""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(parsedate_to_datetime(str(value)).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def retry_after_header(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """The Retry-After delay in a response's headers, or None."""
+    if not headers:
+        return None
+    return parse_retry_after(headers.get('Retry-After', headers.get('retry-after')))
+
+
+class HPKVRateLimiter:
+    """Adaptive token bucket shared by every client and transport given it.
+
+    Each request takes a token first. Tokens refill at `rate` per second up
+    to a burst, and a request that finds none reserves the next one and
+    sleeps until it is due, so waiters are released evenly in order instead
+    of polling. The bucket is thread-safe and works from threads
+    (`acquire`) and asyncio tasks (`acquire_async`) at the same time.
+
+    The rate adapts to the server (additive increase, multiplicative
+    decrease): every successful request raises it by about `increase` per
+    second, and a 429/503 response cuts it by `decrease`, at most once per
+    second so a burst of rejections from requests already in flight counts
+    once. A Retry-After delay holds back every caller sharing the bucket,
+    not just the one that was rejected.
+
+    The limiter also carries the retry policy: `should_retry` decides
+    whether a throttled request may be resent and `backoff` gives the
+    jittered delay before doing so.
+    """
+
+    def __init__(self, rate: float = 100.0, burst: Optional[float] = None,
+                 min_rate: float = 1.0, max_rate: Optional[float] = None,
+                 increase: float = 1.0, decrease: float = 0.5,
+                 max_retries: int = 3, backoff_base: float = 0.1, backoff_max: float = 10.0):
+        """Initialize the limiter.
+
+        Args:
+            rate: Starting rate in requests per second
+            burst: Maximum tokens saved up while idle (defaults to a tenth of a second at the current rate)
+            min_rate: Floor for the rate after decreases
+            max_rate: Ceiling for the rate after increases (None keeps probing upwards)
+            increase: Requests per second added per second of successful requests
+            decrease: Factor applied to the rate on a throttled response
+            max_retries: Resends allowed for a throttled request
+            backoff_base: Upper bound in seconds of the first jittered retry delay
+            backoff_max: Cap in seconds on the exponentially growing retry delay
+        """
+        if rate <= 0 or min_rate <= 0:
+            raise ValueError("rate and min_rate must be positive")
+        if max_rate is not None and max_rate < min_rate:
+            raise ValueError("max_rate must not be below min_rate")
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1")
+        if max_retries < 0:
+            raise ValueError("max_retries must not be negative")
+
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = self._clamp(rate)
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._tokens = self._capacity()
+        self._updated = time.monotonic()
+        self._decreased_at = float('-inf')
+        # Bumped by every throttled response, so callers paced before it reserve again
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+        self.acquired = 0
+        self.waited = 0.0
+        self.throttled = 0
+        self.retries = 0
+
+    def _clamp(self, rate: float) -> float:
+        rate = max(rate, self.min_rate)
+        return min(rate, self.max_rate) if self.max_rate is not None else rate
+
+    def _capacity(self) -> float:
+        return self.burst if self.burst is not None else max(self.rate / 10, 1.0)
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens earned since the last update; the lock must be held."""
+        self._tokens = min(self._capacity(), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self, epoch: Optional[int]) -> Tuple[float, int]:
+        """Take a token, returning how long until it is due and the current throttle epoch.
+
+        A caller that reserved in an earlier epoch was paced at a rate the
+        server has since rejected, so it reserves again instead of sending.
+        Returns a zero wait when `epoch` is still current.
+        """
+        with self._lock:
+            if epoch == self._epoch:
+                return 0.0, epoch
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            if epoch is None:
+                self.acquired += 1
+            self.waited += wait
+            return wait, self._epoch
+
+    def acquire(self) -> float:
+        """Wait for a token from a thread.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        wait, epoch = self._reserve(None)
+        while wait > 0:
+            time.sleep(wait)
+            waited += wait
+            wait, epoch = self._reserve(epoch)
+        return waited
+
+    async def acquire_async(self) -> float:
+        """Wait for a token from an asyncio task without blocking the loop.
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        wait, epoch = self._reserve(None)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+            wait, epoch = self._reserve(epoch)
+        return waited
+
+    def on_success(self) -> None:
+        """Report a request the server accepted, nudging the rate up."""
+        with self._lock:
+            self.rate = self._clamp(self.rate + self.increase / self.rate)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """Report a 429/503 response, cutting the rate and honouring Retry-After.
+
+        Args:
+            retry_after: Seconds the server asked callers to wait (optional)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.throttled += 1
+            self._epoch += 1
+            if now - self._decreased_at >= _DECREASE_INTERVAL:
+                self.rate = self._clamp(self.rate * self.decrease)
+                self._decreased_at = now
+            # Spend the bucket, and go into debt for the Retry-After period,
+            # so every caller sharing it waits before the next request
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._tokens = min(self._tokens, -retry_after * self.rate)
+
+    def should_retry(self, status: int, attempt: int, idempotent: bool) -> bool:
+        """Whether a request rejected with `status` on try `attempt` (0-based) may be resent.
+
+        A 429 means the request was refused before it was applied, so any
+        operation can be resent. A 503 may come after the request was
+        applied, so only idempotent operations are resent.
+        """
+        if attempt >= self.max_retries or status not in THROTTLE_STATUSES:
+            return False
+        return status == 429 or idempotent
+
+    def backoff(self, attempt: int) -> float:
+        """Jittered delay in seconds before resending after try `attempt` (0-based).
+
+        Any Retry-After delay is already charged to the bucket, so this only
+        spreads out the callers that were rejected together.
+        """
+        with self._lock:
+            self.retries += 1
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current rate and counters."""
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "acquired": self.acquired,
+                "waited": self.waited,
+                "throttled": self.throttled,
+                "retries": self.retries
+            }
+
+
+# Shared default limiter: _UNSET until set_rate_limiter() is called or the environment is read
+_UNSET = object()
+_default_limiter: Any = _UNSET
+_default_lock = threading.Lock()
+
+
+def set_rate_limiter(limiter: Optional[HPKVRateLimiter]) -> None:
+    """Set the limiter shared by every transport and client created without one.
+
+    Affects objects created afterwards. Pass None to turn the default off,
+    even when HPKV_RATE_LIMIT is set.
+    """
+    global _default_limiter
+    with _default_lock:
+        _default_limiter = limiter
+
+
+def get_rate_limiter() -> Optional[HPKVRateLimiter]:
+    """The shared default limiter, or None when there is none.
+
+    Unless set_rate_limiter() was called, it is created on first use from
+    HPKV_RATE_LIMIT, the starting rate in requests per second.
+
+    Raises:
+        ValueError: If HPKV_RATE_LIMIT is not a number
+    """
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is _UNSET:
+            value = os.getenv(RATE_LIMIT_ENV, '').strip()
+            try:
+                rate = float(value) if value else 0.0
+            except ValueError:
+                raise ValueError(f"{RATE_LIMIT_ENV} must be a number of requests per second, got {value!r}")
+            _default_limiter = HPKVRateLimiter(rate=rate) if rate > 0 else None
+        return _default_limiter
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from hpkv_codecs import HPKVValueCodec
+
+# Placeholder for a value that hasn't been decoded yet (None is a valid decoded value)
+_UNDECODED = object()
+
+_default_codec = HPKVValueCodec()
+
+
+class RangeRecord:
+    """A key and its stored value, decoded lazily.
+
+    Range results arrive as strings; a RangeRecord keeps the raw string and
+    decodes it only when `value` (or `get`) is first used, then keeps the
+    decoded value. Records that are filtered out by key, or never looked at,
+    never pay for decoding. `__slots__` keeps each record to four fields
+    instead of a per-record dict.
+
+    Reading one field still decodes the whole value: the standard json
+    module can't parse part of a document, so `get`, `column` and `where`
+    build the full object once per record and then reuse it.
+    """
+
+    __slots__ = ('key', 'raw', 'codec', '_value')
+
+    def __init__(self, key: str, raw: Any, codec: Optional[HPKVValueCodec] = None):
+        self.key = key
+        self.raw = raw
+        self.codec = codec or _default_codec
+        self._value = _UNDECODED
+
+    @property
+    def value(self) -> Any:
+        """The decoded value (decoded on first access)."""
+        if self._value is _UNDECODED:
+            self._value = self.codec.decode(self.raw)
+        return self._value
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """A field of a JSON object value, or `default` if the value has no such field.
+
+        Decodes (and keeps) the whole value on first use, not just the field.
+        """
+        value = self.value
+        if isinstance(value, dict):
+            return value.get(field, default)
+        return default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The record in the shape the API returns it."""
+        return {"key": self.key, "value": self.raw}
+
+    def __repr__(self) -> str:
+        return f"RangeRecord(key={self.key!r}, raw={self.raw!r})"
+
+
+def to_records(records: Iterable[Dict[str, Any]], codec: Optional[HPKVValueCodec] = None) -> List[RangeRecord]:
+    """Wrap API record dicts ({"key", "value"}) as RangeRecords.
+
+    Args:
+        records: Records as returned by a range query
+        codec: Codec for the values (defaults to untagged JSON)
+
+    Returns:
+        List[RangeRecord]: One per record, in the same order
+    """
+    codec = codec or _default_codec
+    return [RangeRecord(record["key"], record["value"], codec) for record in records]
+
+
+def column(records: Iterable[RangeRecord], field: str, default: Any = None,
+           typecode: Optional[str] = None) -> Union[List[Any], array]:
+    """Extract one field across records.
+
+    Each record's whole value is decoded (once) to read the field.
+
+    Args:
+        records: Records to read
+        field: Field of each JSON object value
+        default: Used where a record has no such field
+        typecode: array typecode (e.g. 'd', 'q') to return a compact array instead of a list
+
+    Returns:
+        List or array of the field's values, one per record
+    """
+    values = [record.get(field, default) for record in records]
+    return array(typecode, values) if typecode else values
+
+
+def where(records: Iterable[RangeRecord], field: str, predicate: Callable[[Any], bool]) -> List[RangeRecord]:
+    """Records whose field satisfies a predicate.
+
+    Each record's whole value is decoded (once) to read the field.
+
+    Args:
+        records: Records to filter
+        field: Field of each JSON object value; records without it are passed None
+        predicate: Test applied to the field's value
+
+    Returns:
+        List[RangeRecord]: Matching records, in input order
+    """
+    return [record for record in records if predicate(record.get(field))]
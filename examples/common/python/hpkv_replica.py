@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from hpkv_codecs import HPKVValueCodec
+
+# scan(start_key, end_key) -> every {"key", "value"} record in [start_key, end_key], in key order
+RangeScan = Callable[[str, str], Iterable[Dict[str, Any]]]
+
+_MAGIC = b'HPKVREP1'
+# magic, version, count, index offset, built at (epoch seconds), start key length, end key length
+_HEADER = struct.Struct('<8sIQQdII')
+# Per record: offset of the key in the file, key length, value length (the value follows the key)
+_INDEX_ENTRY = struct.Struct('<QII')
+_VERSION = 1
+# Every this many keys is held in memory, so lookups bisect a short list before touching the file
+_SPARSE_STRIDE = 128
+# Records kept across a refresh are copied in chunks of this many bytes (data) and entries (index)
+_COPY_BYTES = 16 * 1024 * 1024
+_COPY_ENTRIES = 64 * 1024
+
+
+class _Snapshot:
+    """One replica file mapped read-only: a header, the records back to back, then a sorted offset index."""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.index_offset, self.built_at, start_length, end_length = \
+            _HEADER.unpack_from(self.map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not an HPKV replica file")
+        position = _HEADER.size
+        self.start_key = self.map[position:position + start_length].decode('utf-8')
+        position += start_length
+        self.end_key = self.map[position:position + end_length].decode('utf-8')
+        self.data_start = position + end_length
+        self.size = stat.st_size
+        self._sparse: Optional[list] = None
+
+    def entry(self, index: int) -> Tuple[int, int, int]:
+        return _INDEX_ENTRY.unpack_from(self.map, self.index_offset + index * _INDEX_ENTRY.size)
+
+    def data_offset(self, index: int) -> int:
+        """Where record `index` starts in the file, or where the record data ends if index == count."""
+        if index < self.count:
+            return self.entry(index)[0]
+        if not self.count:
+            return self.data_start
+        offset, key_length, value_length = self.entry(self.count - 1)
+        return offset + key_length + value_length
+
+    def key_bytes(self, index: int) -> bytes:
+        offset, key_length, _ = self.entry(index)
+        return self.map[offset:offset + key_length]
+
+    def record(self, index: int) -> Tuple[str, str]:
+        offset, key_length, value_length = self.entry(index)
+        value_offset = offset + key_length
+        return (self.map[offset:value_offset].decode('utf-8'),
+                self.map[value_offset:value_offset + value_length].decode('utf-8'))
+
+    def value(self, index: int) -> str:
+        offset, key_length, value_length = self.entry(index)
+        return self.map[offset + key_length:offset + key_length + value_length].decode('utf-8')
+
+    def bisect(self, key: bytes, right: bool = False) -> int:
+        """Index of the first record with a key >= `key` (> with `right`)."""
+        sparse = self._sparse
+        if sparse is None:
+            sparse = self._sparse = [self.key_bytes(i) for i in range(0, self.count, _SPARSE_STRIDE)]
+        # The answer lies between two sampled keys; finish with a binary search of that block
+        block = (bisect.bisect_right if right else bisect.bisect_left)(sparse, key)
+        low = max(block - 1, 0) * _SPARSE_STRIDE
+        high = min(block * _SPARSE_STRIDE, self.count)
+        while low < high:
+            middle = (low + high) // 2
+            probe = self.key_bytes(middle)
+            if probe < key or (right and probe == key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def records(self, first: int, last: int) -> Iterator[Tuple[str, str]]:
+        for index in range(first, last):
+            yield self.record(index)
+
+
+def _copy_bytes(f, source: _Snapshot, start: int, end: int) -> None:
+    """Copy bytes [start, end) of a mapped replica file into `f`."""
+    while start < end:
+        chunk = min(end - start, _COPY_BYTES)
+        f.write(source.map[start:start + chunk])
+        start += chunk
+
+
+def _copy_index(f, source: _Snapshot, first: int, last: int, shift: int) -> None:
+    """Copy the index entries of records [first, last), moving their offsets by `shift` bytes."""
+    position = source.index_offset + first * _INDEX_ENTRY.size
+    end = source.index_offset + last * _INDEX_ENTRY.size
+    while position < end:
+        chunk = source.map[position:min(end, position + _COPY_ENTRIES * _INDEX_ENTRY.size)]
+        position += len(chunk)
+        if shift:
+            # Each entry is two little-endian words: the offset, then both lengths
+            words = array('Q', chunk)
+            if sys.byteorder == 'big':
+                words.byteswap()
+            words[0::2] = array('Q', map(shift.__add__, words[0::2]))
+            if sys.byteorder == 'big':
+                words.byteswap()
+            chunk = words.tobytes()
+        f.write(chunk)
+
+
+def _write_snapshot(path: str, start_key: str, end_key: str, records: Iterable[Tuple[str, str]],
+                    source: Optional[_Snapshot] = None, keep_before: int = 0, keep_after: int = 0) -> int:
+    """Write records (sorted by key) as a replica file; returns the number of records in it.
+
+    With `source`, its records [0, keep_before) are kept before `records` and
+    [keep_after, count) after them. They are copied as raw bytes, with only
+    the offsets in their index entries moved, so they are never decoded.
+    """
+    start, end = start_key.encode('utf-8'), end_key.encode('utf-8')
+    index = array('Q')
+    lengths = array('I')
+    previous = None
+    with open(path, 'wb') as f:
+        f.write(b'\0' * (_HEADER.size + len(start) + len(end)))
+        if source is not None:
+            shift_before = f.tell() - source.data_start
+            _copy_bytes(f, source, source.data_start, source.data_offset(keep_before))
+        offset = f.tell()
+        for key, value in records:
+            key_bytes, value_bytes = key.encode('utf-8'), value.encode('utf-8')
+            if previous is not None and key_bytes <= previous:
+                raise ValueError(f"Range records are not in key order at '{key}'")
+            previous = key_bytes
+            f.write(key_bytes)
+            f.write(value_bytes)
+            index.append(offset)
+            lengths.append(len(key_bytes))
+            lengths.append(len(value_bytes))
+            offset += len(key_bytes) + len(value_bytes)
+        count = len(index)
+        if source is not None:
+            shift_after = offset - source.data_offset(keep_after)
+            _copy_bytes(f, source, source.data_offset(keep_after), source.data_offset(source.count))
+            offset = f.tell()
+            count += keep_before + source.count - keep_after
+        # Align the index so its entries don't straddle pages needlessly
+        padding = -offset % 8
+        f.write(b'\0' * padding)
+        index_offset = offset + padding
+        if source is not None:
+            _copy_index(f, source, 0, keep_before, shift_before)
+        for i, record_offset in enumerate(index):
+            f.write(_INDEX_ENTRY.pack(record_offset, lengths[2 * i], lengths[2 * i + 1]))
+        if source is not None:
+            _copy_index(f, source, keep_after, source.count, shift_after)
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, _VERSION, count, index_offset, time.time(), len(start), len(end)))
+        f.write(start)
+        f.write(end)
+        f.flush()
+        os.fsync(f.fileno())
+    return count
+
+
+class HPKVRangeReplica:
+    """Local read replica of a key range, kept in a memory-mapped file.
+
+    `refresh` snapshots every record in [start_key, end_key] (fetched with a
+    range scan) into a file of sorted records followed by an offset index.
+    Reads then binary-search the index in the mapped file, with no network
+    I/O and no per-record Python objects. The file is mapped read-only, so
+    any number of processes opening the same path share one copy in the OS
+    page cache instead of holding the keyspace each.
+
+    A refresh writes a new file next to the old one and renames it over the
+    path, so readers switch atomically. A refresh of a sub-range fetches
+    only that sub-range and copies the rest from the current file, and a
+    refresh that finds nothing changed leaves the file alone. Processes
+    that only read notice a new file within `reload_interval` seconds.
+
+    Reads and refreshes are thread-safe. Refresh from one process at a time.
+    """
+
+    def __init__(self, path: str, start_key: Optional[str] = None, end_key: Optional[str] = None,
+                 value_codec: Optional[HPKVValueCodec] = None, reload_interval: Optional[float] = 1.0):
+        """Open the replica file at `path`, if it exists.
+
+        Args:
+            path: Replica file (created by the first refresh)
+            start_key: First key of the replicated range (inclusive); taken from the file if omitted
+            end_key: Last key of the replicated range (inclusive); taken from the file if omitted
+            value_codec: How stored values are decoded by `read` (optional, defaults to untagged JSON)
+            reload_interval: Seconds between checks for a file replaced by another process (None never checks)
+        """
+        self.path = path
+        self.value_codec = value_codec or HPKVValueCodec()
+        self.reload_interval = reload_interval
+        self._snapshot: Optional[_Snapshot] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        # Serializes refreshes within this process
+        self._refresh_lock = threading.Lock()
+
+        self.reads = 0
+        self.reloads = 0
+        self.refreshes = 0
+
+        if os.path.exists(path):
+            self._snapshot = _Snapshot(path)
+            if (start_key, end_key) != (None, None) and \
+                    (start_key, end_key) != (self._snapshot.start_key, self._snapshot.end_key):
+                raise ValueError(f"{path} replicates [{self._snapshot.start_key}, {self._snapshot.end_key}], "
+                                 f"not [{start_key}, {end_key}]")
+        elif start_key is None or end_key is None:
+            raise ValueError("start_key and end_key are required to create a replica")
+        self.start_key = start_key if self._snapshot is None else self._snapshot.start_key
+        self.end_key = end_key if self._snapshot is None else self._snapshot.end_key
+        if self.start_key > self.end_key:
+            raise ValueError("start_key must not be after end_key")
+        self._next_check = time.monotonic() + (reload_interval or 0.0)
+
+    def _current(self) -> _Snapshot:
+        """The snapshot to read from, picking up a file replaced since the last check."""
+        snapshot = self._snapshot
+        if self.reload_interval is not None and time.monotonic() >= self._next_check:
+            with self._lock:
+                self._next_check = time.monotonic() + self.reload_interval
+                try:
+                    stat = os.stat(self.path)
+                    identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                except FileNotFoundError:
+                    identity = None
+                if identity is not None and (snapshot is None or identity != snapshot.identity):
+                    # Readers still holding the old snapshot keep a valid mapping until they drop it
+                    snapshot = self._snapshot = _Snapshot(self.path)
+                    self.reloads += 1
+        if snapshot is None:
+            raise RuntimeError(f"Replica {self.path} has not been built yet; call refresh() first")
+        return snapshot
+
+    def covers(self, start_key: str, end_key: str) -> bool:
+        """Whether [start_key, end_key] lies inside the replicated range."""
+        return self.start_key <= start_key and end_key <= self.end_key
+
+    def _check_key(self, key: str) -> None:
+        if not self.start_key <= key <= self.end_key:
+            raise ValueError(f"'{key}' is outside the replicated range [{self.start_key}, {self.end_key}]")
+
+    def read_raw(self, key: str) -> Optional[str]:
+        """The stored value of `key` as HPKV returned it, or None if it doesn't exist."""
+        self._check_key(key)
+        snapshot = self._current()
+        self.reads += 1
+        key_bytes = key.encode('utf-8')
+        index = snapshot.bisect(key_bytes)
+        if index < snapshot.count and snapshot.key_bytes(index) == key_bytes:
+            return snapshot.value(index)
+        return None
+
+    def read(self, key: str) -> Optional[Any]:
+        """Read a value by key from the replica, decoded like HPKVClient.read.
+
+        Raises:
+            ValueError: If the key is outside the replicated range
+        """
+        raw = self.read_raw(key)
+        return None if raw is None else self.value_codec.decode(raw)
+
+    def scan(self, start_key: str, end_key: str) -> Iterator[Dict[str, Any]]:
+        """Yield every {"key", "value"} record in [start_key, end_key], in key order."""
+        snapshot = self._current()
+        first = snapshot.bisect(start_key.encode('utf-8'))
+        last = snapshot.bisect(end_key.encode('utf-8'), right=True)
+        for key, value in snapshot.records(first, last):
+            yield {"key": key, "value": value}
+
+    def range_query(self, start_key: str, end_key: str, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Answer a range query from the replica, shaped like the `/records` response.
+
+        Without `limit` every record in the range is returned.
+        """
+        snapshot = self._current()
+        self.reads += 1
+        first = snapshot.bisect(start_key.encode('utf-8'))
+        last = snapshot.bisect(end_key.encode('utf-8'), right=True)
+        truncated = limit is not None and last - first > limit
+        if truncated:
+            last = first + limit
+        records = [{"key": key, "value": value} for key, value in snapshot.records(first, last)]
+        return {"records": records, "count": len(records), "truncated": truncated}
+
+    def __len__(self) -> int:
+        return self._current().count
+
+    def refresh(self, scan: RangeScan, start_key: Optional[str] = None,
+                end_key: Optional[str] = None) -> Dict[str, Any]:
+        """Re-fetch [start_key, end_key] (the whole replicated range by default) and swap in the result.
+
+        Records outside the refreshed sub-range are copied from the current
+        file as raw bytes, so a refresh costs the size of the sub-range in
+        Python work plus a sequential copy of the rest. If nothing changed,
+        the current file is kept.
+
+        Args:
+            scan: Fetches the records of a range, e.g. HPKVRangeQueriesExample.scan
+            start_key: First key to re-fetch (defaults to the start of the replicated range)
+            end_key: Last key to re-fetch (defaults to the end of the replicated range)
+
+        Returns:
+            Dict with the counts of records fetched, added, updated and removed, and
+            whether a new file was swapped in
+        """
+        low = max(start_key, self.start_key) if start_key is not None else self.start_key
+        high = min(end_key, self.end_key) if end_key is not None else self.end_key
+        if low > high:
+            raise ValueError("The refreshed range does not overlap the replicated range")
+
+        with self._refresh_lock:
+            old = self._snapshot
+            counts = {"fetched": 0, "added": 0, "updated": 0, "removed": 0}
+            if old is not None:
+                first = old.bisect(low.encode('utf-8'))
+                last = old.bisect(high.encode('utf-8'), right=True)
+            else:
+                first = last = 0
+
+            def fetched() -> Iterator[Tuple[str, str]]:
+                """The fresh records of [low, high], counting how they differ from the old ones."""
+                previous = iter(old.records(first, last)) if old is not None else iter(())
+                pending = next(previous, None)
+                for record in scan(low, high):
+                    key, value = record["key"], record["value"]
+                    if not low <= key <= high:
+                        continue
+                    if not isinstance(value, str):
+                        value = json.dumps(value)
+                    counts["fetched"] += 1
+                    while pending is not None and pending[0] < key:
+                        counts["removed"] += 1
+                        pending = next(previous, None)
+                    if pending is not None and pending[0] == key:
+                        if pending[1] != value:
+                            counts["updated"] += 1
+                        pending = next(previous, None)
+                    else:
+                        counts["added"] += 1
+                    yield key, value
+                while pending is not None:
+                    counts["removed"] += 1
+                    pending = next(previous, None)
+
+            temporary = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                # Records outside [low, high] are copied from the current file without decoding them
+                _write_snapshot(temporary, self.start_key, self.end_key, fetched(), old, first, last)
+                changed = old is None or counts["added"] or counts["updated"] or counts["removed"]
+                if changed:
+                    os.replace(temporary, self.path)
+            finally:
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+
+            if changed:
+                with self._lock:
+                    self._snapshot = _Snapshot(self.path)
+            self.refreshes += 1
+            counts["swapped"] = bool(changed)
+            return counts
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the snapshot size and counters."""
+        snapshot = self._snapshot
+        return {
+            "records": snapshot.count if snapshot else 0,
+            "bytes": snapshot.size if snapshot else 0,
+            "built_at": snapshot.built_at if snapshot else None,
+            "reads": self.reads,
+            "reloads": self.reloads,
+            "refreshes": self.refreshes
+        }
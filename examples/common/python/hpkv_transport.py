@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+
+import asyncio
+import json
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, Optional, Tuple, Union
+
+from hpkv_metrics import HPKVMetrics
+from hpkv_ratelimit import HPKVRateLimiter, THROTTLE_STATUSES, get_rate_limiter, retry_after_header
+
+Timeout = Union[float, Tuple[float, float]]
+
+# Default (connect, read) timeouts in seconds, applied when an operation has no override
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 10.0
+
+# Operations that leave the same state however many times they are applied.
+# Whole-value updates are too, but share the "update" name with partial ones,
+# so callers pass idempotent=True for them.
+IDEMPOTENT_OPERATIONS = frozenset(('create', 'read', 'delete', 'range'))
+
+
+def _is_idempotent(method: str, operation: Optional[str], idempotent: Optional[bool]) -> bool:
+    if idempotent is not None:
+        return idempotent
+    return method in ('GET', 'DELETE') or operation in IDEMPOTENT_OPERATIONS
+
+
+class HPKVTransport:
+    """Pooled keep-alive HTTP transport shared by the HPKV REST examples.
+
+    A single ``requests.Session`` is kept for the lifetime of the transport so
+    that TCP/TLS connections are reused between calls instead of being opened
+    for every request.
+    """
+
+    def __init__(self, base_url: str, api_key: str,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 10,
+                 pool_block: bool = False,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 timeouts: Optional[Dict[str, Timeout]] = None,
+                 metrics: Optional[HPKVMetrics] = None,
+                 rate_limiter: Optional[HPKVRateLimiter] = None):
+        """Initialize the transport.
+
+        Args:
+            base_url: HPKV server URL
+            api_key: HPKV API key, sent as the ``x-api-key`` header
+            pool_connections: Number of host pools to cache
+            pool_maxsize: Maximum number of keep-alive connections per host
+            pool_block: Block when the pool is exhausted instead of opening extra connections
+            connect_timeout: Default connect timeout in seconds
+            read_timeout: Default read timeout in seconds
+            timeouts: Per-operation overrides, e.g. ``{"read": (1, 2), "range": (3, 30)}``
+            metrics: Collects latency, bytes and status counts per operation (optional)
+            rate_limiter: Paces requests and retries throttled ones; may be shared (defaults to the shared one from ``get_rate_limiter``)
+        """
+        if not base_url:
+            raise ValueError("HPKV base URL not provided.")
+        if not api_key:
+            raise ValueError("HPKV API key not provided.")
+
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.default_timeout = (connect_timeout, read_timeout)
+        self.timeouts = dict(timeouts or {})
+        self.metrics = metrics
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'Content-Type': 'application/json',
+            'Connection': 'keep-alive',
+            'x-api-key': api_key
+        })
+
+    def _timeout_for(self, operation: Optional[str]) -> Timeout:
+        """Resolve the timeout to use for an operation."""
+        if operation and operation in self.timeouts:
+            return self.timeouts[operation]
+        return self.default_timeout
+
+    def request(self, method: str, path: str, operation: Optional[str] = None,
+                timeout: Optional[Timeout] = None, idempotent: Optional[bool] = None,
+                **kwargs: Any) -> requests.Response:
+        """Send a request over the pooled session.
+
+        With a rate limiter, the request first waits for a token, and a
+        429/503 response is reported to the limiter and resent after a
+        jittered delay while its retry policy allows; the last response is
+        returned either way.
+
+        Args:
+            method: HTTP method
+            path: Path relative to the base URL, e.g. ``/record``
+            operation: Logical operation name used to pick a timeout
+            timeout: Explicit timeout, overriding the per-operation one
+            idempotent: Whether resending is safe after a 503 (defaults from method and operation)
+            **kwargs: Passed through to ``requests.Session.request``
+
+        Returns:
+            requests.Response: Response from the API
+        """
+        if self.session is None:
+            raise RuntimeError("HPKV transport is closed")
+        url = f"{self.base_url}{path}"
+        timeout = timeout if timeout is not None else self._timeout_for(operation)
+        limiter = self.rate_limiter
+        if limiter is None:
+            return self._send(method, url, operation, timeout, kwargs)
+
+        idempotent = _is_idempotent(method, operation, idempotent)
+        attempt = 0
+        while True:
+            limiter.acquire()
+            response = self._send(method, url, operation, timeout, kwargs)
+            if response.status_code not in THROTTLE_STATUSES:
+                limiter.on_success()
+                return response
+            limiter.on_throttle(retry_after_header(response.headers))
+            if not limiter.should_retry(response.status_code, attempt, idempotent):
+                return response
+            time.sleep(limiter.backoff(attempt))
+            attempt += 1
+
+    def _send(self, method: str, url: str, operation: Optional[str], timeout: Timeout,
+              kwargs: Dict[str, Any]) -> requests.Response:
+        """Send one request, recording it in the metrics if enabled."""
+        if self.metrics is None:
+            return self.session.request(method, url, timeout=timeout, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=timeout, **kwargs)
+        except Exception as e:
+            self.metrics.observe(operation or method, time.perf_counter() - start, error=e)
+            raise
+        self.metrics.observe(
+            operation or method,
+            time.perf_counter() - start,
+            status=response.status_code,
+            bytes_out=len(response.request.body or b''),
+            bytes_in=len(response.content)
+        )
+        return response
+
+    def get(self, path: str, operation: Optional[str] = None, **kwargs: Any) -> requests.Response:
+        return self.request('GET', path, operation, **kwargs)
+
+    def post(self, path: str, operation: Optional[str] = None, **kwargs: Any) -> requests.Response:
+        return self.request('POST', path, operation, **kwargs)
+
+    def delete(self, path: str, operation: Optional[str] = None, **kwargs: Any) -> requests.Response:
+        return self.request('DELETE', path, operation, **kwargs)
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    def __enter__(self) -> 'HPKVTransport':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def _body_size(kwargs: Dict[str, Any]) -> int:
+    """Approximate size of the body aiohttp will send for these request kwargs."""
+    if kwargs.get('json') is not None:
+        return len(json.dumps(kwargs['json']))
+    data = kwargs.get('data')
+    return len(data) if isinstance(data, (bytes, str)) else 0
+
+
+class HPKVResponse:
+    """Buffered response returned by AsyncHPKVTransport.
+
+    Exposes the subset of ``requests.Response`` the examples rely on so the
+    sync and async clients can share the same response handling.
+    """
+
+    __slots__ = ('status_code', 'text', 'headers')
+
+    def __init__(self, status_code: int, text: str, headers: Optional[Dict[str, str]] = None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def json(self) -> Any:
+        return json.loads(self.text)
+
+
+class AsyncHPKVTransport:
+    """Pooled keep-alive asyncio HTTP transport built on aiohttp.
+
+    A semaphore bounds the number of requests in flight so a single event
+    loop can issue thousands of operations without exhausting sockets.
+    aiohttp is imported on first use, so sync-only callers don't need it.
+    """
+
+    def __init__(self, base_url: str, api_key: str,
+                 pool_maxsize: int = 100,
+                 max_in_flight: int = 100,
+                 keepalive_timeout: float = 30.0,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 timeouts: Optional[Dict[str, Timeout]] = None,
+                 metrics: Optional[HPKVMetrics] = None,
+                 rate_limiter: Optional[HPKVRateLimiter] = None):
+        """Initialize the transport.
+
+        Args:
+            base_url: HPKV server URL
+            api_key: HPKV API key, sent as the ``x-api-key`` header
+            pool_maxsize: Maximum number of open connections (0 for unlimited)
+            max_in_flight: Maximum number of concurrent requests
+            keepalive_timeout: Seconds an idle connection is kept open
+            connect_timeout: Default connect timeout in seconds
+            read_timeout: Default read timeout in seconds
+            timeouts: Per-operation overrides, e.g. ``{"read": (1, 2), "range": (3, 30)}``
+            metrics: Collects latency, bytes and status counts per operation (optional)
+            rate_limiter: Paces requests and retries throttled ones; may be shared (defaults to the shared one from ``get_rate_limiter``)
+        """
+        if not base_url:
+            raise ValueError("HPKV base URL not provided.")
+        if not api_key:
+            raise ValueError("HPKV API key not provided.")
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.pool_maxsize = pool_maxsize
+        self.max_in_flight = max_in_flight
+        self.keepalive_timeout = keepalive_timeout
+        self.default_timeout = (connect_timeout, read_timeout)
+        self.timeouts = dict(timeouts or {})
+        self.metrics = metrics
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
+
+        self.session = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._closed = False
+
+    def _timeout_for(self, operation: Optional[str]) -> Timeout:
+        """Resolve the timeout to use for an operation."""
+        if operation and operation in self.timeouts:
+            return self.timeouts[operation]
+        return self.default_timeout
+
+    def _get_session(self):
+        """Create the aiohttp session on first use, inside the running loop."""
+        if self._closed:
+            raise RuntimeError("HPKV transport is closed")
+        if self.session is None:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_maxsize,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                headers={
+                    'Content-Type': 'application/json',
+                    'x-api-key': self.api_key
+                }
+            )
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self.session
+
+    async def request(self, method: str, path: str, operation: Optional[str] = None,
+                      timeout: Optional[Timeout] = None, idempotent: Optional[bool] = None,
+                      **kwargs: Any) -> HPKVResponse:
+        """Send a request over the pooled session.
+
+        With a rate limiter, throttled requests are paced and resent as
+        described in ``HPKVTransport.request``.
+
+        Args:
+            method: HTTP method
+            path: Path relative to the base URL, e.g. ``/record``
+            operation: Logical operation name used to pick a timeout
+            timeout: Explicit timeout, overriding the per-operation one
+            idempotent: Whether resending is safe after a 503 (defaults from method and operation)
+            **kwargs: Passed through to ``aiohttp.ClientSession.request``
+
+        Returns:
+            HPKVResponse: Fully read response from the API
+        """
+        import aiohttp
+
+        session = self._get_session()
+        timeout = timeout if timeout is not None else self._timeout_for(operation)
+        if isinstance(timeout, tuple):
+            client_timeout = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        else:
+            client_timeout = aiohttp.ClientTimeout(total=timeout)
+        limiter = self.rate_limiter
+        if limiter is None:
+            return await self._send(session, method, path, operation, client_timeout, kwargs)
+
+        idempotent = _is_idempotent(method, operation, idempotent)
+        attempt = 0
+        while True:
+            await limiter.acquire_async()
+            response = await self._send(session, method, path, operation, client_timeout, kwargs)
+            if response.status_code not in THROTTLE_STATUSES:
+                limiter.on_success()
+                return response
+            limiter.on_throttle(retry_after_header(response.headers))
+            if not limiter.should_retry(response.status_code, attempt, idempotent):
+                return response
+            await asyncio.sleep(limiter.backoff(attempt))
+            attempt += 1
+
+    async def _send(self, session, method: str, path: str, operation: Optional[str],
+                    client_timeout, kwargs: Dict[str, Any]) -> HPKVResponse:
+        """Send one request within the in-flight bound, recording it in the metrics if enabled."""
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                async with session.request(method, f"{self.base_url}{path}",
+                                           timeout=client_timeout, **kwargs) as response:
+                    body = await response.read()
+                    result = HPKVResponse(response.status, body.decode(response.charset or 'utf-8'),
+                                          dict(response.headers))
+            except Exception as e:
+                if self.metrics is not None:
+                    self.metrics.observe(operation or method, time.perf_counter() - start, error=e)
+                raise
+            if self.metrics is not None:
+                self.metrics.observe(
+                    operation or method,
+                    time.perf_counter() - start,
+                    status=result.status_code,
+                    bytes_out=_body_size(kwargs),
+                    bytes_in=len(body)
+                )
+            return result
+
+    async def get(self, path: str, operation: Optional[str] = None, **kwargs: Any) -> HPKVResponse:
+        return await self.request('GET', path, operation, **kwargs)
+
+    async def post(self, path: str, operation: Optional[str] = None, **kwargs: Any) -> HPKVResponse:
+        return await self.request('POST', path, operation, **kwargs)
+
+    async def delete(self, path: str, operation: Optional[str] = None, **kwargs: Any) -> HPKVResponse:
+        return await self.request('DELETE', path, operation, **kwargs)
+
+    async def close(self) -> None:
+        """Close all pooled connections."""
+        self._closed = True
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self) -> 'AsyncHPKVTransport':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from hpkv_batch import DEFAULT_MAX_WORKERS, run_batch
+
+# Sends one logged write to HPKV: sender(op, key, value, partial) -> True once applied
+Sender = Callable[[str, str, Optional[str], bool], bool]
+
+
+class _LogEntry:
+    """A pending write, possibly with later writes to the same key folded in."""
+
+    __slots__ = ('seq', 'op', 'key', 'value', 'partial', 'attempts', 'in_flight')
+
+    def __init__(self, seq: int, op: str, key: str, value: Optional[str], partial: bool):
+        self.seq = seq
+        self.op = op
+        self.key = key
+        self.value = value
+        self.partial = partial
+        self.attempts = 0
+        self.in_flight = False
+
+    def to_record(self) -> Dict[str, Any]:
+        return {"seq": self.seq, "op": self.op, "key": self.key, "value": self.value, "partial": self.partial}
+
+
+def _merge_objects(current: Optional[str], update: Optional[str]) -> Optional[str]:
+    """Merge two serialized JSON objects field by field, or None if either isn't one."""
+    try:
+        current_doc = json.loads(current)
+        update_doc = json.loads(update)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(current_doc, dict) or not isinstance(update_doc, dict):
+        return None
+    current_doc.update(update_doc)
+    return json.dumps(current_doc)
+
+
+class HPKVWriteLog:
+    """Durable local write-ahead log for HPKVClient writes.
+
+    Writes are appended to an append-only file and acknowledged as soon as
+    they are on disk, so callers don't wait on HPKV. A background thread
+    replays the log to HPKV in batches: keys are sent in parallel, and the
+    writes to one key are sent one after another in the order they were
+    made. A write that fails stays in the log, and its key is retried with
+    exponential backoff while other keys carry on.
+
+    Only the latest pending write per key is kept: a full write or delete
+    replaces the writes still waiting for that key, and a partial update of
+    a JSON object is merged into the pending value. Writes already being
+    sent are never changed.
+
+    Each line of the file is a CRC-checked record. Opening a log replays it
+    and recovers the writes that were not yet confirmed, dropping a torn
+    last line left by a crash. Confirmations are appended as `done` records,
+    and the file is rewritten with only the pending writes (compacted) once
+    it has grown past `compact_bytes`.
+
+    Delivery is at-least-once: a write sent just before a crash may be sent
+    again after recovery.
+    """
+
+    def __init__(self, path: str, fsync: bool = True, flush_interval: float = 0.1, batch_size: int = 500,
+                 max_workers: int = DEFAULT_MAX_WORKERS, compact_bytes: int = 4 * 1024 * 1024,
+                 retry_initial_delay: float = 0.5, retry_max_delay: float = 30.0,
+                 max_attempts: Optional[int] = None):
+        """Open (or create) the log and recover the writes pending in it.
+
+        Args:
+            path: Log file; `path + '.tmp'` is used while compacting
+            fsync: Sync every append to disk before acknowledging it (otherwise
+                writes survive a process crash but not a power loss)
+            flush_interval: Seconds between replays to HPKV
+            batch_size: Keys sent per replay round; this many pending keys also trigger an early replay
+            max_workers: Keys sent in parallel
+            compact_bytes: Compact once the file has grown past this size
+            retry_initial_delay: Seconds before retrying a key whose write failed
+            retry_max_delay: Cap in seconds on the exponentially growing retry delay
+            max_attempts: Drop a write after this many failed sends (None retries forever)
+        """
+        if flush_interval <= 0:
+            raise ValueError("flush_interval must be positive")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.path = path
+        self.fsync = fsync
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.compact_bytes = compact_bytes
+        self.retry_initial_delay = retry_initial_delay
+        self.retry_max_delay = retry_max_delay
+        self.max_attempts = max_attempts
+
+        # key -> pending writes, oldest first; only the first ones can be in flight
+        self._queues: Dict[str, List[_LogEntry]] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        # Serializes replays, so the writes to a key are never reordered
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._sender: Optional[Sender] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._file = None
+
+        self.appended = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.failures = 0
+        self.dropped = 0
+        self.recovered = 0
+        self.compactions = 0
+
+        self._recover()
+        self._compacted_size = 0
+        self._compact()
+
+    def _recover(self) -> None:
+        """Rebuild the pending writes from the file, cutting off a torn last record."""
+        if not os.path.exists(self.path):
+            return
+        valid_end = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                record = self._decode_record(line)
+                if record is None:
+                    print(f"Write log {self.path}: ignoring a damaged record at byte {valid_end} and everything after it",
+                          file=sys.stderr)
+                    break
+                valid_end += len(line)
+                if 'done' in record:
+                    self._confirm(record['key'], record['done'])
+                else:
+                    self._seq = max(self._seq, record['seq'])
+                    self._add(_LogEntry(record['seq'], record['op'], record['key'],
+                                        record['value'], record['partial']))
+        self.recovered = self.pending
+        if self.recovered:
+            print(f"Write log {self.path}: recovered {self.recovered} pending write(s)", file=sys.stderr)
+
+    @staticmethod
+    def _encode_record(record: Dict[str, Any]) -> bytes:
+        body = json.dumps(record).encode('utf-8')
+        return b'%08x %s\n' % (zlib.crc32(body), body)
+
+    @staticmethod
+    def _decode_record(line: bytes) -> Optional[Dict[str, Any]]:
+        """Parse one line, or return None if it is incomplete or fails its checksum."""
+        if not line.endswith(b'\n') or len(line) < 10:
+            return None
+        checksum, body = line[:8], line[9:-1]
+        try:
+            if int(checksum, 16) != zlib.crc32(body):
+                return None
+            return json.loads(body)
+        except ValueError:
+            return None
+
+    def _write(self, data: bytes, sync: bool) -> None:
+        """Append records to the file; the lock must be held."""
+        self._file.write(data)
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def _add(self, entry: _LogEntry) -> None:
+        """Queue a write behind the pending writes of its key, folding it in where possible; the lock must be held."""
+        queue = self._queues.setdefault(entry.key, [])
+        waiting = [e for e in queue if not e.in_flight]
+        if entry.op == 'delete' or not entry.partial:
+            # A full write or delete makes the writes still waiting for the key irrelevant
+            if waiting:
+                self.coalesced += len(waiting)
+                queue[:] = [e for e in queue if e.in_flight]
+        elif waiting and waiting[-1].op != 'delete':
+            last = waiting[-1]
+            merged = _merge_objects(last.value, entry.value)
+            if merged is not None:
+                last.value = merged
+                last.seq = entry.seq
+                self.coalesced += 1
+                return
+        queue.append(entry)
+
+    def _confirm(self, key: str, seq: int) -> None:
+        """Forget the writes to `key` up to `seq`, which HPKV has applied; the lock must be held."""
+        queue = self._queues.get(key)
+        if queue is None:
+            return
+        queue[:] = [e for e in queue if e.seq > seq]
+        if not queue:
+            del self._queues[key]
+            self._retry_at.pop(key, None)
+
+    def start(self, sender: Sender) -> None:
+        """Start replaying the log through `sender` (HPKVClient does this when given the log)."""
+        with self._lock:
+            if self._thread is not None:
+                raise RuntimeError("HPKVWriteLog is already started")
+            self._sender = sender
+            self._thread = threading.Thread(target=self._run, name="hpkv-write-log", daemon=True)
+            self._thread.start()
+
+    def append(self, op: str, key: str, value: Optional[str] = None, partial: bool = False) -> int:
+        """Log a write; it is durable when this returns.
+
+        Args:
+            op: 'create', 'update' or 'delete'
+            key: Key written
+            value: Serialized value (None for a delete)
+            partial: Whether `value` is merged into the stored JSON object
+
+        Returns:
+            int: Sequence number of the write
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("HPKVWriteLog is closed")
+            self._seq += 1
+            entry = _LogEntry(self._seq, op, key, value, partial)
+            self._write(self._encode_record(entry.to_record()), self.fsync)
+            self._add(entry)
+            self.appended += 1
+            if len(self._queues) >= self.batch_size:
+                self._wakeup.set()
+            return entry.seq
+
+    def pending_writes(self, key: str) -> List[Tuple[str, Optional[str], bool]]:
+        """The writes to `key` not yet applied by HPKV, oldest first, as (op, value, partial)."""
+        with self._lock:
+            return [(e.op, e.value, e.partial) for e in self._queues.get(key, ())]
+
+    @property
+    def pending(self) -> int:
+        """Number of writes not yet applied by HPKV."""
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def _send_key(self, work: Tuple[str, List[_LogEntry]]) -> List[_LogEntry]:
+        """Send the writes to one key in order, stopping at the first failure; returns those applied."""
+        key, entries = work
+        applied = []
+        for entry in entries:
+            try:
+                ok = self._sender(entry.op, key, entry.value, entry.partial)
+            except Exception as e:
+                print(f"Error replaying write to '{key}': {str(e)}", file=sys.stderr)
+                ok = False
+            if not ok:
+                break
+            applied.append(entry)
+        return applied
+
+    def _replay_round(self) -> int:
+        """Send the writes of up to batch_size keys that are due; returns the number of keys taken."""
+        now = time.monotonic()
+        work: List[Tuple[str, List[_LogEntry]]] = []
+        with self._lock:
+            for key, queue in self._queues.items():
+                if len(work) >= self.batch_size:
+                    break
+                if self._retry_at.get(key, 0.0) > now or queue[0].in_flight:
+                    continue
+                for entry in queue:
+                    entry.in_flight = True
+                work.append((key, list(queue)))
+        if not work:
+            return 0
+
+        results = run_batch(self._send_key, work, key_of=lambda item: item[0],
+                            max_workers=min(self.max_workers, len(work)))
+        applied = {result.key: result.value for result in results}
+
+        with self._lock:
+            confirmations = []
+            for key, entries in work:
+                done = applied.get(key) or []
+                for entry in entries:
+                    entry.in_flight = False
+                if done:
+                    self.sent += len(done)
+                    confirmations.append(self._encode_record({"done": done[-1].seq, "key": key}))
+                if len(done) < len(entries):
+                    self._failed(key, entries[len(done)], now, confirmations)
+                if done:
+                    self._confirm(key, done[-1].seq)
+            if confirmations:
+                # Not synced: losing a confirmation only means the write is sent again
+                self._write(b''.join(confirmations), False)
+        return len(work)
+
+    def _failed(self, key: str, entry: _LogEntry, now: float, confirmations: List[bytes]) -> None:
+        """Schedule a retry of a key whose write failed, or drop the write; the lock must be held."""
+        entry.attempts += 1
+        self.failures += 1
+        if self.max_attempts is not None and entry.attempts >= self.max_attempts:
+            print(f"Dropping {entry.op} of '{key}' after {entry.attempts} failed attempts", file=sys.stderr)
+            self.dropped += 1
+            confirmations.append(self._encode_record({"done": entry.seq, "key": key}))
+            self._confirm(key, entry.seq)
+            return
+        delay = min(self.retry_max_delay, self.retry_initial_delay * (2 ** (entry.attempts - 1)))
+        self._retry_at[key] = now + delay
+
+    def flush(self) -> int:
+        """Replay every pending write that is due now, in rounds of batch_size keys.
+
+        Keys waiting to retry a failed write are skipped until their delay
+        has passed.
+
+        Returns:
+            int: Number of writes still pending afterwards
+        """
+        if self._sender is None:
+            raise RuntimeError("HPKVWriteLog is not started")
+        with self._flush_lock:
+            while self._replay_round():
+                pass
+            with self._lock:
+                size = self._file.tell()
+                if size > self.compact_bytes and size > 2 * self._compacted_size:
+                    self._compact_locked()
+        return self.pending
+
+    def _compact(self) -> None:
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        """Rewrite the file with only the pending writes and swap it in atomically; the lock must be held."""
+        entries = sorted((e for queue in self._queues.values() for e in queue), key=lambda e: e.seq)
+        temporary = self.path + '.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(b''.join(self._encode_record(e.to_record()) for e in entries))
+            f.flush()
+            os.fsync(f.fileno())
+        if self._file is not None:
+            self._file.close()
+        os.replace(temporary, self.path)
+        if hasattr(os, 'O_DIRECTORY'):
+            # Make the rename itself durable
+            directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+        self._file = open(self.path, 'ab')
+        self._compacted_size = self._file.tell()
+        self.compactions += 1
+
+    def _run(self) -> None:
+        """Replay thread: replay on every interval or when batch_size keys are pending."""
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error replaying write log: {str(e)}", file=sys.stderr)
+
+    def close(self) -> None:
+        """Stop the replay thread after one last replay attempt and compact the file.
+
+        Writes that could not be sent stay in the file and are recovered
+        the next time it is opened.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._thread is not None:
+            self._wakeup.set()
+            self._thread.join()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error replaying write log: {str(e)}", file=sys.stderr)
+        with self._lock:
+            self._compact_locked()
+            self._file.close()
+
+    def stats(self) -> Dict[str, int]:
+        """Return the pending count and counters."""
+        pending = self.pending
+        with self._lock:
+            return {
+                "pending": pending,
+                "appended": self.appended,
+                "coalesced": self.coalesced,
+                "sent": self.sent,
+                "failures": self.failures,
+                "dropped": self.dropped,
+                "recovered": self.recovered,
+                "compactions": self.compactions
+            }
+
+    def __enter__(self) -> 'HPKVWriteLog':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -1,48 +1,168 @@
 import os
-import requests
+import sys
 from dotenv import load_dotenv
 import json
-from typing import Dict, Any, Optional
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Shared helpers live in examples/common/python
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common', 'python'))
+from hpkv_transport import HPKVTransport
+from hpkv_batch import DEFAULT_MAX_WORKERS, run_batch
+from hpkv_records import RangeRecord, column, to_records, where
+from hpkv_range_cache import HPKVRangeCache
+from hpkv_replica import HPKVRangeReplica
 
 # Load environment variables
 load_dotenv()
 
+# Split keys are interpolated over printable ASCII; digit 0 stands for "no character"
+_KEY_CHAR_MIN, _KEY_CHAR_MAX = 0x20, 0x7e
+_KEY_BASE = _KEY_CHAR_MAX - _KEY_CHAR_MIN + 2
+_KEY_DEPTH = 8
+
+def _key_to_number(suffix: str) -> int:
+    """Map the first _KEY_DEPTH characters of a key suffix to an integer that sorts like the key."""
+    number = 0
+    for i in range(_KEY_DEPTH):
+        digit = 0
+        if i < len(suffix):
+            digit = min(max(ord(suffix[i]), _KEY_CHAR_MIN), _KEY_CHAR_MAX) - _KEY_CHAR_MIN + 1
+        number = number * _KEY_BASE + digit
+    return number
+
+def _number_to_key(number: int) -> str:
+    """Inverse of _key_to_number (up to clamping), dropping trailing empty characters."""
+    digits = []
+    for _ in range(_KEY_DEPTH):
+        number, digit = divmod(number, _KEY_BASE)
+        digits.append(digit)
+    chars = [chr(_KEY_CHAR_MIN + max(digit, 1) - 1) for digit in reversed(digits)]
+    while digits and digits[0] == 0:
+        digits.pop(0)
+        chars.pop()
+    return "".join(chars)
+
+def interpolate_keys(start_key: str, end_key: str, parts: int) -> List[str]:
+    """
+    Evenly spaced keys strictly between start_key and end_key.
+    
+    Keys are treated as numbers after their common prefix, so the result
+    splits the key space evenly, not the records in it.
+    
+    Args:
+        start_key: Lower bound of the range
+        end_key: Upper bound of the range
+        parts: Number of sub-ranges wanted (returns up to parts - 1 keys)
+        
+    Returns:
+        Sorted, distinct split keys
+    """
+    prefix = os.path.commonprefix([start_key, end_key])
+    low = _key_to_number(start_key[len(prefix):])
+    high = _key_to_number(end_key[len(prefix):])
+    keys = {prefix + _number_to_key(low + (high - low) * i // parts) for i in range(1, parts)}
+    return sorted(key for key in keys if start_key < key < end_key)
+
+# Appended to a prefix to get an end key past every key that starts with it: the highest
+# code point, so keys with astral-plane characters (above U+FFFF) after the prefix are included
+_PREFIX_END = '\U0010ffff'
+
+# Marks the end of one partition's records in a parallel scan queue
+_PARTITION_DONE = object()
+
+class _PartitionError:
+    """Carries an exception raised while scanning a partition to the consumer."""
+    
+    __slots__ = ('error',)
+    
+    def __init__(self, error: BaseException):
+        self.error = error
+
 class HPKVRangeQueriesExample:
-    def __init__(self):
+    def __init__(self, transport: Optional[HPKVTransport] = None, range_cache: Optional[HPKVRangeCache] = None,
+                 replica: Optional[HPKVRangeReplica] = None, **transport_options: Any):
+        """
+        Initialize the example.
+        
+        Args:
+            transport: Shared transport to use (optional, one is created and owned otherwise)
+            range_cache: Cache answering range queries from previously fetched intervals (optional)
+            replica: Local memory-mapped copy of a key range; queries inside it never reach the server (optional)
+            **transport_options: Pool size and timeout options for the owned transport
+        """
         self.api_key = os.getenv("HPKV_API_KEY")
         self.base_url = os.getenv("HPKV_API_BASE_URL")
-        if not self.api_key or not self.base_url:
+        if transport is None and (not self.api_key or not self.base_url):
             raise ValueError("Please set HPKV_API_KEY and HPKV_API_BASE_URL in your .env file")
+        self._owns_transport = transport is None
+        self.transport = transport or HPKVTransport(self.base_url, self.api_key, **transport_options)
+        self.range_cache = range_cache
+        self.replica = replica
+
+    def close(self) -> None:
+        """Release pooled connections if the transport is owned by this example."""
+        if self._owns_transport:
+            self.transport.close()
 
-    def _get_headers(self) -> Dict[str, str]:
-        """Get headers for API requests."""
-        return {
-            "x-api-key": self.api_key
+    def __enter__(self) -> "HPKVRangeQueriesExample":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _create_user(self, i: int) -> None:
+        """Create a single sample user record."""
+        user_data = {
+            "name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "age": 20 + i,
+            "city": "New York" if i % 2 == 0 else "San Francisco"
         }
+        
+        payload = {
+            "key": f"user:{i}",
+            "value": json.dumps(user_data)
+        }
+        
+        try:
+            response = self.transport.post("/record", "create", json=payload)
+            response.raise_for_status()
+        finally:
+            self._invalidate(payload["key"])
 
-    def create_sample_records(self) -> None:
-        """Create sample records for demonstration."""
-        # Create some sample user records with sequential IDs
-        for i in range(1, 11):
-            user_data = {
-                "name": f"User {i}",
-                "email": f"user{i}@example.com",
-                "age": 20 + i,
-                "city": "New York" if i % 2 == 0 else "San Francisco"
-            }
-            
-            payload = {
-                "key": f"user:{i}",
-                "value": json.dumps(user_data)
-            }
-            
-            response = requests.post(
-                f"{self.base_url}/record",
-                headers=self._get_headers(),
-                json=payload
-            )
+    def _delete_user(self, i: int) -> None:
+        """Delete a single sample user record."""
+        try:
+            response = self.transport.delete(f"/record/user:{i}", "delete")
             response.raise_for_status()
-            print(f"Created record for user:{i}")
+        finally:
+            self._invalidate(f"user:{i}")
+
+    def _invalidate(self, key: str) -> None:
+        """Drop cached range results covering a key after writing it."""
+        if self.range_cache is not None:
+            self.range_cache.invalidate(key)
+
+    def _run_batch(self, operation, ids: Iterable[int], action: str, max_workers: int) -> None:
+        """Run `operation` for each id in parallel and raise once if any failed."""
+        failed = []
+        for result in run_batch(operation, ids, key_of=lambda i: f"user:{i}", max_workers=max_workers):
+            if result.ok:
+                print(f"{action} record for {result.key}")
+            else:
+                failed.append(result.key)
+                print(f"Error for {result.key}: {result.error}")
+        if failed:
+            raise RuntimeError(f"{len(failed)} record(s) failed: {', '.join(sorted(failed))}")
+
+    def create_sample_records(self, count: int = 10, max_workers: int = DEFAULT_MAX_WORKERS) -> None:
+        """Create sample records for demonstration, in parallel."""
+        # Create some sample user records with sequential IDs
+        self._run_batch(self._create_user, range(1, count + 1), "Created", max_workers)
 
     def perform_range_query(self, start_key: str, end_key: str, limit: Optional[int] = None) -> Dict[str, Any]:
         """
@@ -56,6 +176,20 @@ class HPKVRangeQueriesExample:
         Returns:
             Dictionary containing the response data
         """
+        if self.replica is not None and self.replica.covers(start_key, end_key):
+            return self.replica.range_query(start_key, end_key, limit)
+        if self.range_cache is not None:
+            return self.range_cache.query(start_key, end_key, limit, self._fetch_range)
+        return self._query_server(start_key, end_key, limit)
+
+    def _fetch_range(self, start_key: str, end_key: str, limit: Optional[int]) -> Tuple[List[Dict[str, Any]], bool]:
+        """Uncached range query returning (records, truncated), used by the range cache to fill gaps."""
+        result = self._query_server(start_key, end_key, limit)
+        records = result.get("records", [])
+        return records, result.get("truncated", limit is not None and len(records) >= limit)
+
+    def _query_server(self, start_key: str, end_key: str, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Send a range query to the server."""
         params = {
             "startKey": start_key,
             "endKey": end_key
@@ -64,24 +198,345 @@ class HPKVRangeQueriesExample:
         if limit is not None:
             params["limit"] = limit
 
-        response = requests.get(
-            f"{self.base_url}/records",
-            headers=self._get_headers(),
-            params=params
-        )
+        response = self.transport.get("/records", "range", params=params)
         response.raise_for_status()
         
         return response.json()
 
-    def cleanup_records(self) -> None:
-        """Clean up the sample records."""
-        for i in range(1, 11):
-            response = requests.delete(
-                f"{self.base_url}/record/user:{i}",
-                headers=self._get_headers()
-            )
-            response.raise_for_status()
-            print(f"Deleted record for user:{i}")
+    def query_records(self, start_key: str, end_key: str, limit: Optional[int] = None) -> List[RangeRecord]:
+        """
+        Perform a range query and return its records as lazily decoded RangeRecords.
+        
+        Args:
+            start_key: Starting key for the range (inclusive)
+            end_key: Ending key for the range (inclusive)
+            limit: Maximum number of records to return (optional)
+            
+        Returns:
+            List of RangeRecord, in key order
+        """
+        return to_records(self.perform_range_query(start_key, end_key, limit).get("records", []))
+
+    def refresh_replica(self, start_key: Optional[str] = None, end_key: Optional[str] = None,
+                        page_size: int = 1000) -> Dict[str, Any]:
+        """
+        Re-fetch the replica's range (or a sub-range of it) from the server and swap in the result.
+        
+        Args:
+            start_key: First key to re-fetch (defaults to the start of the replicated range)
+            end_key: Last key to re-fetch (defaults to the end of the replicated range)
+            page_size: Records requested per range query
+            
+        Returns:
+            Dict with the counts of records fetched, added, updated and removed, and whether
+            a new file was swapped in
+        """
+        if self.replica is None:
+            raise ValueError("No replica configured")
+        # A plain example on the same transport reads from the server, not from the replica or cache
+        server = HPKVRangeQueriesExample(transport=self.transport)
+        return self.replica.refresh(lambda start, end: server.scan(start, end, page_size=page_size),
+                                    start_key, end_key)
+
+    def _fetch_page(self, start_key: str, end_key: str, limit: int, skip_key: Optional[str]) -> Dict[str, Any]:
+        """Fetch one page of a scan, dropping `skip_key` (the last key of the previous page)."""
+        result = self.perform_range_query(start_key, end_key, limit=limit)
+        records = result.get("records", [])
+        # Without a truncated flag, a full page means there may be more
+        truncated = result.get("truncated", len(records) >= limit)
+        next_key = records[-1]["key"] if records else None
+        if records and records[0]["key"] == skip_key:
+            records = records[1:]
+        return {"records": records, "truncated": truncated, "next_key": next_key}
+
+    def scan(self, start_key: str, end_key: str, page_size: int = 100,
+             prefetch: bool = True, as_records: bool = False) -> Iterator[Any]:
+        """
+        Iterate over every record in a key range, page by page.
+        
+        Each page continues from the last key of the previous one, so ranges
+        of any size can be scanned. With `prefetch`, the next page is fetched
+        in a background thread while the caller works through the current
+        one. At most two pages are held at a time, so memory stays constant
+        however large the range is.
+        
+        Args:
+            start_key: Starting key for the range (inclusive)
+            end_key: Ending key for the range (inclusive)
+            page_size: Records requested per range query
+            prefetch: Fetch the next page while the current one is being consumed
+            as_records: Yield lazily decoded RangeRecords instead of dicts
+            
+        Yields:
+            Each record dict (with "key" and "value"), or RangeRecord, in key order
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        
+        def fetch(key: str, skip_key: Optional[str]) -> Dict[str, Any]:
+            # Continuation pages start at the previous last key, so ask for one extra record
+            limit = page_size if skip_key is None else page_size + 1
+            return self._fetch_page(key, end_key, limit, skip_key)
+        
+        key, skip_key = start_key, None
+        pending: Optional[Future] = executor.submit(fetch, key, skip_key) if executor else None
+        try:
+            while True:
+                page = pending.result() if executor else fetch(key, skip_key)
+                pending = None
+                more = page["truncated"] and page["next_key"] is not None
+                if more:
+                    key = skip_key = page["next_key"]
+                    if executor:
+                        # Fetch the next page while the caller works through this one
+                        pending = executor.submit(fetch, key, skip_key)
+                yield from to_records(page["records"]) if as_records else page["records"]
+                if not more:
+                    return
+        finally:
+            if pending is not None:
+                pending.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def sample_split_points(self, start_key: str, end_key: str, partitions: int,
+                            probes_per_partition: int = 4, sample_size: int = 20,
+                            refine_rounds: int = 4, max_probes: int = 256,
+                            max_workers: int = DEFAULT_MAX_WORKERS) -> List[str]:
+        """
+        Choose split points that divide a range into partitions of similar size.
+        
+        The range is cut into `partitions * probes_per_partition` evenly spaced
+        slices of the key space, and each slice is probed concurrently with a
+        range query limited to `sample_size` records. Slices that come back
+        full are cut again and re-probed, up to `refine_rounds` times or
+        `max_probes` probes in total, so dense parts of the range end up
+        sampled finely. Split points are then placed so every partition
+        covers about the same number of sampled records; slices still full
+        after refining count as `sample_size`, so balance is approximate.
+        The sampled records are counted but not kept.
+        
+        Args:
+            start_key: Starting key for the range (inclusive)
+            end_key: Ending key for the range (inclusive)
+            partitions: Number of partitions wanted
+            probes_per_partition: Slices probed per partition, and pieces a heavy slice is cut into
+            sample_size: Record limit of each probe
+            refine_rounds: Times full slices are cut and re-probed
+            max_probes: Maximum number of probes across all rounds
+            max_workers: Probes in flight at once
+            
+        Returns:
+            Sorted split points (at most partitions - 1)
+        """
+        if partitions <= 1:
+            return []
+        
+        def probe(bounds: Tuple[str, str]) -> int:
+            low, high = bounds
+            records = self.perform_range_query(low, high, limit=sample_size).get("records", [])
+            return len(records)
+        
+        def weigh(slices: List[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+            weights = {}
+            for result in run_batch(probe, slices, max_workers=max_workers):
+                if not result.ok:
+                    raise result.error
+                weights[result.key] = result.value
+            return weights
+        
+        bounds = [start_key] + interpolate_keys(start_key, end_key, partitions * probes_per_partition) + [end_key]
+        slices = list(zip(bounds, bounds[1:]))
+        weights = weigh(slices)
+        for _ in range(refine_rounds):
+            full = {bounds for bounds in slices if weights[bounds] >= sample_size}
+            if not full or len(weights) + len(full) * probes_per_partition > max_probes:
+                break
+            refined = []
+            for bounds in slices:
+                if bounds in full:
+                    cuts = [bounds[0]] + interpolate_keys(bounds[0], bounds[1], probes_per_partition) + [bounds[1]]
+                    refined.extend(zip(cuts, cuts[1:]))
+                else:
+                    refined.append(bounds)
+            weights.update(weigh([bounds for bounds in refined if bounds not in weights]))
+            slices = refined
+        
+        total = sum(weights[bounds] for bounds in slices)
+        if total == 0:
+            return interpolate_keys(start_key, end_key, partitions)
+        splits, seen = [], 0.0
+        for bounds in slices:
+            # Cut in front of the slice that would take this partition past its share
+            if seen >= total * (len(splits) + 1) / partitions and bounds[0] != start_key:
+                splits.append(bounds[0])
+                if len(splits) == partitions - 1:
+                    break
+            seen += weights[bounds]
+        return splits
+
+    def parallel_scan(self, start_key: str, end_key: str, split_points: Optional[Sequence[str]] = None,
+                      partitions: int = 4, ordered: bool = True, page_size: int = 100,
+                      buffer_pages: int = 2, max_workers: Optional[int] = None,
+                      as_records: bool = False) -> Iterator[Any]:
+        """
+        Scan a key range as several sub-ranges fetched concurrently.
+        
+        The range is cut at `split_points` (or at points chosen with
+        sample_split_points) and each sub-range is scanned by its own
+        worker, which pushes records into a queue of `buffer_pages` pages.
+        With `ordered`, partitions are disjoint and sorted, so the streaming
+        merge just drains their queues in turn and records come out in
+        global key order; later partitions fill their buffers meanwhile.
+        Without `ordered`, records are yielded as soon as any worker has
+        them, which keeps every worker busy.
+        
+        Args:
+            start_key: Starting key for the range (inclusive)
+            end_key: Ending key for the range (inclusive)
+            split_points: Keys to split at (optional, sampled otherwise)
+            partitions: Number of partitions when sampling split points
+            ordered: Yield records in key order
+            page_size: Records requested per range query
+            buffer_pages: Pages each worker may fetch ahead of the consumer
+            max_workers: Partitions scanned at once (defaults to one per partition)
+            as_records: Yield lazily decoded RangeRecords instead of dicts
+            
+        Yields:
+            Each record dict (with "key" and "value"), or RangeRecord
+        """
+        if split_points is None:
+            split_points = self.sample_split_points(start_key, end_key, partitions)
+        bounds = [start_key] + sorted(key for key in set(split_points) if start_key < key <= end_key) + [end_key]
+        ranges = list(zip(bounds, bounds[1:]))
+        last = len(ranges) - 1
+        
+        stop = threading.Event()
+        shared = None if ordered else queue.Queue(maxsize=buffer_pages * page_size * len(ranges))
+        queues = [shared] * len(ranges) if shared else [queue.Queue(maxsize=buffer_pages * page_size) for _ in ranges]
+        
+        def put(index: int, item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    queues[index].put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        
+        def produce(index: int) -> None:
+            low, high = ranges[index]
+            try:
+                for record in self.scan(low, high, page_size, prefetch=False, as_records=as_records):
+                    # Sub-ranges share their boundary key; it belongs to the later one
+                    key = record.key if as_records else record["key"]
+                    if index != last and key >= high:
+                        break
+                    if not put(index, record):
+                        return
+                put(index, _PARTITION_DONE)
+            except Exception as e:
+                put(index, _PartitionError(e))
+        
+        def consume(source: queue.Queue, partitions_left: int) -> Iterator[Dict[str, Any]]:
+            while partitions_left:
+                item = source.get()
+                if item is _PARTITION_DONE:
+                    partitions_left -= 1
+                elif isinstance(item, _PartitionError):
+                    raise item.error
+                else:
+                    yield item
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers or len(ranges))
+        try:
+            for index in range(len(ranges)):
+                executor.submit(produce, index)
+            if ordered:
+                for source in queues:
+                    yield from consume(source, 1)
+            else:
+                yield from consume(shared, len(ranges))
+        finally:
+            stop.set()
+            executor.shutdown(wait=False)
+
+    def _delete_key(self, key: str) -> None:
+        """Delete one key; a key that is already gone counts as deleted."""
+        try:
+            response = self.transport.delete(f"/record/{key}", "delete")
+            if response.status_code != 404:
+                response.raise_for_status()
+        finally:
+            self._invalidate(key)
+
+    def delete_range(self, start_key: str, end_key: str, dry_run: bool = False,
+                     page_size: int = 100, max_workers: int = DEFAULT_MAX_WORKERS,
+                     progress_interval: float = 5.0) -> Dict[str, Any]:
+        """
+        Delete every record in a key range, deleting while the range is still being scanned.
+        
+        Keys stream from `scan` (which prefetches the next page) straight
+        into a bounded pool of concurrent deletes, so a large range is never
+        enumerated up front and scanning overlaps with deleting.
+        
+        Args:
+            start_key: Starting key for the range (inclusive)
+            end_key: Ending key for the range (inclusive)
+            dry_run: Only count the matching records, without deleting them
+            page_size: Records requested per range query
+            max_workers: Deletes in flight at once
+            progress_interval: Seconds between progress lines (0 disables them)
+            
+        Returns:
+            Dictionary with the number of records matched and deleted, and the keys that failed
+        """
+        keys = (record["key"] for record in self.scan(start_key, end_key, page_size))
+        summary = {"matched": 0, "deleted": 0, "failed": [], "dry_run": dry_run}
+        started = last_progress = time.monotonic()
+        
+        def report(final: bool = False) -> None:
+            elapsed = time.monotonic() - started
+            if dry_run:
+                done, line = summary["matched"], f"Matched {summary['matched']} record(s)"
+            else:
+                done = summary["deleted"]
+                line = f"Deleted {done} record(s), {len(summary['failed'])} failed"
+            rate = done / elapsed if elapsed else 0.0
+            print(f"{line} in {elapsed:.1f}s ({rate:.0f}/s){'' if final else ' so far'}", file=sys.stderr)
+        
+        if dry_run:
+            outcomes = ((key, True, None) for key in keys)
+        else:
+            outcomes = ((result.key, result.ok, result.error)
+                        for result in run_batch(self._delete_key, keys, max_workers=max_workers))
+        for key, ok, error in outcomes:
+            summary["matched"] += 1
+            if not dry_run:
+                if ok:
+                    summary["deleted"] += 1
+                else:
+                    summary["failed"].append(key)
+                    print(f"Error deleting {key}: {error}", file=sys.stderr)
+            if progress_interval and time.monotonic() - last_progress >= progress_interval:
+                report()
+                last_progress = time.monotonic()
+        if progress_interval:
+            report(final=True)
+        return summary
+
+    def delete_prefix(self, prefix: str, **options: Any) -> Dict[str, Any]:
+        """
+        Delete every record whose key starts with `prefix` (see delete_range for the options).
+        """
+        if not prefix:
+            raise ValueError("prefix must not be empty")
+        return self.delete_range(prefix, prefix + _PREFIX_END, **options)
+
+    def cleanup_records(self, count: int = 10, max_workers: int = DEFAULT_MAX_WORKERS) -> None:
+        """Clean up the sample records, in parallel."""
+        self._run_batch(self._delete_user, range(1, count + 1), "Deleted", max_workers)
 
 def main():
     # Initialize the example
@@ -104,16 +559,22 @@ def main():
         
         # Example 3: Range query for specific city
         print("\nExample 3: Range query for users in New York (even IDs)")
-        result = example.perform_range_query("user:2", "user:9")
-        new_york_users = [record for record in result["records"] 
-                         if json.loads(record["value"])["city"] == "New York"]
-        print(json.dumps(new_york_users, indent=2))
+        records = example.query_records("user:2", "user:9")
+        new_york_users = where(records, "city", lambda city: city == "New York")
+        print(json.dumps([record.to_dict() for record in new_york_users], indent=2))
+        print(f"Their average age: {sum(column(new_york_users, 'age')) / max(len(new_york_users), 1):.1f}")
+        
+        # Example 4: Paginated scan
+        print("\nExample 4: Scanning users 1-9 three records per page")
+        for record in example.scan("user:1", "user:9", page_size=3):
+            print(record["key"])
        
         
     finally:
         # Clean up the sample records
         print("\nCleaning up sample records...")
         #example.cleanup_records()
+        example.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -3,13 +3,20 @@
 import os
 import sys
 import json
+import random
 import asyncio
 import websockets
 import ssl
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
 from enum import Enum
 from dotenv import load_dotenv
 
+# Shared helpers live in examples/common/python
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common', 'python'))
+from hpkv_codecs import HPKVValueCodec
+from hpkv_ratelimit import HPKVRateLimiter, THROTTLE_STATUSES, ThrottledError, get_rate_limiter, parse_retry_after
+from hpkv_websocket_wire import DEFAULT_COMPRESSION_THRESHOLD, MSGPACK_SUBPROTOCOL, WIRE_FORMATS, WireStats, wire_options
+
 class OperationCode(Enum):
     """Enumeration of HPKV WebSocket operation codes."""
     GET = 1
@@ -17,13 +24,37 @@ class OperationCode(Enum):
     UPDATE = 3
     DELETE = 4
 
+# Operations that can be resent after a reconnect without changing the outcome;
+# a partial UPDATE merges into the stored value, so replaying it could apply it twice
+IDEMPOTENT_OPERATIONS = frozenset((OperationCode.GET.value, OperationCode.INSERT.value, OperationCode.DELETE.value))
+
 class HPKVWebSocketClient:
-    def __init__(self, base_url: str = None, api_key: str = None):
+    def __init__(self, base_url: str = None, api_key: str = None,
+                 value_codec: Optional[HPKVValueCodec] = None,
+                 max_in_flight: int = 256, request_timeout: Optional[float] = 10.0,
+                 auto_reconnect: bool = True, reconnect_initial_delay: float = 0.1,
+                 reconnect_max_delay: float = 10.0, max_reconnect_attempts: Optional[int] = None,
+                 max_buffered: int = 1000, rate_limiter: Optional[HPKVRateLimiter] = None,
+                 wire_format: str = 'json', compression_threshold: Optional[int] = DEFAULT_COMPRESSION_THRESHOLD):
         """Initialize HPKV WebSocket client with API key.
         
         Args:
             base_url: HPKV server URL (optional, defaults to HPKV_BASE_URL env var)
             api_key: HPKV API key (optional, defaults to HPKV_API_KEY env var)
+            value_codec: How values and messages are encoded (optional, defaults to untagged JSON)
+            max_in_flight: Maximum number of requests awaiting a response; further sends wait
+            request_timeout: Seconds to wait for each response (None waits forever)
+            auto_reconnect: Reopen the connection when it drops and replay idempotent requests
+            reconnect_initial_delay: Upper bound in seconds of the first jittered reconnect delay
+            reconnect_max_delay: Cap in seconds on the exponentially growing reconnect delay
+            max_reconnect_attempts: Give up and fail pending requests after this many attempts (None retries forever)
+            max_buffered: Maximum sends held while reconnecting; further sends fail immediately
+            rate_limiter: Paces sends and retries throttled requests; may be shared with other clients
+                (defaults to the shared one from get_rate_limiter)
+            wire_format: 'json' for text frames, or 'msgpack' to offer binary msgpack frames,
+                falling back to JSON when the server doesn't accept them (requires msgpack)
+            compression_threshold: Offer permessage-deflate and compress messages of at least this
+                many bytes (defaults to 512; 0 compresses every message, None turns compression off)
         """
         # Load environment variables if not already loaded
         if not os.getenv('HPKV_BASE_URL') and not os.getenv('HPKV_API_KEY'):
@@ -36,6 +67,12 @@ class HPKVWebSocketClient:
             raise ValueError("HPKV base URL not provided. Set HPKV_BASE_URL environment variable or pass base_url parameter.")
         if not self.api_key:
             raise ValueError("HPKV API key not provided. Set HPKV_API_KEY environment variable or pass api_key parameter.")
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        if max_buffered < 0:
+            raise ValueError("max_buffered must not be negative")
+        if wire_format not in WIRE_FORMATS:
+            raise ValueError(f"wire_format must be one of {', '.join(WIRE_FORMATS)}")
         
         # Convert HTTP URL to WebSocket URL and add API key as query parameter
         self.ws_url = f"{self.base_url.replace('http://', 'ws://').replace('https://', 'wss://')}/ws?apiKey={self.api_key}"
@@ -43,6 +80,39 @@ class HPKVWebSocketClient:
         self.response_futures = {}
         self.websocket = None
         self.message_handler_task = None
+        self.value_codec = value_codec or HPKVValueCodec()
+        self.max_in_flight = max_in_flight
+        self.request_timeout = request_timeout
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
+        # Created on first send so it binds to the running event loop
+        self._window: Optional[asyncio.Semaphore] = None
+        
+        # Reconnection state; sent messages are kept until answered so they can be replayed
+        self.auto_reconnect = auto_reconnect
+        self.reconnect_initial_delay = reconnect_initial_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.max_reconnect_attempts = max_reconnect_attempts
+        self.max_buffered = max_buffered
+        self.reconnects = 0
+        self._sent_messages: Dict[int, Dict] = {}
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._buffered = 0
+        self._closing = False
+        
+        # Wire format and compression, offered on every connect; _binary and
+        # _deflating record what the server accepted on the current socket
+        self.wire_format = wire_format
+        self.compression_threshold = compression_threshold
+        self.wire_stats = WireStats()
+        self._msgpack = None
+        if wire_format == 'msgpack':
+            try:
+                import msgpack
+            except ImportError:
+                raise ImportError("wire_format='msgpack' requires the msgpack package (pip install msgpack)")
+            self._msgpack = msgpack
+        self._binary = False
+        self._deflating = False
         
         # Create SSL context
         self.ssl_context = ssl.create_default_context()
@@ -56,18 +126,61 @@ class HPKVWebSocketClient:
     
     def _serialize_value(self, value: Any) -> str:
         """Serialize value to string format."""
-        if isinstance(value, str):
-            return value
-        return json.dumps(value)
+        return self.value_codec.encode(value)
+    
+    def _encode_frame(self, message: Dict) -> Union[str, bytes]:
+        """Encode a message as a msgpack binary frame if negotiated, a JSON text frame otherwise."""
+        if self._binary:
+            frame = self._msgpack.packb(message, use_bin_type=True)
+            size = len(frame)
+        else:
+            frame = self.value_codec.dumps(message)
+            size = len(frame.encode('utf-8'))
+        stats = self.wire_stats
+        stats.messages_sent += 1
+        stats.payload_bytes_sent += size
+        if not self._deflating:
+            stats.wire_bytes_sent += size
+        return frame
+    
+    def _decode_frame(self, frame: Union[str, bytes]) -> Dict:
+        """Decode a received frame: binary frames are msgpack, text frames JSON.
+        
+        Raises:
+            ValueError: For a binary frame when msgpack wasn't negotiated
+        """
+        if isinstance(frame, bytes):
+            size = len(frame)
+            if not self._binary:
+                raise ValueError(f"Unexpected {size}-byte binary frame on a JSON connection")
+            message = self._msgpack.unpackb(frame, raw=False)
+        else:
+            size = len(frame.encode('utf-8'))
+            message = self.value_codec.loads(frame)
+        stats = self.wire_stats
+        stats.messages_received += 1
+        stats.payload_bytes_received += size
+        if not self._deflating:
+            stats.wire_bytes_received += size
+        return message
     
-    async def _handle_message(self, message: str):
+    @property
+    def negotiated_format(self) -> str:
+        """Wire format in use on the current connection ('msgpack' or 'json')."""
+        return 'msgpack' if self._binary else 'json'
+    
+    async def _handle_message(self, message: Union[str, bytes]):
         """Handle incoming WebSocket message."""
         try:
-            response = json.loads(message)
+            response = self._decode_frame(message)
             message_id = response.get('messageId')
             if message_id in self.response_futures:
                 future = self.response_futures.pop(message_id)
-                if 'error' in response:
+                self._sent_messages.pop(message_id, None)
+                if 'error' in response and response.get('code') in THROTTLE_STATUSES:
+                    future.set_exception(ThrottledError(response['error'], response['code'],
+                                                        parse_retry_after(response.get('retryAfter'))))
+                elif 'error' in response:
                     future.set_exception(Exception(response['error']))
                 else:
                     future.set_result(response)
@@ -76,53 +189,310 @@ class HPKVWebSocketClient:
     
     async def _message_handler(self):
         """Handle incoming WebSocket messages."""
+        websocket = self.websocket
         try:
-            async for message in self.websocket:
+            async for message in websocket:
                 await self._handle_message(message)
+            print("WebSocket connection closed", file=sys.stderr)
         except websockets.exceptions.ConnectionClosed:
             print("WebSocket connection closed", file=sys.stderr)
         except Exception as e:
             print(f"Error in message handler: {str(e)}", file=sys.stderr)
+        # Only the reader of the current socket reacts; one replaced by a reconnect just exits
+        if self.websocket is websocket:
+            self._connection_lost()
+    
+    def _connection_lost(self) -> None:
+        """Start reconnecting, or fail pending requests if reconnecting is off."""
+        if self._closing:
+            return
+        self.websocket = None
+        if not self.auto_reconnect:
+            self._fail_sent(ConnectionError("WebSocket connection closed"))
+            return
+        # Anything that isn't safe to resend fails now rather than after the reconnect
+        self._fail_sent(ConnectionError("WebSocket connection closed before a response was received"),
+                        lambda message: message.get('op') not in IDEMPOTENT_OPERATIONS)
+        if self._reconnect_task is None:
+            self._reconnect_task = asyncio.ensure_future(self._reconnect())
+    
+    def _fail_sent(self, error: Exception, predicate=None) -> None:
+        """Fail the futures of sent messages (those matching predicate, or all)."""
+        for message_id, message in list(self._sent_messages.items()):
+            if predicate is None or predicate(message):
+                self._sent_messages.pop(message_id, None)
+                future = self.response_futures.pop(message_id, None)
+                if future is not None and not future.done():
+                    future.set_exception(error)
+    
+    def _reconnect_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff: uniform in [0, min(max, initial * 2^attempt)]."""
+        return random.uniform(0, min(self.reconnect_max_delay, self.reconnect_initial_delay * (2 ** attempt)))
+    
+    async def _reconnect(self) -> bool:
+        """Reopen the connection with jittered backoff and replay unanswered requests.
+        
+        Returns:
+            bool: True once reconnected, False if attempts ran out or the client is closing
+        """
+        attempt = 0
+        try:
+            while not self._closing:
+                await asyncio.sleep(self._reconnect_delay(attempt))
+                attempt += 1
+                try:
+                    await self._open()
+                    # Resend in original order; message IDs are kept so waiting callers get the answers
+                    for message_id in sorted(self._sent_messages):
+                        message = self._sent_messages.get(message_id)
+                        if message is not None:
+                            await self.websocket.send(self._encode_frame(message))
+                except Exception as e:
+                    print(f"Reconnect attempt {attempt} failed: {str(e)}", file=sys.stderr)
+                    await self._close_socket()
+                    if self.max_reconnect_attempts is not None and attempt >= self.max_reconnect_attempts:
+                        self._fail_sent(ConnectionError(f"Could not reconnect after {attempt} attempts"))
+                        return False
+                    continue
+                self.reconnects += 1
+                print(f"WebSocket reconnected after {attempt} attempt(s)", file=sys.stderr)
+                return True
+            return False
+        finally:
+            self._reconnect_task = None
+    
+    async def _wait_for_reconnect(self) -> None:
+        """Hold a send until the reconnect in progress finishes, if there is room to buffer it."""
+        task = self._reconnect_task
+        if self._buffered >= self.max_buffered:
+            raise ConnectionError("WebSocket is reconnecting and the send buffer is full")
+        self._buffered += 1
+        try:
+            reconnected = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            reconnected = False
+        finally:
+            self._buffered -= 1
+        if not reconnected:
+            raise ConnectionError("WebSocket connection could not be re-established")
+    
+    async def _open(self) -> None:
+        """Open a socket and start its reader."""
+        # websockets rejects an SSL context for plain ws:// URLs (e.g. a local server)
+        connect_options = {'ssl': self.ssl_context} if self.ws_url.startswith('wss://') else {}
+        connect_options.update(wire_options(self.wire_format, self.compression_threshold, self.wire_stats))
+        self.websocket = await websockets.connect(
+            self.ws_url,
+            **connect_options
+        )
+        self._binary = self.websocket.subprotocol == MSGPACK_SUBPROTOCOL
+        self._deflating = any(getattr(factory, 'negotiated', False) for factory in connect_options.get('extensions', ()))
+        self.message_handler_task = asyncio.create_task(self._message_handler())
+    
+    async def _close_socket(self) -> None:
+        """Stop the reader and close the socket, if any."""
+        websocket, task = self.websocket, self.message_handler_task
+        self.websocket = None
+        self.message_handler_task = None
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if websocket:
+            await websocket.close()
     
     async def connect(self):
         """Establish WebSocket connection."""
+        if self._reconnect_task is not None:
+            await self._wait_for_reconnect()
         if not self.websocket:
-            self.websocket = await websockets.connect(
-                self.ws_url,
-                ssl=self.ssl_context
-            )
-            self.message_handler_task = asyncio.create_task(self._message_handler())
+            await self._open()
     
     async def disconnect(self):
         """Close WebSocket connection."""
-        if self.message_handler_task:
-            self.message_handler_task.cancel()
+        self._closing = True
+        try:
+            if self._reconnect_task is not None:
+                self._reconnect_task.cancel()
+                try:
+                    await self._reconnect_task
+                except asyncio.CancelledError:
+                    pass
+            await self._close_socket()
+            self._fail_sent(ConnectionError("WebSocket client disconnected"))
+        finally:
+            self._closing = False
+    
+    async def _send_message(self, message: Dict, timeout: Optional[float] = None) -> Any:
+        """Send message and wait for response.
+        
+        With a rate limiter, each send first waits for a token, and a
+        429/503 response is reported to the limiter and resent after a
+        jittered delay while its retry policy allows (partial updates only
+        after a 429, which means the server did not apply them).
+        
+        Args:
+            message: Message to send; a messageId is added
+            timeout: Seconds to wait for each response (defaults to request_timeout)
+        """
+        limiter = self.rate_limiter
+        if limiter is None:
+            return await self._send_once(message, timeout)
+        
+        attempt = 0
+        while True:
+            await limiter.acquire_async()
             try:
-                await self.message_handler_task
-            except asyncio.CancelledError:
-                pass
-        if self.websocket:
-            await self.websocket.close()
-            self.websocket = None
-        self.message_handler_task = None
+                response = await self._send_once(message, timeout)
+            except ThrottledError as e:
+                limiter.on_throttle(e.retry_after)
+                if not limiter.should_retry(e.status, attempt, message.get('op') in IDEMPOTENT_OPERATIONS):
+                    raise
+                await asyncio.sleep(limiter.backoff(attempt))
+                attempt += 1
+                continue
+            limiter.on_success()
+            return response
     
-    async def _send_message(self, message: Dict) -> Any:
-        """Send message and wait for response."""
+    async def _send_once(self, message: Dict, timeout: Optional[float] = None) -> Any:
+        """Send message once and wait for its response.
+        
+        At most `max_in_flight` messages await a response at once; callers
+        beyond that wait for a slot. If no response arrives within the
+        timeout, the pending future is dropped and asyncio.TimeoutError is raised.
+        
+        While the client is reconnecting, up to `max_buffered` sends wait for
+        the new connection and the rest raise ConnectionError. If the
+        connection drops after sending, idempotent messages are resent once
+        it is back and others raise ConnectionError.
+        
+        Args:
+            message: Message to send; a new messageId is set
+            timeout: Seconds to wait for the response (defaults to request_timeout)
+        """
+        if self._reconnect_task is not None:
+            await self._wait_for_reconnect()
         if not self.websocket:
             await self.connect()
+        if self._window is None:
+            self._window = asyncio.Semaphore(self.max_in_flight)
+        
+        async with self._window:
+            message_id = self._get_next_message_id()
+            message['messageId'] = message_id
+            
+            future = asyncio.get_running_loop().create_future()
+            self.response_futures[message_id] = future
+            self._sent_messages[message_id] = message
             
-        message_id = self._get_next_message_id()
-        message['messageId'] = message_id
+            try:
+                sent = False
+                if self.websocket is not None:
+                    try:
+                        await self.websocket.send(self._encode_frame(message))
+                        sent = True
+                    except websockets.exceptions.ConnectionClosed:
+                        pass
+                if not sent:
+                    if not self.auto_reconnect or message.get('op') not in IDEMPOTENT_OPERATIONS:
+                        raise ConnectionError("WebSocket connection closed")
+                    # Left in _sent_messages, so the reconnect sends it
+                    if self._reconnect_task is None:
+                        self._connection_lost()
+                return await asyncio.wait_for(future, timeout if timeout is not None else self.request_timeout)
+            except asyncio.TimeoutError:
+                raise asyncio.TimeoutError(f"No response to message {message_id} within the request timeout") from None
+            except ThrottledError:
+                raise
+            except Exception as e:
+                print(f"Error sending message: {str(e)}", file=sys.stderr)
+                raise
+            finally:
+                self.response_futures.pop(message_id, None)
+                self._sent_messages.pop(message_id, None)
+    
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently awaiting a response."""
+        return len(self.response_futures)
+    
+    async def batch(self, operations: Iterable[Sequence[Any]], window: Optional[int] = None) -> List[Any]:
+        """Run many operations pipelined on the one socket.
         
-        future = asyncio.Future()
-        self.response_futures[message_id] = future
+        Operations are pulled lazily from `operations` and at most `window`
+        of them are outstanding at a time, so large batches don't create a
+        task per item up front.
         
+        Args:
+            operations: Tuples naming a client method and its arguments, e.g.
+                ("read", key), ("create", key, value), ("update", key, value, True), ("delete", key)
+            window: Maximum outstanding operations (defaults to max_in_flight)
+            
+        Returns:
+            List[Any]: Result of each operation, in input order, as returned by
+                the corresponding method (False/None on failure or timeout)
+        """
+        methods = {
+            'create': self.create,
+            'read': self.read,
+            'update': self.update,
+            'delete': self.delete
+        }
+        window = window or self.max_in_flight
+        if not self.websocket:
+            await self.connect()
+        
+        results: Dict[int, Any] = {}
+        pending: Dict[asyncio.Future, int] = {}
+        
+        async def drain(limit: int) -> None:
+            while len(pending) > limit:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[pending.pop(task)] = task.result()
+        
+        count = 0
         try:
-            await self.websocket.send(json.dumps(message))
-            return await future
-        except Exception as e:
-            print(f"Error sending message: {str(e)}", file=sys.stderr)
-            raise
+            for index, operation in enumerate(operations):
+                name, args = operation[0], operation[1:]
+                if name not in methods:
+                    raise ValueError(f"Unknown operation: {name}")
+                await drain(window - 1)
+                pending[asyncio.ensure_future(methods[name](*args))] = index
+                count = index + 1
+            await drain(0)
+        finally:
+            for task in pending:
+                task.cancel()
+        return [results[i] for i in range(count)]
+    
+    def pipeline(self) -> 'HPKVPipeline':
+        """Collect operations and send them pipelined when the block exits.
+        
+        Example:
+            async with client.pipeline() as pipe:
+                pipe.create("user:1", user)
+                pipe.read("user:2")
+            print(pipe.results)
+        """
+        return HPKVPipeline(self)
+    
+    def write_behind(self, **options: Any) -> 'HPKVWriteBehindBuffer':
+        """Buffer writes and send only the latest one per key on each flush.
+    
+        Args:
+            **options: Passed to HPKVWriteBehindBuffer (flush_interval, flush_threshold, max_pending, max_retries)
+    
+        Example:
+            async with client.write_behind(flush_interval=0.05) as buffer:
+                await buffer.update("session:42", state)
+        """
+        from hpkv_websocket_writebehind import HPKVWriteBehindBuffer
+        return HPKVWriteBehindBuffer(self, **options)
     
     async def create(self, key: str, value: Any) -> bool:
         """Create a new key-value pair."""
@@ -152,18 +522,21 @@ class HPKVWebSocketClient:
             if 'error' in response:
                 return None
                 
-            try:
-                return json.loads(response['value'])
-            except (json.JSONDecodeError, TypeError):
-                return response['value']
+            return self.value_codec.decode(response['value'])
                 
         except Exception as e:
             print(f"Error reading record: {str(e)}", file=sys.stderr)
             return None
 
     async def update(self, key: str, value: Any, partial_update: bool = False) -> bool:
-        """Update an existing key-value pair."""
+        """Update an existing key-value pair.
+        
+        Partial updates are merged server-side as JSON, so they need the
+        default untagged JSON value codec.
+        """
         try:
+            if partial_update and self.value_codec.tagged:
+                raise ValueError("Partial updates require an untagged JSON value codec")
             message = {
                 "op": OperationCode.UPDATE.value if partial_update else OperationCode.INSERT.value,  # Update or Insert operation
                 "key": key,
@@ -192,6 +565,44 @@ class HPKVWebSocketClient:
             print(f"Error deleting record: {str(e)}", file=sys.stderr)
             return False
 
+class HPKVPipeline:
+    """Operations queued on an HPKVWebSocketClient and sent together via batch()."""
+    
+    def __init__(self, client: HPKVWebSocketClient, window: Optional[int] = None):
+        self.client = client
+        self.window = window
+        self.operations: List[tuple] = []
+        self.results: List[Any] = []
+    
+    def create(self, key: str, value: Any) -> 'HPKVPipeline':
+        self.operations.append(('create', key, value))
+        return self
+    
+    def read(self, key: str) -> 'HPKVPipeline':
+        self.operations.append(('read', key))
+        return self
+    
+    def update(self, key: str, value: Any, partial_update: bool = False) -> 'HPKVPipeline':
+        self.operations.append(('update', key, value, partial_update))
+        return self
+    
+    def delete(self, key: str) -> 'HPKVPipeline':
+        self.operations.append(('delete', key))
+        return self
+    
+    async def execute(self) -> List[Any]:
+        """Send the queued operations and return their results in order."""
+        operations, self.operations = self.operations, []
+        self.results = await self.client.batch(operations, self.window)
+        return self.results
+    
+    async def __aenter__(self) -> 'HPKVPipeline':
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            await self.execute()
+
 async def main():
     try:
         # Load environment variables from .env file
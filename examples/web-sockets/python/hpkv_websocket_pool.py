@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+import sys
+import json
+import time
+import zlib
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from dotenv import load_dotenv
+
+from hpkv_websocket_example import HPKVWebSocketClient
+
+class ConnectionStats:
+    """Request counters and latency of one pooled connection."""
+
+    def __init__(self, ewma_alpha: float = 0.2):
+        self.ewma_alpha = ewma_alpha
+        self.requests = 0
+        self.errors = 0
+        self.last_latency = 0.0
+        self.ewma_latency = 0.0
+
+    def observe(self, latency: float, ok: bool) -> None:
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        self.last_latency = latency
+        if self.requests == 1:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency += self.ewma_alpha * (latency - self.ewma_latency)
+
+class HPKVWebSocketPool:
+    """Pool of HPKV WebSocket connections with key-hash routing.
+
+    Each operation is routed to a connection chosen by a stable hash of its
+    key, so operations on the same key always share a socket and keep their
+    order, while different keys spread across all sockets. If a key's
+    connection is unhealthy, the operation goes to the next healthy one.
+    """
+
+    def __init__(self, size: int = 4, base_url: str = None, api_key: str = None, **client_options: Any):
+        """Initialize the pool.
+
+        Args:
+            size: Number of WebSocket connections
+            base_url: HPKV server URL (optional, defaults to HPKV_BASE_URL env var)
+            api_key: HPKV API key (optional, defaults to HPKV_API_KEY env var)
+            **client_options: Passed to each HPKVWebSocketClient (value_codec, max_in_flight, request_timeout,
+                auto_reconnect and the other reconnect options, rate_limiter)
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.clients = [HPKVWebSocketClient(base_url, api_key, **client_options) for _ in range(size)]
+        self.stats = [ConnectionStats() for _ in range(size)]
+        self.base_url = self.clients[0].base_url
+        # One per connection, created on first use so they bind to the running event loop
+        self._reopen_locks: List[Optional[asyncio.Lock]] = [None] * size
+
+    @property
+    def size(self) -> int:
+        return len(self.clients)
+
+    async def connect(self):
+        """Open every connection."""
+        await asyncio.gather(*(client.connect() for client in self.clients))
+
+    async def disconnect(self):
+        """Close every connection."""
+        await asyncio.gather(*(client.disconnect() for client in self.clients))
+
+    async def __aenter__(self) -> 'HPKVWebSocketPool':
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.disconnect()
+
+    @staticmethod
+    def _is_healthy(client: HPKVWebSocketClient) -> bool:
+        """A connection is healthy while its socket is open and its reader is running."""
+        return (client.websocket is not None and client.message_handler_task is not None
+                and not client.message_handler_task.done())
+
+    def _home_index(self, key: str) -> int:
+        """Connection a key hashes to, independent of health."""
+        return zlib.crc32(key.encode('utf-8')) % len(self.clients)
+
+    async def _route(self, key: str) -> int:
+        """Pick the connection for a key: its home connection, or the next healthy one."""
+        home = self._home_index(key)
+        for offset in range(len(self.clients)):
+            index = (home + offset) % len(self.clients)
+            if self._is_healthy(self.clients[index]):
+                return index
+        # Nothing is healthy: reopen the key's home connection, once for all callers waiting on it
+        lock = self._reopen_locks[home]
+        if lock is None:
+            lock = self._reopen_locks[home] = asyncio.Lock()
+        async with lock:
+            client = self.clients[home]
+            if not self._is_healthy(client):
+                await client.disconnect()
+                await client.connect()
+        return home
+
+    async def _call(self, key: str, method: str, *args: Any) -> Any:
+        return await self._call_on(await self._route(key), key, method, *args)
+
+    async def _call_on(self, index: int, key: str, method: str, *args: Any) -> Any:
+        """Run a client method on a given connection and record its latency."""
+        start = time.perf_counter()
+        result = await getattr(self.clients[index], method)(key, *args)
+        ok = result is not False and not (method == 'read' and result is None)
+        self.stats[index].observe(time.perf_counter() - start, ok)
+        return result
+
+    async def create(self, key: str, value: Any) -> bool:
+        """Create a new key-value pair."""
+        return await self._call(key, 'create', value)
+
+    async def read(self, key: str) -> Optional[Any]:
+        """Read a value by key."""
+        return await self._call(key, 'read')
+
+    async def update(self, key: str, value: Any, partial_update: bool = False) -> bool:
+        """Update an existing key-value pair."""
+        return await self._call(key, 'update', value, partial_update)
+
+    async def delete(self, key: str) -> bool:
+        """Delete a key-value pair."""
+        return await self._call(key, 'delete')
+
+    async def batch(self, operations: Iterable[Sequence[Any]], window: Optional[int] = None) -> List[Any]:
+        """Run many operations pipelined across all connections.
+
+        Operations are pulled lazily and routed like single operations, and
+        at most `window` of them are outstanding at a time.
+
+        Args:
+            operations: Tuples such as ("read", key) or ("create", key, value)
+            window: Maximum outstanding operations (defaults to the sum of the
+                connections' max_in_flight)
+
+        Returns:
+            List[Any]: Result of each operation, in input order
+        """
+        window = window or sum(client.max_in_flight for client in self.clients)
+        results: Dict[int, Any] = {}
+        pending: Dict[asyncio.Future, int] = {}
+
+        async def drain(limit: int) -> None:
+            while len(pending) > limit:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[pending.pop(task)] = task.result()
+
+        count = 0
+        try:
+            for position, operation in enumerate(operations):
+                method, key, args = operation[0], operation[1], operation[2:]
+                if method not in ('create', 'read', 'update', 'delete'):
+                    raise ValueError(f"Unknown operation: {method}")
+                await drain(window - 1)
+                index = await self._route(key)
+                pending[asyncio.ensure_future(self._call_on(index, key, method, *args))] = position
+                count = position + 1
+            await drain(0)
+        finally:
+            for task in pending:
+                task.cancel()
+        return [results[i] for i in range(count)]
+
+    def connection_stats(self) -> List[Dict[str, Any]]:
+        """Health, in-flight depth and latency of each connection."""
+        return [
+            {
+                "connection": index,
+                "healthy": self._is_healthy(client),
+                "in_flight": client.in_flight,
+                "requests": stats.requests,
+                "errors": stats.errors,
+                "last_latency_ms": round(stats.last_latency * 1000, 3),
+                "ewma_latency_ms": round(stats.ewma_latency * 1000, 3)
+            }
+            for index, (client, stats) in enumerate(zip(self.clients, self.stats))
+        ]
+
+async def main():
+    try:
+        # Load environment variables from .env file
+        load_dotenv()
+
+        async with HPKVWebSocketPool(size=4) as pool:
+            print("HPKV WebSocket Pool Example")
+            print("===========================")
+            print(f"\nUsing HPKV server: {pool.base_url} with {pool.size} connections")
+
+            count = 200
+            print(f"\n1. Creating {count} records across the pool...")
+            results = await asyncio.gather(*(pool.create(f"pool-user:{i}", {"id": i}) for i in range(count)))
+            print(f"Created {sum(results)}/{count} records")
+
+            print("\n2. Reading them back in one pipelined batch...")
+            values = await pool.batch([("read", f"pool-user:{i}") for i in range(count)])
+            print(f"Read {sum(value is not None for value in values)}/{count} records")
+
+            print("\n3. Connection stats:")
+            print(json.dumps(pool.connection_stats(), indent=2))
+
+            print("\n4. Deleting the records...")
+            results = await pool.batch([("delete", f"pool-user:{i}") for i in range(count)])
+            print(f"Deleted {sum(results)}/{count} records")
+
+    except Exception as e:
+        print(f"Error running example: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
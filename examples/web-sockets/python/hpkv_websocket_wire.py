@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+from typing import Any, Dict, Optional, Sequence
+
+from websockets.extensions.permessage_deflate import ClientPerMessageDeflateFactory, PerMessageDeflate
+from websockets.frames import Frame, Opcode
+
+# Subprotocol offered for msgpack envelopes in binary frames; a server that
+# doesn't select it gets the JSON text protocol
+MSGPACK_SUBPROTOCOL = 'hpkv.msgpack'
+
+WIRE_FORMATS = ('json', 'msgpack')
+
+# Messages smaller than this are sent uncompressed: a typical single-key
+# request saves only a few bytes through zlib and costs a compressor call
+DEFAULT_COMPRESSION_THRESHOLD = 512
+
+_DATA_OPCODES = (Opcode.TEXT, Opcode.BINARY, Opcode.CONT)
+
+
+class WireStats:
+    """Messages and bytes a client has sent and received, before and after compression.
+
+    Payload bytes are the encoded envelopes; wire bytes are the frame
+    payloads actually transmitted (the same unless permessage-deflate was
+    negotiated). Frame headers are not counted.
+    """
+
+    __slots__ = ('messages_sent', 'messages_received', 'payload_bytes_sent', 'payload_bytes_received',
+                 'wire_bytes_sent', 'wire_bytes_received')
+
+    def __init__(self):
+        self.messages_sent = 0
+        self.messages_received = 0
+        self.payload_bytes_sent = 0
+        self.payload_bytes_received = 0
+        self.wire_bytes_sent = 0
+        self.wire_bytes_received = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class _ThresholdDeflate(PerMessageDeflate):
+    """permessage-deflate that sends small messages uncompressed and counts wire bytes.
+
+    The extension allows each message to be compressed or not (RSV1 marks
+    compressed ones), so messages below the threshold skip zlib entirely.
+    """
+
+    def __init__(self, *args: Any, threshold: int, stats: WireStats, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.threshold = threshold
+        self.stats = stats
+
+    def encode(self, frame: Frame) -> Frame:
+        if frame.opcode in (Opcode.TEXT, Opcode.BINARY) and frame.fin and len(frame.data) < self.threshold:
+            encoded = frame
+        else:
+            encoded = super().encode(frame)
+        if encoded.opcode in _DATA_OPCODES:
+            self.stats.wire_bytes_sent += len(encoded.data)
+        return encoded
+
+    def decode(self, frame: Frame, **kwargs: Any) -> Frame:
+        if frame.opcode in _DATA_OPCODES:
+            self.stats.wire_bytes_received += len(frame.data)
+        return super().decode(frame, **kwargs)
+
+
+class ThresholdDeflateFactory(ClientPerMessageDeflateFactory):
+    """Offers permessage-deflate, compressing only messages of `threshold` bytes or more.
+
+    Uses memLevel 5 like websockets' own default, and offers
+    client_max_window_bits so the server may choose a smaller window.
+    """
+
+    def __init__(self, threshold: int, stats: WireStats):
+        super().__init__(client_max_window_bits=True, compress_settings={"memLevel": 5})
+        self.threshold = threshold
+        self.stats = stats
+        self.negotiated = False
+
+    def process_response_params(self, params: Sequence[Any], accepted_extensions: Sequence[Any]) -> PerMessageDeflate:
+        extension = super().process_response_params(params, accepted_extensions)
+        self.negotiated = True
+        return _ThresholdDeflate(
+            extension.remote_no_context_takeover,
+            extension.local_no_context_takeover,
+            extension.remote_max_window_bits,
+            extension.local_max_window_bits,
+            extension.compress_settings,
+            threshold=self.threshold,
+            stats=self.stats
+        )
+
+
+def wire_options(wire_format: str, compression_threshold: Optional[int],
+                 stats: WireStats) -> Dict[str, Any]:
+    """Keyword arguments for websockets.connect offering the wire format and compression.
+
+    Args:
+        wire_format: 'json' (text frames) or 'msgpack' (binary frames, negotiated)
+        compression_threshold: Compress messages of at least this many bytes (None disables compression)
+        stats: Counters updated by the compression extension
+
+    Returns:
+        Dict with `subprotocols`, `compression` and `extensions`
+    """
+    options: Dict[str, Any] = {'compression': None}
+    if wire_format == 'msgpack':
+        options['subprotocols'] = [MSGPACK_SUBPROTOCOL]
+    if compression_threshold is not None:
+        options['extensions'] = [ThresholdDeflateFactory(compression_threshold, stats)]
+    return options
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+
+import sys
+import time
+import asyncio
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+
+from hpkv_websocket_example import HPKVWebSocketClient
+
+class _PendingWrite:
+    """The latest write buffered for one key; every caller it replaced shares its future."""
+
+    __slots__ = ('op', 'value', 'partial', 'count', 'attempts', 'future')
+
+    def __init__(self, op: str, value: Any, partial: bool, future: asyncio.Future):
+        self.op = op
+        self.value = value
+        self.partial = partial
+        self.count = 1
+        self.attempts = 0
+        self.future = future
+
+class HPKVWriteBehindBuffer:
+    """Write-behind buffer for an HPKVWebSocketClient (or HPKVWebSocketPool).
+
+    `update` and `delete` only record the write in memory, keeping the latest
+    one per key (last writer wins), and return at once. A background task
+    flushes the buffer every `flush_interval` seconds, or as soon as
+    `flush_threshold` keys are pending, sending one pipelined write per key
+    through the client's existing socket. Many updates to the same key
+    within a flush window therefore cost one round trip.
+
+    Partial updates of JSON objects are merged into the pending value, the
+    way the server would merge them. `read` serves read-your-writes: a key
+    with a buffered or in-flight write is answered from the buffer.
+
+    At most `max_pending` keys are buffered. A write to a new key beyond
+    that waits for the next flush to make room, so a producer that outruns
+    HPKV slows down instead of growing the buffer without bound.
+
+    A write that fails is put back in the buffer and sent again with the
+    next flush, up to `max_retries` times, unless a newer write to its key
+    was buffered meanwhile; that newer write replaces it, and the failed
+    one is not retried.
+
+    Every write returns a Future that resolves to True once the flush
+    carrying it succeeded, or False once it failed for the last time.
+
+    Example:
+        async with client.write_behind(flush_interval=0.05) as buffer:
+            for i in range(1000):
+                await buffer.update("session:42", {"step": i})
+            print(await buffer.read("session:42"))
+    """
+
+    def __init__(self, client: HPKVWebSocketClient, flush_interval: float = 0.05,
+                 flush_threshold: int = 1000, max_pending: int = 10000, max_retries: int = 3):
+        """Initialize the buffer; the flusher task starts with the first write.
+
+        Args:
+            client: HPKVWebSocketClient or HPKVWebSocketPool the writes are sent through
+            flush_interval: Seconds between periodic flushes
+            flush_threshold: Pending keys that trigger an early flush
+            max_pending: Pending keys at which writes to new keys wait for a flush
+            max_retries: Later flushes a failed write is put back for before it is given up
+        """
+        if flush_interval <= 0:
+            raise ValueError("flush_interval must be positive")
+        if flush_threshold < 1:
+            raise ValueError("flush_threshold must be at least 1")
+        if max_pending < flush_threshold:
+            raise ValueError("max_pending must be at least flush_threshold")
+        if max_retries < 0:
+            raise ValueError("max_retries must not be negative")
+        self.client = client
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+
+        self._pending: Dict[str, _PendingWrite] = {}
+        # Writes taken by the flush in progress, still visible to read()
+        self._flushing: Dict[str, _PendingWrite] = {}
+        # Created on first use so they bind to the running event loop
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._space: Optional[asyncio.Condition] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self.writes = 0
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.flushes = 0
+        self.waits = 0
+
+    def _start(self) -> None:
+        if self._task is None:
+            self._flush_lock = asyncio.Lock()
+            self._space = asyncio.Condition()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _buffer(self, key: str, op: str, value: Any = None, partial: bool = False) -> asyncio.Future:
+        """Record a write for a key, merging it into or replacing the one already pending."""
+        if self._closed:
+            raise RuntimeError("HPKVWriteBehindBuffer is closed")
+        self._start()
+
+        pending = self._pending.get(key)
+        if pending is not None and partial and not self._mergeable(pending, value):
+            # A partial update that can't be merged locally must reach the server after the pending write
+            await self.flush()
+            pending = self._pending.get(key)
+        if pending is None and len(self._pending) >= self.max_pending:
+            self.waits += 1
+            self._wakeup.set()
+            async with self._space:
+                await self._space.wait_for(lambda: key in self._pending or len(self._pending) < self.max_pending)
+            if self._closed:
+                raise RuntimeError("HPKVWriteBehindBuffer is closed")
+            pending = self._pending.get(key)
+
+        self.writes += 1
+        if pending is None:
+            pending = self._pending[key] = _PendingWrite(op, value, partial,
+                                                         asyncio.get_running_loop().create_future())
+            if len(self._pending) >= self.flush_threshold:
+                self._wakeup.set()
+        elif partial:
+            pending.value = {**pending.value, **value}
+            pending.count += 1
+        else:
+            pending.op, pending.value, pending.partial = op, value, False
+            pending.count += 1
+        return pending.future
+
+    @staticmethod
+    def _mergeable(pending: _PendingWrite, value: Any) -> bool:
+        """Whether a partial update can be folded into the pending write of its key."""
+        return pending.op == 'update' and isinstance(pending.value, dict) and isinstance(value, dict)
+
+    async def update(self, key: str, value: Any, partial_update: bool = False) -> asyncio.Future:
+        """Buffer a write of `value` to `key`.
+
+        Args:
+            key: The key to write
+            value: The new value, or the fields to merge for a partial update
+            partial_update: Merge `value` into the stored JSON object instead of replacing it
+
+        Returns:
+            asyncio.Future: Resolves to True once the flush carrying the write succeeded, False if it failed
+        """
+        return await self._buffer(key, 'update', value, partial_update)
+
+    async def delete(self, key: str) -> asyncio.Future:
+        """Buffer a delete of `key`, replacing any write pending for it.
+
+        Returns:
+            asyncio.Future: Resolves to True once the flush carrying the delete succeeded, False if it failed
+        """
+        return await self._buffer(key, 'delete')
+
+    async def read(self, key: str) -> Optional[Any]:
+        """Read a key, seeing writes that are buffered or still being flushed."""
+        # Newest first: pending, then in flight, then the server
+        partials: List[Any] = []
+        value = None
+        for entry in (self._pending.get(key), self._flushing.get(key)):
+            if entry is None:
+                continue
+            if entry.op == 'delete':
+                break
+            if not entry.partial:
+                value = entry.value
+                break
+            partials.append(entry.value)
+        else:
+            value = await self.client.read(key)
+        for fields in reversed(partials):
+            if not isinstance(value, dict) or not isinstance(fields, dict):
+                # Only the server knows how it merges anything but JSON objects
+                await self.flush()
+                return await self.client.read(key)
+            value = {**value, **fields}
+        return value
+
+    @property
+    def pending(self) -> int:
+        """Number of keys with a buffered write."""
+        return len(self._pending)
+
+    async def flush(self) -> Dict[str, bool]:
+        """Send every buffered write now, one pipelined operation per key.
+
+        Failed writes are put back for the next flush while they have
+        retries left and no newer write to their key is buffered.
+
+        Returns:
+            Dict[str, bool]: Whether the write of each flushed key succeeded
+        """
+        if self._task is None:
+            return {}
+        async with self._flush_lock:
+            batch, self._pending = self._pending, {}
+            async with self._space:
+                self._space.notify_all()
+            if not batch:
+                return {}
+
+            self._flushing = batch
+            operations = [('delete', key) if entry.op == 'delete' else ('update', key, entry.value, entry.partial)
+                          for key, entry in batch.items()]
+            results: Dict[str, bool] = {}
+            try:
+                for key, ok in zip(batch, await self.client.batch(operations)):
+                    results[key] = bool(ok)
+            finally:
+                self._flushing = {}
+                for key, entry in batch.items():
+                    ok = results.get(key, False)
+                    if not ok and entry.attempts < self.max_retries and key not in self._pending:
+                        # Retried with the next flush; the future stays pending
+                        entry.attempts += 1
+                        self.retries += 1
+                        self._pending[key] = entry
+                        continue
+                    if not ok:
+                        self.failures += 1
+                        print(f"Error flushing {entry.count} write(s) for '{key}'", file=sys.stderr)
+                    if not entry.future.done():
+                        entry.future.set_result(ok)
+                self.requests += len(batch)
+                self.flushes += 1
+            return results
+
+    async def _run(self) -> None:
+        """Flusher task: flush on every interval or when the threshold is reached."""
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error flushing writes: {str(e)}", file=sys.stderr)
+
+    async def close(self) -> None:
+        """Stop accepting writes, flush what is buffered and stop the flusher task."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._task is None:
+            return
+        self._wakeup.set()
+        await self._task
+        # Anything written between the task's last flush and close, then
+        # the failed writes put back for a retry until they are resolved
+        await self.flush()
+        while self._pending:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+        # Writers still waiting for room see the buffer is closed
+        async with self._space:
+            self._space.notify_all()
+
+    async def __aenter__(self) -> 'HPKVWriteBehindBuffer':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+async def main():
+    try:
+        load_dotenv()
+        client = HPKVWebSocketClient()
+        await client.connect()
+
+        key = "session:write-behind"
+        count = 10000
+        print(f"Updating '{key}' {count} times through a write-behind buffer...")
+        start = time.perf_counter()
+        async with client.write_behind(flush_interval=0.05) as buffer:
+            for step in range(count):
+                await buffer.update(key, {"user": "John Doe", "step": step})
+            print(f"Read your writes: {await buffer.read(key)}")
+        elapsed = time.perf_counter() - start
+        print(f"Sent {buffer.requests} write(s) for {buffer.writes} update(s) in {elapsed:.2f}s")
+        print(f"Stored value: {await client.read(key)}")
+
+        await client.delete(key)
+        await client.disconnect()
+
+    except Exception as e:
+        print(f"Error running example: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())